@@ -2,13 +2,24 @@
 """
 AI Face Cropper for Tennis Player Photos
 Uses MediaPipe for face detection and creates circular face crops
+With several workers, images are cropped in a process pool where every worker builds its
+own FaceCropper (and MediaPipe detector) once; results stream back to the parent, which
+keeps the successful/failed/skipped counts
+Faces are detected on a reduced decode (cv2.IMREAD_REDUCED_COLOR_*, which JPEG decodes at
+1/2, 1/4 or 1/8 scale directly); the crop is decoded at the smallest scale that still has
+crop_size pixels across the face
+Detections are cached in <input_dir>/face_detections.json by source file hash and detector
+settings, so re-cropping with another size, expansion or mask only redoes the crop
 """
 
+import argparse
 import cv2
+import hashlib
 import numpy as np
 import mediapipe as mp
 import json
 import logging
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFilter
 import os
@@ -17,26 +28,114 @@ import os
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Images queued per worker in parallel mode: enough to keep workers busy without
+# submitting the whole player list up front
+QUEUE_PER_WORKER = 2
+
+# Decode scale -> imread flag; reduced JPEG decodes skip most of the IDCT work
+DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+# Shorter side of the image detection runs on; MediaPipe scales its input down to 192px anyway
+DETECTION_MIN_SIDE = 480
+
+DETECTIONS_VERSION = 1
+
+
+class DetectionCache:
+    """
+    Face detections by '<source sha256>|<detector settings>': image width/height, the detector's
+    relative box (None when no face was found) and confidence
+    Only the raw detection is cached; expansion, crop size and mask are applied afterwards
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        self.changed = False
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == DETECTIONS_VERSION:
+                    self.entries = data['entries']
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable detection cache {self.path}: {e}")
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, detection):
+        self.entries[key] = detection
+        self.changed = True
+
+    def update(self, entries):
+        if entries:
+            self.entries.update(entries)
+            self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': DETECTIONS_VERSION, 'entries': self.entries}, f, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+        self.changed = False
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
 
 class FaceCropper:
     def __init__(self, input_dir="./tennis-scrollytelling/images/players",
                  output_dir="./tennis-scrollytelling/images/players/cropped",
-                 crop_size=400):
+                 crop_size=400, fast_decode=True, expansion_factor=0.7):
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.crop_size = crop_size
+        # Detect on a reduced decode and crop from the smallest sufficient one (False: full-size decode)
+        self.fast_decode = fast_decode
+        # Expand the detected box by this much to include more of the head/shoulders
+        self.expansion_factor = expansion_factor
 
-        # Initialize MediaPipe Face Detection
+        # MediaPipe Face Detection, created on first use (in parallel mode only the workers detect)
         self.mp_face_detection = mp.solutions.face_detection
         self.mp_drawing = mp.solutions.drawing_utils
-        self.face_detection = self.mp_face_detection.FaceDetection(
-            model_selection=1,  # 1 for full range detection (better for photos)
-            min_detection_confidence=0.3
-        )
-
-    def detect_face(self, image):
-        """Detect face in image using MediaPipe"""
+        self.model_selection = 1  # 1 for full range detection (better for photos)
+        self.min_detection_confidence = 0.3
+        self._face_detection = None
+
+        self.detections = DetectionCache(self.input_dir / 'face_detections.json')
+        # Detections made by this cropper since the last take_new_detections() (parallel workers)
+        self.new_detections = {}
+
+    @property
+    def face_detection(self):
+        if self._face_detection is None:
+            self._face_detection = self.mp_face_detection.FaceDetection(
+                model_selection=self.model_selection,
+                min_detection_confidence=self.min_detection_confidence
+            )
+        return self._face_detection
+
+    @property
+    def detector_settings(self):
+        """Everything besides the source image that changes what the detector finds"""
+        decode = f"min{DETECTION_MIN_SIDE}" if self.fast_decode else 'full'
+        return f"mediapipe-m{self.model_selection}-c{self.min_detection_confidence}-{decode}"
+
+    def run_detector(self, image):
+        """The detector's relative box (xmin, ymin, width, height) and confidence of the first face, or None"""
         # Convert BGR to RGB
         rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         results = self.face_detection.process(rgb_image)
@@ -45,35 +144,83 @@ class FaceCropper:
             # Get the first (most confident) detection
             detection = results.detections[0]
             bboxC = detection.location_data.relative_bounding_box
-
-            # Convert relative coordinates to pixel coordinates
-            h, w, _ = image.shape
-            x = int(bboxC.xmin * w)
-            y = int(bboxC.ymin * h)
-            width = int(bboxC.width * w)
-            height = int(bboxC.height * h)
-
-            # Expand the bounding box to include more of the head/shoulders
-            expansion_factor = 0.7  # Expand by 70%
-            center_x = x + width // 2
-            center_y = y + height // 2
-
-            new_width = int(width * (1 + expansion_factor))
-            new_height = int(height * (1 + expansion_factor))
-
-            new_x = max(0, center_x - new_width // 2)
-            new_y = max(0, center_y - new_height // 2)
-            new_x2 = min(w, new_x + new_width)
-            new_y2 = min(h, new_y + new_height)
-
-            return {
-                'bbox': (new_x, new_y, new_x2, new_y2),
-                'confidence': detection.score[0],
-                'center': (center_x, center_y)
-            }
+            return (bboxC.xmin, bboxC.ymin, bboxC.width, bboxC.height), float(detection.score[0])
 
         return None
 
+    def face_box(self, relative_bbox, confidence, size):
+        """Expanded face box in pixels of an image of size (width, height)"""
+        # Convert relative coordinates to pixel coordinates
+        w, h = size
+        x = int(relative_bbox[0] * w)
+        y = int(relative_bbox[1] * h)
+        width = int(relative_bbox[2] * w)
+        height = int(relative_bbox[3] * h)
+
+        # Expand the bounding box to include more of the head/shoulders
+        center_x = x + width // 2
+        center_y = y + height // 2
+
+        new_width = int(width * (1 + self.expansion_factor))
+        new_height = int(height * (1 + self.expansion_factor))
+
+        new_x = max(0, center_x - new_width // 2)
+        new_y = max(0, center_y - new_height // 2)
+        new_x2 = min(w, new_x + new_width)
+        new_y2 = min(h, new_y + new_height)
+
+        return {
+            'bbox': (new_x, new_y, new_x2, new_y2),
+            'confidence': confidence,
+            'center': (center_x, center_y)
+        }
+
+    def detect_face(self, image, full_size=None):
+        """
+        Detect face in image using MediaPipe
+        full_size (width, height) maps the box onto the full-size image when image is a reduced decode
+        """
+        detection = self.run_detector(image)
+        if detection is None:
+            return None
+        h, w, _ = image.shape
+        return self.face_box(*detection, full_size or (w, h))
+
+    def take_new_detections(self):
+        new_detections, self.new_detections = self.new_detections, {}
+        return new_detections
+
+    def cached_detection(self, input_path):
+        """(cache key, cached detection or None) for input_path"""
+        key = f"{file_sha256(input_path)}|{self.detector_settings}"
+        return key, self.detections.get(key)
+
+    def run_detection(self, input_path, key):
+        """
+        Decode input_path for detection and detect; caches and returns the detection with the decode
+        Returns (detection, image, decode scale), or (None, None, None) if the image cannot be read
+        """
+        full_size = self.image_size(input_path) if self.fast_decode else None
+        detect_scale = self.decode_scale(min(full_size), DETECTION_MIN_SIDE) if full_size else 1
+
+        # Read image
+        image = cv2.imread(str(input_path), DECODE_FLAGS[detect_scale])
+        if image is None:
+            return None, None, None
+
+        h, w, _ = image.shape
+        width, height = full_size if detect_scale > 1 else (w, h)
+        found = self.run_detector(image)
+        detection = {
+            'width': width,
+            'height': height,
+            'relative_bbox': list(found[0]) if found else None,
+            'confidence': found[1] if found else None
+        }
+        self.detections.set(key, detection)
+        self.new_detections[key] = detection
+        return detection, image, detect_scale
+
     def create_circular_crop(self, image, bbox, output_size):
         """Create a circular crop from the detected face"""
         x1, y1, x2, y2 = bbox
@@ -112,25 +259,59 @@ class FaceCropper:
 
         return result
 
+    @staticmethod
+    def image_size(input_path):
+        """(width, height) as cv2.imread returns the image, from the file header only; None if unreadable"""
+        try:
+            with Image.open(input_path) as image:
+                width, height = image.size
+                # cv2 applies the EXIF orientation; 5-8 are the rotations by 90 degrees
+                if image.getexif().get(0x0112) in (5, 6, 7, 8):
+                    width, height = height, width
+            return width, height
+        except Exception:
+            return None
+
+    @staticmethod
+    def decode_scale(size, min_side):
+        """Largest decode scale (of DECODE_FLAGS) that keeps size's shorter side at least min_side"""
+        return max((scale for scale in DECODE_FLAGS if size / scale >= min_side), default=1)
+
     def process_image(self, input_path, output_path, player_name):
         """Process a single image"""
         try:
-            # Read image
-            image = cv2.imread(str(input_path))
-            if image is None:
-                logger.error(f"Could not load image: {input_path}")
-                return False
-
-            # Detect face
-            face_data = self.detect_face(image)
-            if not face_data:
+            key, detection = self.cached_detection(input_path)
+            image, detect_scale = None, None
+            if detection is None:
+                detection, image, detect_scale = self.run_detection(input_path, key)
+                if detection is None:
+                    logger.error(f"Could not load image: {input_path}")
+                    return False
+
+            if detection['relative_bbox'] is None:
                 logger.warning(f"No face detected in {player_name} ({input_path.name})")
                 return False
 
-            logger.info(f"Face detected for {player_name} (confidence: {face_data['confidence']:.2f})")
+            # Face box in full-size coordinates
+            face_data = self.face_box(detection['relative_bbox'], detection['confidence'],
+                                      (detection['width'], detection['height']))
+            logger.info(f"Face detected for {player_name} (confidence: {face_data['confidence']:.2f}"
+                        f"{', cached' if image is None else ''})")
+
+            # Decode (again) only at the scale the crop needs: the smallest with crop_size pixels across the face
+            bbox = face_data['bbox']
+            crop_scale = 1
+            if self.fast_decode:
+                crop_scale = self.decode_scale(min(bbox[2] - bbox[0], bbox[3] - bbox[1]), self.crop_size)
+            if image is None or crop_scale != detect_scale:
+                image = cv2.imread(str(input_path), DECODE_FLAGS[crop_scale])
+                if image is None:
+                    logger.error(f"Could not load image: {input_path}")
+                    return False
+            bbox = tuple(coordinate // crop_scale for coordinate in bbox)
 
             # Create circular crop
-            circular_face = self.create_circular_crop(image, face_data['bbox'], self.crop_size)
+            circular_face = self.create_circular_crop(image, bbox, self.crop_size)
 
             # Save as PNG to preserve transparency
             output_path_png = output_path.with_suffix('.png')
@@ -143,8 +324,12 @@ class FaceCropper:
             logger.error(f"Error processing {player_name}: {e}")
             return False
 
-    def batch_process(self, player_list_file="player_list.json"):
-        """Process all player images"""
+    def batch_process(self, player_list_file="player_list.json", workers=1, overwrite=False):
+        """
+        Process all player images
+        workers > 1 crops in a process pool (see crop_parallel); the output files are the same
+        overwrite re-crops images whose cropped version exists (detections come from the cache)
+        """
         # Load player data
         if not Path(player_list_file).exists():
             logger.error(f"Player list file not found: {player_list_file}")
@@ -153,7 +338,7 @@ class FaceCropper:
         with open(player_list_file, 'r', encoding='utf-8') as f:
             players = json.load(f)
 
-        logger.info(f"Processing {len(players)} player images...")
+        logger.info(f"Processing {len(players)} player images with {workers} worker(s)...")
         logger.info(f"Input directory: {self.input_dir}")
         logger.info(f"Output directory: {self.output_dir}")
         logger.info(f"Crop size: {self.crop_size}x{self.crop_size} pixels")
@@ -161,6 +346,7 @@ class FaceCropper:
         successful = 0
         failed = 0
         skipped = 0
+        tasks = []
 
         for i, player in enumerate(players, 1):
             player_name = player['player_name']
@@ -171,7 +357,8 @@ class FaceCropper:
             output_filename = Path(filename).stem + '_cropped.png'
             output_path = self.output_dir / output_filename
 
-            logger.info(f"\n--- Processing {i}/{len(players)}: {player_name} ---")
+            if workers <= 1:
+                logger.info(f"\n--- Processing {i}/{len(players)}: {player_name} ---")
 
             # Check if input file exists
             if not input_path.exists():
@@ -180,11 +367,15 @@ class FaceCropper:
                 continue
 
             # Check if output already exists
-            if output_path.exists():
+            if output_path.exists() and not overwrite:
                 logger.info(f"Skipping {player_name} - cropped version already exists")
                 skipped += 1
                 continue
 
+            if workers > 1:
+                tasks.append((input_path, output_path, player_name))
+                continue
+
             # Process the image
             success = self.process_image(input_path, output_path, player_name)
             if success:
@@ -192,6 +383,16 @@ class FaceCropper:
             else:
                 failed += 1
 
+        if tasks:
+            for done, (player_name, success, detections) in enumerate(self.crop_parallel(tasks, workers), 1):
+                logger.info(f"--- Cropped {done}/{len(tasks)}: {player_name} ({'ok' if success else 'failed'}) ---")
+                self.detections.update(detections)
+                if success:
+                    successful += 1
+                else:
+                    failed += 1
+        self.detections.save()
+
         # Summary
         logger.info(f"\n=== FACE CROPPING COMPLETE ===")
         logger.info(f"Successful: {successful}")
@@ -199,15 +400,71 @@ class FaceCropper:
         logger.info(f"Skipped (already existed): {skipped}")
         logger.info(f"Total: {len(players)}")
 
+    def crop_parallel(self, tasks, workers):
+        """
+        Run process_image for (input_path, output_path, player_name) tasks in a process pool
+        Every worker builds its own FaceCropper (the MediaPipe detector cannot be shared across
+        processes); at most workers * QUEUE_PER_WORKER images are in flight at a time.
+        Yields (player_name, success, new detections) in completion order
+        """
+        tasks = iter(tasks)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(str(self.input_dir), str(self.output_dir), self.crop_size,
+                                           self.fast_decode, self.expansion_factor)) as pool:
+            pending = set()
+            while True:
+                for task in tasks:
+                    pending.add(pool.submit(_crop_task, task))
+                    if len(pending) >= workers * QUEUE_PER_WORKER:
+                        break
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+
+# The worker process's own cropper, created once by _init_worker
+_worker_cropper = None
+
+
+def _init_worker(input_dir, output_dir, crop_size, fast_decode, expansion_factor):
+    global _worker_cropper
+    _worker_cropper = FaceCropper(input_dir=input_dir, output_dir=output_dir, crop_size=crop_size,
+                                  fast_decode=fast_decode, expansion_factor=expansion_factor)
+    _worker_cropper.face_detection
+
+
+def _crop_task(task):
+    input_path, output_path, player_name = task
+    success = _worker_cropper.process_image(input_path, output_path, player_name)
+    # The parent merges the worker's detections into the cache file
+    return player_name, success, _worker_cropper.take_new_detections()
+
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="Crop circular faces out of the player photos")
+    parser.add_argument('player_list', nargs='?', default="player_list.json", help="Player list JSON")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes, each with its own face detector (default: CPU count)")
+    parser.add_argument('--full-decode', dest='fast_decode', action='store_false',
+                        help="Decode every image at full size instead of detecting on a reduced decode")
+    parser.add_argument('--crop-size', type=int, default=400, help="Output size in pixels (default: 400)")
+    parser.add_argument('--expansion-factor', type=float, default=0.7,
+                        help="How much the detected face box is enlarged (default: 0.7)")
+    parser.add_argument('--overwrite', action='store_true',
+                        help="Re-crop existing crops (cached detections are reused)")
+    args = parser.parse_args()
+
     cropper = FaceCropper(
         input_dir="./tennis-scrollytelling/images/players",
         output_dir="./tennis-scrollytelling/images/players/cropped",
-        crop_size=400  # 400x400 pixel circular crops
+        crop_size=args.crop_size,  # 400x400 pixel circular crops by default
+        fast_decode=args.fast_decode,
+        expansion_factor=args.expansion_factor
     )
-    cropper.batch_process("player_list.json")
+    cropper.batch_process(args.player_list, workers=args.workers, overwrite=args.overwrite)
 
 
 if __name__ == "__main__":
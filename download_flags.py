@@ -2,14 +2,52 @@
 """
 Download flag images based on actual player data
 Reads player_list.json and downloads flags for all countries found
+Several countries download at once. Within a country the sources are hedged: the preferred
+source starts first, the next one joins if it has not answered within HEDGE_DELAY seconds
+(or as soon as it fails), and the first valid image wins. Sources that answered with a
+client error or a non-image for a country are remembered in a negative cache and skipped
+on later runs.
 """
 
 import os
 import json
+import threading
 import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 import time
-from typing import Set, Dict
+from typing import Callable, Dict, List, Optional, Set
+
+from http_cache import HttpCache
+
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Flag sources in order of preference; {iso} is the lower-case ISO code, {ISO} upper-case
+FLAG_SOURCES = [
+    # FlagCDN - very reliable, supports all ISO codes
+    "https://flagcdn.com/w80/{iso}.png",
+    "https://flagcdn.com/h60/{iso}.png",
+    "https://flagcdn.com/{iso}.svg",
+
+    # Flagpedia - good backup
+    "https://flagpedia.net/data/flags/w160/{iso}.png",
+    "https://flagpedia.net/data/flags/icon/{iso}.png",
+
+    # Wikipedia commons (very comprehensive)
+    "https://upload.wikimedia.org/wikipedia/commons/thumb/a/a9/Flag_of_{ISO}.svg/80px-Flag_of_{ISO}.svg.png",
+]
+
+# Seconds to wait for a source before starting the next one in parallel
+HEDGE_DELAY = 1.0
+# Countries downloaded at once, and requests in flight across all of them
+MAX_CONCURRENT_COUNTRIES = 6
+MAX_CONCURRENT_REQUESTS = 8
+REQUEST_TIMEOUT = 15
+
+NEGATIVE_CACHE_FILE = '.flag_source_failures.json'
+NEGATIVE_CACHE_TTL = 30 * 24 * 3600
 
 
 def load_player_countries(json_file: str = "./tennis-scrollytelling/data/player_list.json") -> Set[str]:
@@ -128,68 +166,169 @@ def get_iso_mapping() -> Dict[str, str]:
     }
 
 
-def download_flag(country_code: str, iso_code: str, flags_dir: Path) -> bool:
-    """Download flag image from various sources"""
+# Caps requests in flight across every country being downloaded
+request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+
+def fetch_flag(url: str, params=None, headers=None) -> requests.Response:
+    with request_slots:
+        return requests.get(url, params=params, timeout=REQUEST_TIMEOUT,
+                            headers={**REQUEST_HEADERS, **(headers or {})})
+
+
+class FlagSourceError(Exception):
+    """A source that did not give a usable flag; permanent failures go into the negative cache"""
+
+    def __init__(self, message: str, permanent: bool):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+class NegativeCache:
+    """(country, source URL) pairs that failed permanently, with when they failed; expire after ttl seconds"""
+
+    def __init__(self, path: str = NEGATIVE_CACHE_FILE, ttl: float = NEGATIVE_CACHE_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.failures = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.failures = json.load(f)
+            except (OSError, ValueError):
+                self.failures = {}
+
+    @staticmethod
+    def key(country_code: str, url: str) -> str:
+        return f"{country_code}|{url}"
+
+    def is_bad(self, country_code: str, url: str) -> bool:
+        failure = self.failures.get(self.key(country_code, url))
+        return failure is not None and time.time() - failure['at'] < self.ttl
+
+    def add(self, country_code: str, url: str, reason: str):
+        with self.lock:
+            self.failures[self.key(country_code, url)] = {'at': time.time(), 'reason': reason}
+
+    def save(self):
+        with self.lock:
+            temp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.failures, f, indent=1, sort_keys=True)
+            os.replace(temp_path, self.path)
+
+
+def flag_sources(iso_code: str, templates: Optional[List[str]] = None) -> List[str]:
+    return [template.format(iso=iso_code.lower(), ISO=iso_code) for template in (templates or FLAG_SOURCES)]
+
+
+def list_existing_flags(flags_dir: Path) -> Dict[str, str]:
+    """country code (lower case) -> flag file name, from one listing of flags_dir"""
+    existing = {}
+    if flags_dir.exists():
+        for name in sorted(os.listdir(flags_dir)):
+            existing.setdefault(name.split('.')[0].lower(), name)
+    return existing
+
+
+def fetch_source(url: str, http_cache: HttpCache = None) -> bytes:
+    """The flag image at url; FlagSourceError if the source has no usable image"""
+    try:
+        response = http_cache.get(fetch_flag, url) if http_cache is not None else fetch_flag(url)
+    except requests.exceptions.RequestException as e:
+        raise FlagSourceError(f"{type(e).__name__}: {e}", permanent=False)
+
+    if response.status_code >= 400:
+        # Client errors (404 and the like) will not change on retry; server errors might
+        raise FlagSourceError(f"HTTP {response.status_code}", permanent=response.status_code < 500)
+
+    # Check if we got actual image data
+    if len(response.content) < 100:  # Too small to be a real image
+        raise FlagSourceError(f"Response too small ({len(response.content)} bytes)", permanent=True)
+    content_type = response.headers.get('content-type', '')
+    if content_type and not content_type.startswith('image/'):
+        raise FlagSourceError(f"Not an image ({content_type})", permanent=True)
+    return response.content
+
+
+def fetch_hedged(country_code: str, sources: List[str], http_cache: HttpCache = None,
+                 negative_cache: NegativeCache = None, hedge_delay: float = HEDGE_DELAY,
+                 log: Callable[[str], None] = print):
+    """
+    (url, content) of the first valid flag among sources, or None
+    Sources start in order of preference: the next one when the running ones have not
+    answered within hedge_delay seconds, or right away when one fails
+    """
+    candidates = [url for url in sources
+                  if negative_cache is None or not negative_cache.is_bad(country_code, url)]
+    if len(candidates) < len(sources):
+        log(f"  🚫 Skipping {len(sources) - len(candidates)} source(s) that failed before")
+
+    pool = ThreadPoolExecutor(max_workers=len(candidates) or 1)
+    try:
+        pending = {}
+        next_source = 0
+        while True:
+            if next_source < len(candidates):
+                url = candidates[next_source]
+                log(f"  📡 Trying source {sources.index(url) + 1}: {url.split('/')[-2:]}")
+                pending[pool.submit(fetch_source, url, http_cache)] = url
+                next_source += 1
+            if not pending:
+                return None
+
+            done, _ = wait(pending, timeout=hedge_delay, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    return url, future.result()
+                except FlagSourceError as e:
+                    log(f"  ❌ Failed: {url.split('/')[-2:]}: {e}")
+                    if e.permanent and negative_cache is not None:
+                        negative_cache.add(country_code, url, str(e))
+                except Exception as e:
+                    log(f"  ❌ Error: {e}")
+    finally:
+        # Requests still running finish in the background; their answers are dropped
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def download_flag(country_code: str, iso_code: str, flags_dir: Path, http_cache: HttpCache = None,
+                  existing: Dict[str, str] = None, negative_cache: NegativeCache = None,
+                  sources: List[str] = None, log: Callable[[str], None] = print) -> bool:
+    """
+    Download flag image from various sources (answers are reused from http_cache when given)
+    existing is list_existing_flags(flags_dir), listed once by the caller for all countries
+    """
 
     # Check if already exists
-    existing_files = list(flags_dir.glob(f"{country_code.lower()}.*"))
-    if existing_files:
-        print(f"  ⏭️  Already exists: {existing_files[0].name}")
+    if existing is None:
+        existing = list_existing_flags(flags_dir)
+    if country_code.lower() in existing:
+        log(f"  ⏭️  Already exists: {existing[country_code.lower()]}")
         return True
 
-    # Multiple reliable sources - simplified
-    sources = [
-        # FlagCDN - very reliable, supports all ISO codes
-        f"https://flagcdn.com/w80/{iso_code.lower()}.png",
-        f"https://flagcdn.com/h60/{iso_code.lower()}.png",
-        f"https://flagcdn.com/{iso_code.lower()}.svg",
-
-        # Flagpedia - good backup
-        f"https://flagpedia.net/data/flags/w160/{iso_code.lower()}.png",
-        f"https://flagpedia.net/data/flags/icon/{iso_code.lower()}.png",
-
-        # Wikipedia commons (very comprehensive)
-        f"https://upload.wikimedia.org/wikipedia/commons/thumb/a/a9/Flag_of_{iso_code}.svg/80px-Flag_of_{iso_code}.svg.png",
-    ]
-
-    for i, url in enumerate(sources):
-        try:
-            print(f"  📡 Trying source {i + 1}: {url.split('/')[-2:]}")
-
-            response = requests.get(url, timeout=15, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            })
-            response.raise_for_status()
-
-            # Check if we got actual image data
-            if len(response.content) < 100:  # Too small to be a real image
-                print(f"  ⚠️  Response too small ({len(response.content)} bytes)")
-                continue
-
-            # Determine file extension
-            if url.endswith('.svg'):
-                ext = 'svg'
-            elif url.endswith('.webp'):
-                ext = 'webp'
-            else:
-                ext = 'png'
-
-            # Save the image
-            filename = flags_dir / f"{country_code.lower()}.{ext}"
-            with open(filename, 'wb') as f:
-                f.write(response.content)
-
-            print(f"  ✅ Downloaded: {filename.name} ({len(response.content):,} bytes)")
-            return True
-
-        except requests.exceptions.RequestException as e:
-            print(f"  ❌ Failed: {e}")
-            continue
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
-            continue
-
-    return False
+    result = fetch_hedged(country_code, sources or flag_sources(iso_code), http_cache, negative_cache, log=log)
+    if result is None:
+        return False
+    url, content = result
+
+    # Determine file extension
+    if url.endswith('.svg'):
+        ext = 'svg'
+    elif url.endswith('.webp'):
+        ext = 'webp'
+    else:
+        ext = 'png'
+
+    # Save the image
+    filename = flags_dir / f"{country_code.lower()}.{ext}"
+    with open(filename, 'wb') as f:
+        f.write(content)
+
+    log(f"  ✅ Downloaded: {filename.name} ({len(content):,} bytes)")
+    return True
 
 
 # def create_fallback_flag(country_code: str, flags_dir: Path):
@@ -207,7 +346,7 @@ def download_flag(country_code: str, iso_code: str, flags_dir: Path) -> bool:
 #     print(f"  🎨 Created fallback: {filename.name}")
 
 
-def retry_failed_flags():
+def retry_failed_flags(http_cache: HttpCache = None, negative_cache: NegativeCache = None):
     """Retry downloading the flags that failed in the previous run"""
     print("🔄 Retrying failed flags with correct mappings...")
 
@@ -230,17 +369,20 @@ def retry_failed_flags():
         iso_code = iso_mapping.get(country_code, country_code)
         print(f"  🔄 Mapping {country_code} → {iso_code}")
 
-        if download_flag(country_code, iso_code, flags_dir):
+        if download_flag(country_code, iso_code, flags_dir, http_cache, negative_cache=negative_cache):
             successful += 1
         else:
             print(f"  ❌ Still failed, no fallback")
             # print(f"  ❌ Still failed, keeping fallback")
             # create_fallback_flag(country_code, flags_dir)
 
+    if negative_cache is not None:
+        negative_cache.save()
     print(f"\n✅ Successfully downloaded {successful}/{len(failed_countries)} previously failed flags")
 
 
-def main():
+def main(http_cache: HttpCache = None, negative_cache: NegativeCache = None,
+         max_countries: int = MAX_CONCURRENT_COUNTRIES):
     print("🏁 Tennis Flag Downloader")
     print("=" * 50)
 
@@ -261,37 +403,53 @@ def main():
     # Download flags
     successful = 0
     failed = []
+    # One directory listing instead of a glob per country
+    existing = list_existing_flags(flags_dir)
 
-    print(f"\n🚀 Downloading {len(countries)} flags...")
+    print(f"\n🚀 Downloading {len(countries)} flags ({max_countries} at a time)...")
 
-    for i, country_code in enumerate(sorted(countries), 1):
-        print(f"\n[{i:2d}/{len(countries)}] 🏳️  {country_code}")
+    def download_country(country_code):
+        # Each country's messages are collected and printed together once it is done
+        lines = []
 
         # Get ISO code
         iso_code = iso_mapping.get(country_code, country_code)
         if iso_code != country_code:
-            print(f"  🔄 Mapping {country_code} → {iso_code}")
+            lines.append(f"  🔄 Mapping {country_code} → {iso_code}")
 
-        if download_flag(country_code, iso_code, flags_dir):
-            successful += 1
-        else:
-            print(f"  ⚠️  Creating fallback for {country_code}")
-            create_fallback_flag(country_code, flags_dir)
-            failed.append(country_code)
+        success = download_flag(country_code, iso_code, flags_dir, http_cache, existing=existing,
+                                negative_cache=negative_cache, log=lines.append)
+        return country_code, success, lines
 
-        # Be respectful to servers
-        if i < len(countries):  # Don't sleep after last one
-            time.sleep(0.8)
+    try:
+        with ThreadPoolExecutor(max_workers=max_countries) as pool:
+            results = pool.map(download_country, sorted(countries))
+            for i, (country_code, success, lines) in enumerate(results, 1):
+                print(f"\n[{i:2d}/{len(countries)}] 🏳️  {country_code}")
+                for line in lines:
+                    print(line)
+
+                if success:
+                    successful += 1
+                else:
+                    print(f"  ❌ Failed, no fallback")
+                    failed.append(country_code)
+    finally:
+        # Failures found so far are kept even when the run is interrupted
+        if negative_cache is not None:
+            negative_cache.save()
 
     # Summary
     print(f"\n📊 Download Summary:")
     print(f"   ✅ Successfully downloaded: {successful}")
-    print(f"   🎨 Fallback SVGs created: {len(failed)}")
-    print(f"   📁 Total flags ready: {len(countries)}")
+    print(f"   ❌ Failed: {len(failed)}")
+    print(f"   📁 Total flags ready: {successful}/{len(countries)}")
+    if http_cache is not None:
+        print(f"   💾 {http_cache.summary()}")
 
     if failed:
-        print(f"\n⚠️  Fallback flags created for: {', '.join(failed)}")
-        print("   These will show country codes with colored backgrounds")
+        print(f"\n⚠️  No flag for: {', '.join(failed)}")
+        print("   Check their ISO codes in get_iso_mapping()")
 
     # Show directory contents
     flag_files = list(flags_dir.glob("*"))
@@ -312,7 +470,10 @@ def main():
 if __name__ == "__main__":
     import sys
 
+    # Shared with image_loader.py, so reruns only fetch flags that are new or expired
+    http_cache = HttpCache('.http_cache')
+    negative_cache = NegativeCache()
     if len(sys.argv) > 1 and sys.argv[1] == "retry":
-        retry_failed_flags()
+        retry_failed_flags(http_cache, negative_cache)
     else:
-        main()
\ No newline at end of file
+        main(http_cache, negative_cache)
\ No newline at end of file
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP response cache
+Shared by image_loader.py and download_flags.py so reruns only go to the network for
+entries they have not seen (or whose cached answer expired). Entries older than the TTL
+are revalidated with If-None-Match / If-Modified-Since when the server sent an ETag or
+Last-Modified, and the least recently used entries are evicted once the cache outgrows
+max_bytes.
+
+The cache does not talk HTTP itself: get() takes a fetch(url, params=..., headers=...)
+callable returning a requests-style response, so callers keep their own session, rate
+limiting and timeouts, and a cache hit costs no request at all.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_TTL = 30 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Response headers kept with an entry
+STORED_HEADERS = ('content-type', 'content-length', 'etag', 'last-modified')
+
+
+class CachedResponse:
+    """The parts of a requests.Response the downloaders use, for a cached (or just stored) 2xx answer"""
+
+    def __init__(self, url, status_code, headers, content, from_cache):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=8192):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+class HttpCache:
+    """
+    On-disk cache of GET responses, one <key>.json (metadata) + <key>.body pair per URL and params
+    - ttl: seconds an entry is served without asking the server
+    - max_bytes: total size of the cached bodies before least recently used entries are evicted
+    """
+
+    def __init__(self, cache_dir='.http_cache', ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'evicted': 0}
+        self.total_bytes = sum(path.stat().st_size for path in self.cache_dir.glob('*.body'))
+
+    @staticmethod
+    def key(url, params=None):
+        text = json.dumps({'url': url, 'params': params or {}}, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def _load(self, key):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    @staticmethod
+    def _write_atomic(path, data):
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _store(self, key, url, status_code, headers, content):
+        meta_path, body_path = self._paths(key)
+        headers = {name: headers[name] for name in STORED_HEADERS if name in headers}
+        meta = {'url': url, 'status_code': status_code, 'headers': headers, 'stored_at': time.time()}
+        with self.lock:
+            previous = body_path.stat().st_size if body_path.exists() else 0
+            self._write_atomic(body_path, content)
+            self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+            self.total_bytes += len(content) - previous
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+        return CachedResponse(url, status_code, headers, content, from_cache=False)
+
+    def _touch(self, key, meta=None):
+        """Mark an entry as used (eviction order) and, with meta, rewrite its metadata"""
+        meta_path, _ = self._paths(key)
+        with self.lock:
+            if meta is not None:
+                self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+            try:
+                os.utime(meta_path)
+            except OSError:
+                pass
+
+    def count(self, stat, n=1):
+        """Add n to one of the stats; callers that fetch past get() (batched requests) count their misses here"""
+        with self.lock:
+            self.stats[stat] += n
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is under 90% of max_bytes (lock held)"""
+        entries = []
+        for meta_path in self.cache_dir.glob('*.json'):
+            body_path = meta_path.with_suffix('.body')
+            try:
+                entries.append((meta_path.stat().st_mtime, meta_path, body_path, body_path.stat().st_size))
+            except OSError:
+                continue
+        entries.sort(key=lambda entry: entry[0])
+        for _, meta_path, body_path, size in entries:
+            if self.total_bytes <= self.max_bytes * 0.9:
+                break
+            for path in (meta_path, body_path):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self.total_bytes -= size
+            self.stats['evicted'] += 1
+
+    def lookup(self, url, params=None, ttl=None):
+        """The cached answer for url and params if it is still fresh, else None (no request is made)"""
+        ttl = self.ttl if ttl is None else ttl
+        key = self.key(url, params)
+        meta, body = self._load(key)
+        if meta is None or time.time() - meta['stored_at'] >= ttl:
+            return None
+        self._touch(key)
+        self.count('hits')
+        return CachedResponse(url, meta['status_code'], meta['headers'], body, from_cache=True)
+
+    def put(self, url, params=None, content=b'', headers=None, status_code=200):
+        """
+        Store an answer for url and params without a request, e.g. one entity of a batched
+        API call filed under the single-entity request so later lookups of either kind find it
+        """
+        return self._store(self.key(url, params), url, status_code, headers or {}, content)
+
+    def get(self, fetch, url, params=None, headers=None, ttl=None):
+        """
+        Cached GET: served from disk while fresh, revalidated when stale, fetched when missing
+        Only 2xx answers are stored; anything else is returned as fetch() returned it
+        """
+        cached = self.lookup(url, params, ttl)
+        if cached is not None:
+            return cached
+
+        key = self.key(url, params)
+        meta, body = self._load(key)
+        request_headers = dict(headers or {})
+        if meta is not None:
+            if 'etag' in meta['headers']:
+                request_headers['If-None-Match'] = meta['headers']['etag']
+            if 'last-modified' in meta['headers']:
+                request_headers['If-Modified-Since'] = meta['headers']['last-modified']
+
+        response = fetch(url, params=params, headers=request_headers)
+
+        if response.status_code == 304 and meta is not None:
+            meta['stored_at'] = time.time()
+            self._touch(key, meta)
+            self.count('revalidated')
+            return CachedResponse(url, meta['status_code'], meta['headers'], body, from_cache=True)
+
+        self.count('misses')
+        if 200 <= response.status_code < 300:
+            headers = {name.lower(): value for name, value in response.headers.items()}
+            return self._store(key, url, response.status_code, headers, response.content)
+        return response
+
+    def summary(self):
+        return (f"HTTP cache: {self.stats['hits']} hits, {self.stats['revalidated']} revalidated, "
+                f"{self.stats['misses']} fetched, {self.stats['evicted']} evicted")
@@ -2,16 +2,33 @@
 """
 Tennis Player Image Downloader
 Downloads player images from Wikimedia using Wikidata IDs
+Players are processed by a thread pool; requests to each Wikimedia host go through a
+token bucket so the run stays within a polite request rate however many workers run
+
+Downloads are recorded in <output_dir>/manifest.json (source URL, content type, size,
+SHA-256, ETag per player), which is what decides whether a player is done. Images are
+stored once under objects/<sha256><ext>; <player_id><ext> is a hard link to that object.
+Interrupted transfers are kept in partial/ (one file per player and URL, with a sidecar
+holding the URL and ETag) and resumed with If-Range requests on retry.
 """
 
+import argparse
+import hashlib
 import json
+import math
 import os
+import re
 import requests
+import shutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import urlparse
 import logging
 
+from http_cache import HttpCache
+
 # Set up logging with proper encoding
 logging.basicConfig(
     level=logging.INFO,
@@ -23,47 +40,310 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Requests per second (sustained, and burst) allowed per host
+HOST_RATES = {
+    'www.wikidata.org': (5, 5),
+    'en.wikipedia.org': (5, 5),
+    'commons.wikimedia.org': (5, 5),
+    'upload.wikimedia.org': (5, 5),
+}
+DEFAULT_RATE = (2, 2)
+DEFAULT_WORKERS = 8
+
+# Most ids/titles the Wikidata and MediaWiki APIs accept in one request
+WIKIDATA_BATCH_SIZE = 50
+WIKIPEDIA_BATCH_SIZE = 50
+
+# Crops are FaceCropper's crop_size (400px) square, cut from the face box expanded by 70%,
+# which usually spans about a third of a portrait's width; thumbnails only need that much
+DEFAULT_CROP_SIZE = 400
+DEFAULT_FACE_FRACTION = 0.35
+# Thumbnail widths Wikimedia pre-renders and caches; other widths are rendered on demand
+THUMBNAIL_WIDTHS = (250, 330, 500, 960, 1280, 1920, 3840)
+
+MANIFEST_VERSION = 1
+
+# File extension for the image content types Wikimedia serves
+IMAGE_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/svg+xml': '.svg',
+    'image/tiff': '.tif',
+}
+
+
+def sniff_image_type(data):
+    """Content type from the first bytes of an image file, or None if it is not a known image"""
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if data.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    if data.startswith(b'RIFF') and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data.startswith((b'II*\x00', b'MM\x00*')):
+        return 'image/tiff'
+    if b'<svg' in data[:1024]:
+        return 'image/svg+xml'
+    return None
+
+
+def target_width(crop_size=DEFAULT_CROP_SIZE, face_fraction=DEFAULT_FACE_FRACTION):
+    """Smallest standard thumbnail width that still gives crop_size pixels across the face crop"""
+    needed = math.ceil(crop_size / face_fraction)
+    return next((width for width in THUMBNAIL_WIDTHS if width >= needed), needed)
+
+
+def thumbnail_url(url, width):
+    """
+    The width-pixel thumbnail of a Commons / Wikipedia image URL, or None if url is not one
+    - Special:FilePath/<file> takes a width parameter (and serves the original when it is smaller)
+    - upload.wikimedia.org originals and thumbnails map to .../thumb/<a>/<ab>/<file>/<width>px-<file>
+    """
+    if '/wiki/Special:FilePath/' in url:
+        return f"{url.split('?')[0]}?width={width}"
+
+    if url.startswith('https://upload.wikimedia.org/') and '/thumb/' in url:
+        return re.sub(r'(?<=[/-])\d+px-(?=[^/]*$)', f'{width}px-', url)
+
+    original = re.match(r'(https://upload\.wikimedia\.org/[^/]+/[^/]+)/(\w/\w\w)/([^/]+)$', url)
+    if original:
+        prefix, hash_path, filename = original.groups()
+        if filename.lower().endswith(('.tif', '.tiff', '.pdf', '.djvu')):
+            # Paged formats have page-prefixed thumbnail names; use the original
+            return None
+        # SVGs are rendered to PNG thumbnails
+        suffix = '.png' if filename.lower().endswith('.svg') else ''
+        return f"{prefix}/thumb/{hash_path}/{filename}/{width}px-{filename}{suffix}"
+    return None
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, holding at most burst tokens"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """One token bucket per host, created on first use"""
+
+    def __init__(self, host_rates=None, default_rate=DEFAULT_RATE):
+        self.host_rates = dict(HOST_RATES if host_rates is None else host_rates)
+        self.default_rate = default_rate
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(*self.host_rates.get(host, self.default_rate))
+            bucket = self.buckets[host]
+        bucket.acquire()
+
+
+class AssetManifest:
+    """
+    player_id -> {source_url, content_type, bytes, sha256, etag, file, object} of every downloaded image
+    Loaded with one read; saved atomically after every change so an interrupted run keeps its progress
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.assets = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == MANIFEST_VERSION:
+                    self.assets = data['assets']
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable asset manifest {self.path}: {e}")
+
+    def __contains__(self, player_id):
+        return str(player_id) in self.assets
+
+    def get(self, player_id):
+        return self.assets.get(str(player_id))
+
+    def objects(self):
+        """sha256 -> object path of every stored image"""
+        with self.lock:
+            return {asset['sha256']: asset['object'] for asset in self.assets.values()}
+
+    def _save(self):
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'assets': self.assets}, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def set(self, player_id, asset):
+        with self.lock:
+            self.assets[str(player_id)] = asset
+            self._save()
+
+    def remove(self, player_ids):
+        with self.lock:
+            for player_id in player_ids:
+                self.assets.pop(str(player_id), None)
+            self._save()
+
 
 class TennisPlayerImageDownloader:
-    def __init__(self, output_dir="./tennis-scrollytelling/images/players"):
+    def __init__(self, output_dir="./tennis-scrollytelling/images/players", rate_limiter=None, http_cache=None,
+                 crop_size=DEFAULT_CROP_SIZE, face_fraction=DEFAULT_FACE_FRACTION):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'TennisPlayerImageDownloader/1.0 (https://example.com/contact)'
-        })
+        # Width of the thumbnails requested instead of full-resolution originals
+        self.thumb_width = target_width(crop_size, face_fraction)
+        self.objects_dir = self.output_dir / 'objects'
+        self.partial_dir = self.output_dir / 'partial'
+        self.objects_dir.mkdir(exist_ok=True)
+        self.partial_dir.mkdir(exist_ok=True)
+        self.manifest = AssetManifest(self.output_dir / 'manifest.json')
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        # API answers (Wikidata, Wikipedia) are served from here when given; image downloads are not
+        self.http_cache = http_cache
+        # requests.Session is not guaranteed thread-safe, so every worker thread gets its own
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        if not hasattr(self._local, 'session'):
+            session = requests.Session()
+            session.headers.update({
+                'User-Agent': 'TennisPlayerImageDownloader/1.0 (https://example.com/contact)'
+            })
+            self._local.session = session
+        return self._local.session
+
+    def fetch(self, url, **kwargs):
+        """session.get after waiting for the host's rate limiter"""
+        self.rate_limiter.acquire(url)
+        return self.session.get(url, **kwargs)
+
+    def get(self, url, params=None, timeout=None, stream=False):
+        """GET through the HTTP cache (when set) for API requests; streamed downloads always go out"""
+        if self.http_cache is None or stream:
+            return self.fetch(url, params=params, timeout=timeout, stream=stream)
+        return self.http_cache.get(
+            lambda url, params=None, headers=None: self.fetch(url, params=params, headers=headers, timeout=timeout),
+            url, params=params)
+
+    @staticmethod
+    def enwiki_title_from_entity(entity):
+        """English Wikipedia page title from a Wikidata entity's sitelinks"""
+        if 'sitelinks' in entity and 'enwiki' in entity['sitelinks']:
+            return entity['sitelinks']['enwiki']['title']
+        return None
 
-    def get_wikipedia_page_from_wikidata(self, wikidata_id):
-        """Get Wikipedia page title from Wikidata ID"""
-        url = "https://www.wikidata.org/w/api.php"
+    @staticmethod
+    def image_url_from_entity(entity):
+        """Commons URL of a Wikidata entity's image (P18) claim"""
+        if 'claims' in entity:
+            # Look for image property (P18)
+            if 'P18' in entity['claims']:
+                image_claim = entity['claims']['P18'][0]
+                if 'mainsnak' in image_claim and 'datavalue' in image_claim['mainsnak']:
+                    filename = image_claim['mainsnak']['datavalue']['value']
+                    # Convert to Commons URL
+                    filename_encoded = filename.replace(' ', '_')
+                    return f"https://commons.wikimedia.org/wiki/Special:FilePath/{filename_encoded}"
+        return None
+
+    @staticmethod
+    def wikidata_params(wikidata_ids, props):
         params = {
             'action': 'wbgetentities',
             'format': 'json',
-            'ids': wikidata_id,
-            'props': 'sitelinks'
+            'ids': '|'.join(wikidata_ids),
+            'props': props
         }
-
-        try:
-            response = self.session.get(url, params=params, timeout=10)
+        if 'sitelinks' in props:
+            params['sitefilter'] = 'enwiki'
+        return params
+
+    def get_wikidata_entities(self, wikidata_ids, props):
+        """
+        {id: entity} for up to WIKIDATA_BATCH_SIZE ids in one wbgetentities request
+        With a cache, every entity is cached under its single-id request, so ids seen before
+        (in any batch) are served from disk and only the new ones are requested
+        """
+        url = "https://www.wikidata.org/w/api.php"
+        if self.http_cache is None:
+            response = self.get(url, params=self.wikidata_params(wikidata_ids, props), timeout=30)
             response.raise_for_status()
-            data = response.json()
+            return response.json().get('entities', {})
+
+        entities = {}
+        missing = []
+        for wikidata_id in wikidata_ids:
+            cached = self.http_cache.lookup(url, self.wikidata_params([wikidata_id], props))
+            if cached is not None:
+                entities.update(cached.json().get('entities', {}))
+            else:
+                missing.append(wikidata_id)
+        if not missing:
+            return entities
+
+        response = self.fetch(url, params=self.wikidata_params(missing, props), timeout=30)
+        response.raise_for_status()
+        self.http_cache.count('misses', len(missing))
+        fetched = response.json().get('entities', {})
+        for wikidata_id, entity in fetched.items():
+            content = json.dumps({'entities': {wikidata_id: entity}}).encode('utf-8')
+            self.http_cache.put(url, self.wikidata_params([wikidata_id], props), content,
+                                headers={'content-type': 'application/json'})
+        entities.update(fetched)
+        return entities
 
-            if 'entities' in data and wikidata_id in data['entities']:
-                entity = data['entities'][wikidata_id]
-                if 'sitelinks' in entity and 'enwiki' in entity['sitelinks']:
-                    return entity['sitelinks']['enwiki']['title']
+    def get_wikipedia_page_from_wikidata(self, wikidata_id):
+        """Get Wikipedia page title from Wikidata ID"""
+        try:
+            entities = self.get_wikidata_entities([wikidata_id], 'sitelinks')
+            if wikidata_id in entities:
+                return self.enwiki_title_from_entity(entities[wikidata_id])
 
         except Exception as e:
             logger.error(f"Error fetching Wikipedia page for {wikidata_id}: {e}")
         return None
 
-    def get_main_image_from_wikipedia(self, page_title):
-        """Get the main image from Wikipedia page"""
-        # Method 1: Try Wikipedia REST API first (usually gives best main image)
+    def get_summary_image(self, page_title):
+        """Main image of a Wikipedia page from the REST summary API (usually the best main image)"""
         url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{page_title}"
 
         try:
-            response = self.session.get(url, timeout=10)
+            response = self.get(url, timeout=10)
             response.raise_for_status()
             data = response.json()
 
@@ -74,28 +354,44 @@ class TennisPlayerImageDownloader:
 
         except Exception as e:
             logger.warning(f"REST API failed for {page_title}, trying MediaWiki API: {e}")
+        return None
 
-        # Method 2: Fallback to MediaWiki API
+    def get_page_images(self, page_titles):
+        """{title: thumbnail URL} for up to WIKIPEDIA_BATCH_SIZE pages in one pageimages request"""
         url = "https://en.wikipedia.org/w/api.php"
         params = {
             'action': 'query',
             'format': 'json',
-            'titles': page_title,
+            'titles': '|'.join(page_titles),
             'prop': 'pageimages',
-            'pithumbsize': 1000,  # Request large size
-            'pilicense': 'any'
+            'pithumbsize': self.thumb_width,  # Enough for the face crop
+            'pilicense': 'any',
+            'pilimit': len(page_titles)
         }
 
-        try:
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+        response = self.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        query = response.json()['query']
+
+        # Titles come back normalized (e.g. underscores to spaces); map them to the requested ones
+        requested = {item['to']: item['from'] for item in query.get('normalized', [])}
+        images = {}
+        for page_id, page_data in query['pages'].items():
+            if 'thumbnail' in page_data:
+                title = page_data['title']
+                images[requested.get(title, title)] = page_data['thumbnail']['source']
+        return images
 
-            pages = data['query']['pages']
-            for page_id, page_data in pages.items():
-                if 'thumbnail' in page_data:
-                    return page_data['thumbnail']['source']
+    def get_main_image_from_wikipedia(self, page_title):
+        """Get the main image from Wikipedia page"""
+        # Method 1: Try Wikipedia REST API first (usually gives best main image)
+        image_url = self.get_summary_image(page_title)
+        if image_url:
+            return image_url
 
+        # Method 2: Fallback to MediaWiki API
+        try:
+            return self.get_page_images([page_title]).get(page_title)
         except Exception as e:
             logger.error(f"MediaWiki API failed for {page_title}: {e}")
 
@@ -103,114 +399,345 @@ class TennisPlayerImageDownloader:
 
     def get_image_from_wikidata_direct(self, wikidata_id):
         """Try to get image directly from Wikidata entity"""
-        url = "https://www.wikidata.org/w/api.php"
-        params = {
-            'action': 'wbgetentities',
-            'format': 'json',
-            'ids': wikidata_id,
-            'props': 'claims'
-        }
-
         try:
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            if 'entities' in data and wikidata_id in data['entities']:
-                entity = data['entities'][wikidata_id]
-                if 'claims' in entity:
-                    # Look for image property (P18)
-                    if 'P18' in entity['claims']:
-                        image_claim = entity['claims']['P18'][0]
-                        if 'mainsnak' in image_claim and 'datavalue' in image_claim['mainsnak']:
-                            filename = image_claim['mainsnak']['datavalue']['value']
-                            # Convert to Commons URL
-                            filename_encoded = filename.replace(' ', '_')
-                            return f"https://commons.wikimedia.org/wiki/Special:FilePath/{filename_encoded}"
+            entities = self.get_wikidata_entities([wikidata_id], 'claims')
+            if wikidata_id in entities:
+                return self.image_url_from_entity(entities[wikidata_id])
 
         except Exception as e:
             logger.warning(f"Direct Wikidata image fetch failed for {wikidata_id}: {e}")
 
         return None
 
-    def download_image(self, url, filepath, max_retries=3):
-        """Download image from URL to filepath"""
+    def resolve_players(self, players):
+        """
+        Image sources of many players with batched requests
+        - one wbgetentities request (claims + enwiki sitelink) per WIKIDATA_BATCH_SIZE players
+        - one pageimages request per WIKIPEDIA_BATCH_SIZE pages, for players without a P18 image
+        Returns {wikidata_id: {'image_url', 'page_title', 'page_image'}}; ids of failed batches are
+        left out, so process_player falls back to the per-player requests for them
+        """
+        wikidata_ids = list(dict.fromkeys(player['wikimedia_id'] for player in players))
+        resolved = {}
+        for start in range(0, len(wikidata_ids), WIKIDATA_BATCH_SIZE):
+            batch = wikidata_ids[start:start + WIKIDATA_BATCH_SIZE]
+            try:
+                entities = self.get_wikidata_entities(batch, 'claims|sitelinks')
+            except Exception as e:
+                logger.warning(f"Batched Wikidata request failed for {len(batch)} ids: {e}")
+                continue
+            for wikidata_id in batch:
+                entity = entities.get(wikidata_id, {})
+                resolved[wikidata_id] = {
+                    'image_url': self.image_url_from_entity(entity),
+                    'page_title': self.enwiki_title_from_entity(entity),
+                    'page_image': None
+                }
+
+        page_titles = list(dict.fromkeys(
+            sources['page_title'] for sources in resolved.values()
+            if not sources['image_url'] and sources['page_title']))
+        page_images = {}
+        for start in range(0, len(page_titles), WIKIPEDIA_BATCH_SIZE):
+            batch = page_titles[start:start + WIKIPEDIA_BATCH_SIZE]
+            try:
+                page_images.update(self.get_page_images(batch))
+            except Exception as e:
+                logger.warning(f"Batched pageimages request failed for {len(batch)} pages: {e}")
+        for sources in resolved.values():
+            sources['page_image'] = page_images.get(sources['page_title'])
+
+        logger.info(f"Resolved {len(resolved)}/{len(wikidata_ids)} Wikidata ids "
+                    f"({sum(1 for r in resolved.values() if r['image_url'])} with a P18 image)")
+        return resolved
+
+    def _part_path(self, player_id, url):
+        """partial/<player_id>-<hash of url>.part, so bytes of one URL are never resumed from another"""
+        return self.partial_dir / f"{player_id}-{hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]}.part"
+
+    @staticmethod
+    def _part_meta_path(part_path):
+        return part_path.with_name(part_path.name + '.json')
+
+    def _discard_part(self, part_path):
+        part_path.unlink(missing_ok=True)
+        self._part_meta_path(part_path).unlink(missing_ok=True)
+
+    def _resume_offset(self, url, part_path):
+        """
+        Size of the partial file to resume from, with the ETag it was downloaded under
+        A partial file is only resumed when its sidecar records the same URL and an ETag to send
+        as If-Range; anything else is discarded and the download starts from zero
+        """
+        if not part_path.exists():
+            return 0, None
+        try:
+            with open(self._part_meta_path(part_path), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        if meta.get('url') != url or not meta.get('etag'):
+            logger.info(f"Discarding partial download without a matching URL and ETag: {part_path.name}")
+            self._discard_part(part_path)
+            return 0, None
+        return part_path.stat().st_size, meta['etag']
+
+    def _transfer(self, url, part_path):
+        """
+        One attempt at fetching url into part_path, resuming from its current size with a Range
+        request (always with If-Range on the saved ETag, so a changed file restarts from zero)
+        Returns (content_type, etag), or None when the URL does not serve an image; raises on
+        network errors and short transfers, leaving the partial file and its sidecar
+        (source URL, ETag) for the next attempt
+        """
+        offset, etag = self._resume_offset(url, part_path)
+        headers = {}
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+            headers['If-Range'] = etag
+
+        response = self.fetch(url, headers=headers, timeout=30, stream=True)
+        if response.status_code == 416 and offset:
+            # Nothing left to send for this range: the partial file is stale, start over
+            self._discard_part(part_path)
+            raise IOError(f"Range {offset}- not satisfiable")
+        response.raise_for_status()
+
+        # Check if it's actually an image
+        content_type = response.headers.get('content-type', '').split(';')[0].strip()
+        if not content_type.startswith('image/'):
+            logger.warning(f"URL doesn't point to image: {url} (content-type: {content_type})")
+            return None
+
+        if response.status_code == 206:
+            content_range = response.headers.get('content-range', '')
+            start = re.match(r'bytes (\d+)-', content_range)
+            if not start or int(start.group(1)) != offset:
+                self._discard_part(part_path)
+                raise IOError(f"Unexpected Content-Range for a resume at byte {offset}: {content_range!r}")
+            total = content_range.rpartition('/')[2]
+            mode = 'ab'
+            logger.info(f"Resuming {url} at byte {offset}")
+        else:
+            total = response.headers.get('content-length')
+            mode = 'wb'
+            etag = response.headers.get('etag')
+            # Saved before the body, so an interrupted transfer can be resumed by a later run
+            with open(self._part_meta_path(part_path), 'w', encoding='utf-8') as f:
+                json.dump({'url': url, 'etag': etag}, f)
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=8192):
+                f.write(chunk)
+
+        size = part_path.stat().st_size
+        if total and total.isdigit() and size != int(total):
+            raise IOError(f"Transfer ended at {size} of {total} bytes")
+        return content_type, etag
+
+    def _store_object(self, part_path, content_type):
+        """Move a finished download into objects/<sha256><ext>, or drop it if that object exists"""
+        sha256 = file_sha256(part_path)
+        with open(part_path, 'rb') as f:
+            sniffed = sniff_image_type(f.read(1024))
+        content_type = sniffed or content_type
+        object_path = self.objects_dir / f"{sha256}{IMAGE_EXTENSIONS.get(content_type, '.img')}"
+        if object_path.exists():
+            part_path.unlink()
+        else:
+            os.replace(part_path, object_path)
+        return sha256, content_type, object_path
+
+    def _link_player_file(self, player_id, object_path):
+        """<player_id><ext> next to the objects, as a hard link (a copy where links are unsupported)"""
+        for stale in self.output_dir.glob(f"{player_id}.*"):
+            stale.unlink()
+        filepath = self.output_dir / f"{player_id}{object_path.suffix}"
+        try:
+            os.link(object_path, filepath)
+        except OSError:
+            shutil.copyfile(object_path, filepath)
+        return filepath
+
+    def download_image(self, url, player_id, max_retries=3):
+        """
+        Download the image at url for player_id and record it in the manifest
+        Retries (and later runs) continue the partial file of this URL with Range requests
+        instead of starting over
+        """
+        part_path = self._part_path(player_id, url)
         for attempt in range(max_retries):
             try:
-                response = self.session.get(url, timeout=30, stream=True)
-                response.raise_for_status()
-
-                # Check if it's actually an image
-                content_type = response.headers.get('content-type', '')
-                if not content_type.startswith('image/'):
-                    logger.warning(f"URL doesn't point to image: {url} (content-type: {content_type})")
+                result = self._transfer(url, part_path)
+                if result is None:
                     return False
+                content_type, etag = result
 
-                with open(filepath, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-
-                # Verify file was created and has content
-                if filepath.exists() and filepath.stat().st_size > 0:
-                    logger.info(f"Successfully downloaded: {filepath.name}")
-                    return True
-                else:
-                    logger.error(f"Downloaded file is empty: {filepath}")
+                if part_path.stat().st_size == 0:
+                    logger.error(f"Downloaded file is empty: {url}")
+                    self._discard_part(part_path)
                     return False
 
+                size = part_path.stat().st_size
+                sha256, content_type, object_path = self._store_object(part_path, content_type)
+                # The player is done: drop the sidecar and partial files of its other URLs
+                for stale in self.partial_dir.glob(f"{player_id}-*.part*"):
+                    stale.unlink(missing_ok=True)
+                filepath = self._link_player_file(player_id, object_path)
+                self.manifest.set(player_id, {
+                    'source_url': url,
+                    'content_type': content_type,
+                    'bytes': size,
+                    'sha256': sha256,
+                    'etag': etag,
+                    'file': filepath.name,
+                    'object': object_path.relative_to(self.output_dir).as_posix()
+                })
+                logger.info(f"Successfully downloaded: {filepath.name}")
+                return True
+
             except Exception as e:
                 logger.warning(f"Download attempt {attempt + 1} failed for {url}: {e}")
+                status_code = getattr(getattr(e, 'response', None), 'status_code', None)
+                if status_code is not None and 400 <= status_code < 500:
+                    # Client errors (e.g. a thumbnail wider than the original) will not go away on retry
+                    break
                 if attempt < max_retries - 1:
                     time.sleep(2 ** attempt)  # Exponential backoff
 
         return False
 
-    def process_player(self, player_data):
-        """Process a single player"""
+    def process_player(self, player_data, sources=None):
+        """
+        Process a single player
+        sources is the player's entry from resolve_players; without it the image is looked up
+        with per-player requests
+        """
         player_id = player_data['player_id']
         player_name = player_data['player_name']
         wikimedia_id = player_data['wikimedia_id']
-        
-        # Use player_id as filename instead of player name
-        filename = f"{player_id}.jpg"
-
-        # Create full filepath
-        filepath = self.output_dir / filename
-
-        # Skip if file already exists
-        if filepath.exists():
-            logger.info(f"Skipping {player_name} - file already exists: {filename}")
-            return True
 
         logger.info(f"Processing {player_name} (ID: {player_id}, Wikidata: {wikimedia_id})")
 
         # Try different methods to get image URL
         image_url = None
 
-        # Method 1: Direct from Wikidata
-        image_url = self.get_image_from_wikidata_direct(wikimedia_id)
+        if sources is not None:
+            # Method 1: P18 image, Method 2: page summary, then the batched pageimages result
+            image_url = sources['image_url']
+            if not image_url and sources['page_title']:
+                image_url = self.get_summary_image(sources['page_title']) or sources['page_image']
+        else:
+            # Method 1: Direct from Wikidata
+            image_url = self.get_image_from_wikidata_direct(wikimedia_id)
 
-        # Method 2: Via Wikipedia page if direct method failed
-        if not image_url:
-            page_title = self.get_wikipedia_page_from_wikidata(wikimedia_id)
-            if page_title:
-                image_url = self.get_main_image_from_wikipedia(page_title)
+            # Method 2: Via Wikipedia page if direct method failed
+            if not image_url:
+                page_title = self.get_wikipedia_page_from_wikidata(wikimedia_id)
+                if page_title:
+                    image_url = self.get_main_image_from_wikipedia(page_title)
 
         if not image_url:
             logger.error(f"Could not find image for {player_name} ({wikimedia_id})")
             return False
 
-        # Download the image
-        success = self.download_image(image_url, filepath)
+        # Download a thumbnail sized for the crop, and the original only if that fails
+        candidates = [url for url in (thumbnail_url(image_url, self.thumb_width), image_url) if url]
+        success = False
+        for url in dict.fromkeys(candidates):
+            success = self.download_image(url, player_id)
+            if success:
+                break
         if success:
-            logger.info(f"[SUCCESS] Downloaded {player_name} -> {filename}")
+            logger.info(f"[SUCCESS] Downloaded {player_name} -> {self.manifest.get(player_id)['file']}")
         else:
             logger.error(f"[FAILED] Failed to download {player_name}")
 
         return success
 
-    def run(self, json_file="player_list.json"):
-        """Main function to process all players"""
+    @staticmethod
+    def has_required_fields(player):
+        return all(field in player for field in ('player_id', 'player_name', 'wikimedia_id'))
+
+    def adopt_existing(self, players):
+        """
+        Record image files from before the manifest (<player_id>.jpg) that are complete images,
+        so they are not downloaded again; truncated or non-image files are left to be replaced
+        """
+        adopted = 0
+        for player in players:
+            player_id = player['player_id']
+            filepath = self.output_dir / f"{player_id}.jpg"
+            if player_id in self.manifest or not filepath.exists():
+                continue
+            with open(filepath, 'rb') as f:
+                data = f.read()
+            content_type = sniff_image_type(data)
+            complete = {'image/jpeg': data.rstrip(b'\x00').endswith(b'\xff\xd9'),
+                        'image/png': data.endswith(b'IEND\xaeB`\x82')}.get(content_type, content_type is not None)
+            if not complete:
+                logger.warning(f"Existing file is not a complete image, downloading again: {filepath.name}")
+                continue
+
+            part_path = self.partial_dir / f"{player_id}.part"
+            shutil.copyfile(filepath, part_path)
+            sha256, content_type, object_path = self._store_object(part_path, content_type)
+            filepath = self._link_player_file(player_id, object_path)
+            self.manifest.set(player_id, {
+                'source_url': None,
+                'content_type': content_type,
+                'bytes': len(data),
+                'sha256': sha256,
+                'etag': None,
+                'file': filepath.name,
+                'object': object_path.relative_to(self.output_dir).as_posix()
+            })
+            adopted += 1
+        if adopted:
+            logger.info(f"Added {adopted} existing image(s) to the manifest")
+
+    def verify(self):
+        """Drop manifest entries whose file is missing or no longer matches its SHA-256"""
+        broken = []
+        for player_id, asset in list(self.manifest.assets.items()):
+            filepath = self.output_dir / asset['file']
+            if not filepath.exists() or file_sha256(filepath) != asset['sha256']:
+                broken.append(player_id)
+        if broken:
+            logger.warning(f"{len(broken)} manifest entries failed verification and will be downloaded again")
+            self.manifest.remove(broken)
+
+    def process_entry(self, index, total, player, resolved=None):
+        """Validate, skip or process one entry of the player list; returns 'successful', 'failed' or 'skipped'"""
+        logger.info(f"\n--- Processing {index}/{total} ---")
+
+        # Validate required fields
+        if not self.has_required_fields(player):
+            logger.error(f"Player missing required fields: {player}")
+            return 'failed'
+
+        # Skip players the manifest already has an image for
+        asset = self.manifest.get(player['player_id'])
+        if asset is not None:
+            logger.info(f"Skipping {player['player_name']} - already downloaded: {asset['file']}")
+            return 'skipped'
+
+        # Process player
+        try:
+            sources = (resolved or {}).get(player['wikimedia_id'])
+            return 'successful' if self.process_player(player, sources) else 'failed'
+        except Exception as e:
+            logger.error(f"Unexpected error processing {player['player_name']}: {e}")
+            return 'failed'
+
+    def run(self, json_file="player_list.json", workers=1, batch=True, verify=False):
+        """
+        Main function to process all players
+        workers > 1 processes players concurrently; the per-host rate limiter keeps the
+        request rate the same either way
+        batch resolves the image sources of all players to download with batched API requests
+        first (see resolve_players) instead of separate Wikidata requests per player
+        verify re-hashes every file in the manifest first and downloads the ones that changed
+        """
         if not Path(json_file).exists():
             logger.error(f"Player list file not found: {json_file}")
             return
@@ -227,59 +754,60 @@ class TennisPlayerImageDownloader:
             logger.error("Expected JSON file to contain a list of players")
             return
 
-        logger.info(f"Starting download for {len(players)} players...")
+        logger.info(f"Starting download for {len(players)} players with {workers} worker(s)...")
         logger.info(f"Output directory: {self.output_dir.absolute()}")
-
-        successful = 0
-        failed = 0
-        skipped = 0
-
-        for i, player in enumerate(players, 1):
-            logger.info(f"\n--- Processing {i}/{len(players)} ---")
-
-            # Validate required fields
-            required_fields = ['player_id', 'player_name', 'wikimedia_id']
-            if not all(field in player for field in required_fields):
-                logger.error(f"Player missing required fields: {player}")
-                failed += 1
-                continue
-
-            # Check if file already exists (using player_id-based filename)
-            filename = f"{player['player_id']}.jpg"
-            filepath = self.output_dir / filename
-            if filepath.exists():
-                logger.info(f"Skipping {player['player_name']} - file already exists")
-                skipped += 1
-                continue
-
-            # Process player
-            try:
-                success = self.process_player(player)
-                if success:
-                    successful += 1
-                else:
-                    failed += 1
-
-                # Small delay to be nice to the servers
-                time.sleep(1)
-
-            except Exception as e:
-                logger.error(f"Unexpected error processing {player['player_name']}: {e}")
-                failed += 1
+        start_time = time.time()
+
+        valid = [player for player in players if isinstance(player, dict) and self.has_required_fields(player)]
+        self.adopt_existing(valid)
+        if verify:
+            self.verify()
+
+        resolved = None
+        if batch:
+            pending = [player for player in valid if player['player_id'] not in self.manifest]
+            resolved = self.resolve_players(pending)
+
+        entries = [(i, len(players), player, resolved) for i, player in enumerate(players, 1)]
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(lambda entry: self.process_entry(*entry), entries))
+        else:
+            results = [self.process_entry(*entry) for entry in entries]
 
         # Summary
         logger.info(f"\n=== DOWNLOAD COMPLETE ===")
-        logger.info(f"Successful: {successful}")
-        logger.info(f"Failed: {failed}")
-        logger.info(f"Skipped (already existed): {skipped}")
+        logger.info(f"Successful: {results.count('successful')}")
+        logger.info(f"Failed: {results.count('failed')}")
+        logger.info(f"Skipped (already existed): {results.count('skipped')}")
         logger.info(f"Total: {len(players)}")
+        logger.info(f"Time: {time.time() - start_time:.1f} seconds")
+        if self.http_cache is not None:
+            logger.info(self.http_cache.summary())
 
 
 def main():
     """Main entry point"""
-    downloader = TennisPlayerImageDownloader()
-    downloader.run("player_list.json")
+    parser = argparse.ArgumentParser(description="Download player images from Wikimedia")
+    parser.add_argument('json_file', nargs='?', default="player_list.json", help="Player list JSON")
+    parser.add_argument('--no-batch', dest='batch', action='store_false',
+                        help="Look up every player with separate API requests")
+    parser.add_argument('--cache-dir', default='.http_cache', help="HTTP cache directory shared with download_flags.py")
+    parser.add_argument('--no-cache', dest='cache', action='store_false', help="Do not use the HTTP cache")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"Players processed concurrently (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--crop-size', type=int, default=DEFAULT_CROP_SIZE,
+                        help=f"Face crop size the thumbnails are sized for (default: {DEFAULT_CROP_SIZE})")
+    parser.add_argument('--face-fraction', type=float, default=DEFAULT_FACE_FRACTION,
+                        help=f"Expected share of the image width the face crop takes (default: {DEFAULT_FACE_FRACTION})")
+    parser.add_argument('--verify', action='store_true',
+                        help="Check the SHA-256 of every downloaded image and fetch the ones that changed")
+    args = parser.parse_args()
+
+    downloader = TennisPlayerImageDownloader(http_cache=HttpCache(args.cache_dir) if args.cache else None,
+                                             crop_size=args.crop_size, face_fraction=args.face_fraction)
+    downloader.run(args.json_file, workers=args.workers, batch=args.batch, verify=args.verify)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Sprite Atlas Packer for Player Photos and Flags
+Packs the circular face crops (crop_photos.py) and the country flags (download_flags.py)
+into one atlas image per kind and pixel density, so the page loads a handful of images
+instead of one per player and country.
+
+Writes to tennis-scrollytelling/images/sprites/:
+- players@1x.webp / players@2x.webp (+ .png fallbacks), cells of PLAYER_CELL pixels at 1x
+- flags@1x.webp / flags@2x.webp (+ .png fallbacks), cells of FLAG_CELL pixels at 1x
+- sprites.json: atlas files and sizes per density, and {key: [x, y, width, height]} in 1x
+  pixels, keyed by player_id for players and by country code (e.g. "SUI") for flags
+"""
+
+import argparse
+import json
+import logging
+import math
+from pathlib import Path
+from PIL import Image
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SPRITES_FORMAT = 'tennis-sprites'
+SPRITES_VERSION = 1
+DENSITIES = (1, 2)
+
+# Cell size at 1x: the largest size the page draws each image at (70px player cards, 24x16 flags)
+PLAYER_CELL = (72, 72)
+FLAG_CELL = (24, 16)
+
+WEBP_QUALITY = 85
+
+
+def fit_into_cell(image, cell):
+    """image scaled to fit cell (aspect ratio kept) and centered on a transparent cell"""
+    image = image.convert('RGBA')
+    scale = min(cell[0] / image.width, cell[1] / image.height)
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    resized = image.resize(size, Image.Resampling.LANCZOS)
+    canvas = Image.new('RGBA', cell, (0, 0, 0, 0))
+    canvas.paste(resized, ((cell[0] - size[0]) // 2, (cell[1] - size[1]) // 2))
+    return canvas
+
+
+class SpritePacker:
+    def __init__(self, output_dir="./tennis-scrollytelling/images/sprites"):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def pack(self, name, sources, cell):
+        """
+        Write the name@<density>x atlases of {key: image path} on a grid of cell-sized slots
+        Returns the sprites.json entry for the atlas
+        """
+        keys = sorted(sources)
+        columns = max(1, math.ceil(math.sqrt(len(keys))))
+        rows = max(1, math.ceil(len(keys) / columns))
+
+        sprites = {}
+        for index, key in enumerate(keys):
+            x = (index % columns) * cell[0]
+            y = (index // columns) * cell[1]
+            sprites[key] = [x, y, cell[0], cell[1]]
+
+        images = {}
+        for density in DENSITIES:
+            density_cell = (cell[0] * density, cell[1] * density)
+            atlas = Image.new('RGBA', (columns * density_cell[0], rows * density_cell[1]), (0, 0, 0, 0))
+            for key in keys:
+                with Image.open(sources[key]) as source:
+                    x, y = sprites[key][0] * density, sprites[key][1] * density
+                    atlas.paste(fit_into_cell(source, density_cell), (x, y))
+
+            stem = f"{name}@{density}x"
+            atlas.save(self.output_dir / f"{stem}.webp", 'WEBP', quality=WEBP_QUALITY)
+            atlas.save(self.output_dir / f"{stem}.png", 'PNG', optimize=True)
+            images[str(density)] = {
+                'webp': f"{stem}.webp",
+                'png': f"{stem}.png",
+                'width': atlas.width,
+                'height': atlas.height,
+                'webp_bytes': (self.output_dir / f"{stem}.webp").stat().st_size,
+                'png_bytes': (self.output_dir / f"{stem}.png").stat().st_size
+            }
+            logger.info(f"{stem}: {len(keys)} sprites, {atlas.width}x{atlas.height}, "
+                        f"{images[str(density)]['webp_bytes'] / 1024:.1f} KB WebP / "
+                        f"{images[str(density)]['png_bytes'] / 1024:.1f} KB PNG")
+
+        return {'cell': list(cell), 'images': images, 'sprites': sprites}
+
+    @staticmethod
+    def player_sources(player_list_file, cropped_dir):
+        """{player_id: cropped face} for the players crop_photos.py produced a crop for"""
+        with open(player_list_file, 'r', encoding='utf-8') as f:
+            players = json.load(f)
+
+        sources = {}
+        for player in players:
+            # Same naming as FaceCropper.batch_process
+            path = Path(cropped_dir) / (Path(player['filename']).stem + '_cropped.png')
+            if path.exists():
+                sources[str(player['player_id'])] = path
+        logger.info(f"Found {len(sources)}/{len(players)} cropped player photos")
+        return sources
+
+    @staticmethod
+    def flag_sources(flags_dir):
+        """{country code: flag} for the raster flags download_flags.py saved (SVG flags are skipped)"""
+        sources = {}
+        for path in sorted(Path(flags_dir).iterdir()):
+            if path.suffix.lower() in ('.png', '.webp', '.jpg', '.gif'):
+                sources.setdefault(path.stem.upper(), path)
+            elif path.suffix.lower() == '.svg':
+                logger.warning(f"Skipping vector flag (no rasterizer): {path.name}")
+        logger.info(f"Found {len(sources)} flags")
+        return sources
+
+    def run(self, player_list_file="./tennis-scrollytelling/data/player_list.json",
+            cropped_dir="./tennis-scrollytelling/images/players/cropped",
+            flags_dir="./tennis-scrollytelling/images/flags"):
+        """Pack the player and flag atlases and write sprites.json"""
+        manifest = {'format': SPRITES_FORMAT, 'version': SPRITES_VERSION, 'densities': list(DENSITIES), 'atlases': {}}
+
+        if Path(player_list_file).exists() and Path(cropped_dir).exists():
+            players = self.player_sources(player_list_file, cropped_dir)
+            if players:
+                manifest['atlases']['players'] = self.pack('players', players, PLAYER_CELL)
+        else:
+            logger.warning(f"No player list or cropped photos ({player_list_file}, {cropped_dir})")
+
+        if Path(flags_dir).exists():
+            flags = self.flag_sources(flags_dir)
+            if flags:
+                manifest['atlases']['flags'] = self.pack('flags', flags, FLAG_CELL)
+        else:
+            logger.warning(f"Flags directory not found: {flags_dir}")
+
+        with open(self.output_dir / 'sprites.json', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Wrote {self.output_dir / 'sprites.json'} ({', '.join(manifest['atlases']) or 'no atlases'})")
+        return manifest
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Pack player photos and flags into sprite atlases")
+    parser.add_argument('--player-list', default="./tennis-scrollytelling/data/player_list.json")
+    parser.add_argument('--cropped-dir', default="./tennis-scrollytelling/images/players/cropped")
+    parser.add_argument('--flags-dir', default="./tennis-scrollytelling/images/flags")
+    parser.add_argument('--output-dir', default="./tennis-scrollytelling/images/sprites")
+    args = parser.parse_args()
+
+    packer = SpritePacker(args.output_dir)
+    packer.run(args.player_list, args.cropped_dir, args.flags_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 class RankingTimeline {
     constructor() {
         this.data = null;
+        this.chunks = null; // chunk manifest state when the timeline is loaded era by era
+        this.sprites = null; // player/flag sprite atlases (pack_sprites.py), when available
         this.mostMatchesData = null;
         this.mostTitlesData = null;
         this.currentIndex = 0;
@@ -17,24 +19,23 @@ class RankingTimeline {
     async loadData() {
         try {
             console.log('Loading momentum_score_data.json...');
-            const response = await fetch('./data/momentum_score_data.json');
-            this.data = await response.json();
-            console.log(`✅ Loaded ${this.data.length} monthly timepoints from ${this.data[0].date} to ${this.data[this.data.length-1].date}`);
+            if (!(await this.openChunkedTimeline('momentum_score_data'))) {
+                this.data = await this.fetchTimeline('momentum_score_data');
+            }
+            console.log(`✅ Loaded ${this.data.length} monthly timepoints from ${this.timepointDate(0)} to ${this.timepointDate(this.data.length-1)}`);
         } catch (error) {
             console.log('❌ Failed to load monthly data:', error.message);
             // Fallback to weekly momentum data
             try {
                 console.log('Trying title_momentum_data.json...');
-                const fallbackResponse = await fetch('./data/title_momentum_data.json');
-                this.data = await fallbackResponse.json();
+                this.data = await this.fetchTimeline('title_momentum_data');
                 console.log(`✅ Loaded ${this.data.length} weekly timepoints (fallback)`);
             } catch (fallbackError) {
                 console.log('❌ Failed to load weekly momentum data:', fallbackError.message);
                 // Final fallback to old rankings format
                 try {
                     console.log('Trying weekly_rankings.json...');
-                    const finalFallbackResponse = await fetch('./data/weekly_rankings.json');
-                    const finalFallbackData = await finalFallbackResponse.json();
+                    const finalFallbackData = await this.fetchTimeline('weekly_rankings');
                     // Convert old format to new format
                     this.data = finalFallbackData.map(week => ({
                         date: week.date,
@@ -52,21 +53,171 @@ class RankingTimeline {
 
         // Load player nationality data
         await this.loadPlayerNationalities();
-
-        // Load line chart data
-        await this.loadLineChartData();
+        await this.loadSprites();
 
         // Continue setup after data is loaded
         this.createScrollSections();
         this.createTimeline();
         this.renderTables();
-        this.renderLineCharts();
         this.updateTimeline(); // Initialize timeline highlighting for first date
         this.setupScrollama();
 
+        // Line chart data covers the whole history; load it without holding up the first render
+        this.loadLineChartData().then(() => this.renderLineCharts());
+
         console.log('✅ Initialization complete!');
     }
 
+    async fetchTimeline(name) {
+        // Prefer the compact dictionary-encoded file (tennis_data/export.py), fall back to plain JSON
+        try {
+            const response = await fetch(`./data/${name}.compact.json`);
+            if (response.ok) {
+                return this.decodeCompactTimeline(await response.json());
+            }
+        } catch (error) {
+            console.log(`⚠️ Compact ${name} not available:`, error.message);
+        }
+        const response = await fetch(`./data/${name}.json`);
+        return await response.json();
+    }
+
+    async openChunkedTimeline(name) {
+        // Per-era chunk files described by ./data/<name>.manifest.json (tennis_data/export.py).
+        // Only the manifest and the chunk of the current position are awaited; this.data gets
+        // a slot per timepoint that is filled as chunks arrive.
+        let manifest;
+        try {
+            const response = await fetch(`./data/${name}.manifest.json`);
+            if (!response.ok) {
+                return false;
+            }
+            manifest = await response.json();
+        } catch (error) {
+            console.log(`⚠️ Chunk manifest for ${name} not available:`, error.message);
+            return false;
+        }
+        if (manifest.format !== 'tennis-timeline-chunks' || manifest.version !== 1) {
+            console.log(`⚠️ Unsupported chunk manifest: ${manifest.format} v${manifest.version}`);
+            return false;
+        }
+
+        this.data = new Array(manifest.length);
+        this.chunks = { manifest, requests: new Map() };
+        try {
+            await this.ensureTimepoint(this.currentIndex);
+        } catch (error) {
+            console.log(`⚠️ First chunk of ${name} not available:`, error.message);
+            this.data = null;
+            this.chunks = null;
+            return false;
+        }
+        console.log(`✅ Opened ${manifest.chunks.length} chunks of ${name}`);
+        return true;
+    }
+
+    chunkOf(index) {
+        // Binary search for the chunk whose index range holds the timepoint
+        const chunks = this.chunks.manifest.chunks;
+        let lo = 0;
+        let hi = chunks.length - 1;
+        while (lo < hi) {
+            const mid = (lo + hi + 1) >> 1;
+            if (chunks[mid].start_index <= index) {
+                lo = mid;
+            } else {
+                hi = mid - 1;
+            }
+        }
+        return lo;
+    }
+
+    loadChunk(chunkIndex) {
+        const { manifest, requests } = this.chunks;
+        if (!requests.has(chunkIndex)) {
+            const chunk = manifest.chunks[chunkIndex];
+            const request = this.fetchTimeline(chunk.file.replace(/\.json$/, '')).then(timepoints => {
+                timepoints.forEach((timepoint, offset) => {
+                    this.data[chunk.start_index + offset] = timepoint;
+                });
+                console.log(`✅ Loaded chunk ${chunk.start_date} to ${chunk.end_date} (${timepoints.length} timepoints)`);
+            }).catch(error => {
+                requests.delete(chunkIndex); // allow a retry on the next visit
+                throw error;
+            });
+            requests.set(chunkIndex, request);
+        }
+        return requests.get(chunkIndex);
+    }
+
+    ensureTimepoint(index) {
+        // Load the chunk holding the timepoint and prefetch its neighbours in the background
+        if (!this.chunks) {
+            return Promise.resolve();
+        }
+        const chunkIndex = this.chunkOf(index);
+        [chunkIndex - 1, chunkIndex + 1].forEach(neighbour => {
+            if (neighbour >= 0 && neighbour < this.chunks.manifest.chunks.length) {
+                this.loadChunk(neighbour).catch(error => console.log('⚠️ Prefetch failed:', error.message));
+            }
+        });
+        return this.loadChunk(chunkIndex);
+    }
+
+    timepointDate(index) {
+        // Known for every timepoint even before its chunk is loaded
+        return this.chunks ? this.chunks.manifest.dates[index] : this.data[index].date;
+    }
+
+    decodeCompactTimeline(payload) {
+        // Rebuild the timepoint objects: scalar fields are columns indexed by timepoint,
+        // list fields are flattened columns split by per-timepoint counts, names index payload.players
+        if (payload.format !== 'tennis-compact-timeline' || payload.version !== 1) {
+            throw new Error(`Unsupported compact format: ${payload.format} v${payload.version}`);
+        }
+        const { players, columns, lists, keys } = payload;
+        const sections = keys.map(key => {
+            if (key in columns) {
+                return null;
+            }
+            const section = lists[key];
+            return {
+                counts: section.counts,
+                fields: section.keys,
+                values: section.keys.map(field => section.columns[field]),
+                isName: section.keys.map(field => section.names.includes(field)),
+                position: 0
+            };
+        });
+
+        const timepoints = new Array(payload.length);
+        for (let i = 0; i < payload.length; i++) {
+            const timepoint = {};
+            for (let k = 0; k < keys.length; k++) {
+                const section = sections[k];
+                if (section === null) {
+                    timepoint[keys[k]] = columns[keys[k]][i];
+                    continue;
+                }
+                const count = section.counts[i];
+                const entries = new Array(count);
+                for (let j = 0; j < count; j++) {
+                    const row = section.position + j;
+                    const entry = {};
+                    for (let f = 0; f < section.fields.length; f++) {
+                        const value = section.values[f][row];
+                        entry[section.fields[f]] = section.isName[f] ? players[value] : value;
+                    }
+                    entries[j] = entry;
+                }
+                section.position += count;
+                timepoint[keys[k]] = entries;
+            }
+            timepoints[i] = timepoint;
+        }
+        return timepoints;
+    }
+
     async loadPlayerNationalities() {
         try {
             console.log('Loading player_list.json...');
@@ -75,8 +226,10 @@ class RankingTimeline {
 
             // Create nationality mapping: player_name -> country_code
             this.playerNationalities = new Map();
+            this.playerIds = new Map(); // player_name -> player_id (sprite keys)
             playerList.forEach(player => {
                 this.playerNationalities.set(player.player_name, player.country);
+                this.playerIds.set(player.player_name, player.player_id);
             });
 
             console.log(`✅ Loaded nationalities for ${this.playerNationalities.size} players`);
@@ -86,13 +239,79 @@ class RankingTimeline {
         }
     }
 
+    async loadSprites() {
+        // Player photos and flags packed into one atlas per kind; without sprites.json every
+        // photo and flag is loaded from its own file
+        try {
+            const response = await fetch('./images/sprites/sprites.json');
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            const manifest = await response.json();
+            const density = window.devicePixelRatio > 1 && manifest.densities.includes(2) ? 2 : 1;
+
+            const sprites = {};
+            await Promise.all(Object.entries(manifest.atlases).map(async ([kind, atlas]) => {
+                const files = atlas.images[density];
+                sprites[kind] = {
+                    image: await this.loadAtlasImage([files.webp, files.png]),
+                    density: density,
+                    sprites: atlas.sprites,
+                    hrefs: new Map()
+                };
+            }));
+            this.sprites = sprites;
+            console.log(`✅ Loaded sprite atlases at ${density}x: ${Object.keys(sprites).join(', ')}`);
+        } catch (error) {
+            console.log('ℹ️ No sprite atlases, loading photos and flags individually:', error.message);
+            this.sprites = null;
+        }
+    }
+
+    loadAtlasImage(files) {
+        // WebP first, then the PNG fallback for browsers that cannot decode it
+        return files.reduce((previous, file) => previous.catch(() => new Promise((resolve, reject) => {
+            const image = new Image();
+            image.onload = () => resolve(image);
+            image.onerror = () => reject(new Error(`Could not load ${file}`));
+            image.src = `./images/sprites/${file}`;
+        })), Promise.reject(new Error('No atlas files')));
+    }
+
+    spriteHref(kind, key) {
+        // Data URL of one sprite, cut out of its atlas once and cached; null if it is not packed
+        const atlas = this.sprites?.[kind];
+        const rect = key != null ? atlas?.sprites[key] : null;
+        if (!rect) {
+            return null;
+        }
+        if (!atlas.hrefs.has(key)) {
+            const [x, y, width, height] = rect.map(value => value * atlas.density);
+            const canvas = document.createElement('canvas');
+            canvas.width = width;
+            canvas.height = height;
+            canvas.getContext('2d').drawImage(atlas.image, x, y, width, height, 0, 0, width, height);
+            atlas.hrefs.set(key, canvas.toDataURL('image/png'));
+        }
+        return atlas.hrefs.get(key);
+    }
+
+    playerPhotoHref(playerName) {
+        return this.spriteHref('players', this.playerIds?.get(playerName))
+            || `./images/players/cropped/${playerName.toLowerCase().replace(/\s+/g, '-')}_cropped.png`;
+    }
+
+    flagHref(countryCode) {
+        return this.spriteHref('flags', countryCode.toUpperCase())
+            || `./images/flags/${countryCode.toLowerCase()}.png`;
+    }
+
     async loadLineChartData() {
         try {
             console.log('Loading accumulated stats timeline...');
             
             // Load accumulated stats timeline data
-            const accumulatedResponse = await fetch('./data/accumulated_stats_timeline.json');
-            this.accumulatedData = await accumulatedResponse.json();
+            this.accumulatedData = await this.fetchTimeline('accumulated_stats_timeline');
             console.log(`✅ Loaded ${this.accumulatedData.length} timepoints for accumulated stats`);
             
         } catch (error) {
@@ -126,8 +345,8 @@ class RankingTimeline {
     createScrollSections() {
         const container = document.getElementById('scroll-container');
 
-        // Create a scroll section for each week
-        this.data.forEach((week, index) => {
+        // Create a scroll section for each week (timepoints of unloaded chunks included)
+        for (let index = 0; index < this.data.length; index++) {
             const section = document.createElement('div');
             section.className = 'scroll-section';
             section.setAttribute('data-week-index', index);
@@ -137,7 +356,7 @@ class RankingTimeline {
             }
 
             container.appendChild(section);
-        });
+        }
 
         console.log(`Created ${this.data.length} scroll sections`);
     }
@@ -179,7 +398,7 @@ class RankingTimeline {
         container.appendChild(backgroundArea);
 
         // Get date range from data
-        const dates = this.data.map(d => new Date(d.date));
+        const dates = Array.from({ length: this.data.length }, (_, index) => new Date(this.timepointDate(index)));
         const minDate = new Date(Math.min(...dates));
         const maxDate = new Date(Math.max(...dates));
 
@@ -258,8 +477,7 @@ class RankingTimeline {
     }
 
     updateTimeline() {
-        const currentData = this.data[this.currentIndex];
-        const currentDate = new Date(currentData.date);
+        const currentDate = new Date(this.timepointDate(this.currentIndex));
         const currentYear = currentDate.getFullYear();
         const currentMonth = currentDate.getMonth();
         const monthNames = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
@@ -452,14 +670,14 @@ class RankingTimeline {
         let closestIndex = 0;
         let closestDiff = Infinity;
 
-        this.data.forEach((dataPoint, index) => {
-            const dataDate = new Date(dataPoint.date);
+        for (let index = 0; index < this.data.length; index++) {
+            const dataDate = new Date(this.timepointDate(index));
             const diff = Math.abs(dataDate.getFullYear() - targetYearData.year);
             if (diff < closestDiff) {
                 closestDiff = diff;
                 closestIndex = index;
             }
-        });
+        }
 
         // Update to closest data point
         if (closestIndex !== this.currentIndex) {
@@ -477,6 +695,18 @@ class RankingTimeline {
     }
 
     renderTables() {
+        const index = this.currentIndex;
+        if (this.data[index] === undefined) {
+            // Chunk still loading: render once it arrives, unless the position moved on meanwhile
+            this.ensureTimepoint(index).then(() => {
+                if (this.currentIndex === index) {
+                    this.renderTables();
+                }
+            }).catch(error => console.log('❌ Failed to load timeline chunk:', error.message));
+            return;
+        }
+        this.ensureTimepoint(index).catch(() => {});
+
         this.renderRankings();
         this.renderMomentum();
         this.renderLineCharts();
@@ -849,7 +1079,7 @@ class RankingTimeline {
                 // Only set href for NEW images
                 console.log(`🖼️ Creating photo for: ${d.data.player_name}`);
                 const imgElement = d3.select(this);
-                imgElement.attr('href', `./images/players/cropped/${d.data.player_name.toLowerCase().replace(/\s+/g, '-')}_cropped.png`);
+                imgElement.attr('href', self.playerPhotoHref(d.data.player_name));
 
                 // Mark as loading to prevent premature error handling
                 imgElement.attr('data-loading', 'true');
@@ -923,7 +1153,7 @@ class RankingTimeline {
                 const countryCode = self.playerNationalities?.get(d.data.player_name);
                 if (countryCode) {
                     console.log(`🏁 Creating flag for: ${d.data.player_name} (${countryCode})`);
-                    d3.select(this).attr('href', `./images/flags/${countryCode.toLowerCase()}.png`);
+                    d3.select(this).attr('href', self.flagHref(countryCode));
                 }
             })
             .on('error', function(event, d) {
@@ -1161,7 +1391,7 @@ class RankingTimeline {
                     .attr('width', 24)
                     .attr('height', 24)
                     .style('clip-path', 'circle(12px)')
-                    .attr('href', `./images/players/cropped/${player.name.toLowerCase().replace(/\s+/g, '-')}_cropped.png`)
+                    .attr('href', this.playerPhotoHref(player.name))
                     .style('transition', 'all 0.3s ease');
                 
                 // Add hover effects
@@ -1393,7 +1623,7 @@ class RankingTimeline {
                     .attr('width', 24)
                     .attr('height', 24)
                     .style('clip-path', 'circle(12px)')
-                    .attr('href', `./images/players/cropped/${player.name.toLowerCase().replace(/\s+/g, '-')}_cropped.png`)
+                    .attr('href', this.playerPhotoHref(player.name))
                     .style('transition', 'all 0.3s ease');
                 
                 // Add hover effects
@@ -1533,7 +1763,7 @@ class RankingTimeline {
                     this.renderTables();
                     this.updateTimeline();
 
-                    console.log(`Timepoint ${newIndex + 1}/${this.data.length}: ${this.data[newIndex].date}`);
+                    console.log(`Timepoint ${newIndex + 1}/${this.data.length}: ${this.timepointDate(newIndex)}`);
                 }
             });
 
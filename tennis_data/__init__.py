@@ -0,0 +1,67 @@
+"""
+Tennis data builders
+Importable engines behind the JSON files in tennis-scrollytelling/data
+"""
+
+from .common import build_player_lookup, monthly_ranking_dates, select_title_matches
+from .cumulative import (CumulativeStats, count_player_matches_and_titles, create_accumulated_stats_timeline,
+                         create_auxiliary_charts_data, create_cumulative_charts_data, iter_accumulated_stats_timeline,
+                         iter_cumulative_charts_data)
+from .export import (JsonArrayWriter, TimelineWriter, decode_compact, encode_compact, write_chunks, write_compact,
+                     write_json_stream, write_timeline)
+from .ingest import ColumnarCache, load_atp_data
+from .instrument import RunReport, phase
+from .match_store import MatchStore
+from .momentum import (DEFAULT_MOMENTUM_WEIGHTS, MomentumEngine, create_momentum_score_data, iter_momentum_score_data,
+                       momentum_weights)
+from .player_statistics import create_player_statistics, iter_player_statistics
+from .query import MomentumQuery
+from .ranking_index import RankingIndex
+from .rankings import create_weekly_rankings_data, iter_weekly_rankings_data
+from .synthetic import generate_atp_data, write_atp_csvs
+from .title_momentum import (RollingTitleCounter, create_monthly_title_momentum_data, create_title_momentum_data,
+                             iter_monthly_title_momentum_data, iter_title_momentum_data)
+
+__all__ = [
+    'build_player_lookup',
+    'monthly_ranking_dates',
+    'select_title_matches',
+    'JsonArrayWriter',
+    'write_json_stream',
+    'TimelineWriter',
+    'write_timeline',
+    'encode_compact',
+    'decode_compact',
+    'write_compact',
+    'write_chunks',
+    'ColumnarCache',
+    'load_atp_data',
+    'RunReport',
+    'phase',
+    'MatchStore',
+    'MomentumEngine',
+    'create_momentum_score_data',
+    'iter_momentum_score_data',
+    'DEFAULT_MOMENTUM_WEIGHTS',
+    'momentum_weights',
+    'MomentumQuery',
+    'RollingTitleCounter',
+    'create_title_momentum_data',
+    'iter_title_momentum_data',
+    'create_monthly_title_momentum_data',
+    'iter_monthly_title_momentum_data',
+    'CumulativeStats',
+    'create_auxiliary_charts_data',
+    'create_accumulated_stats_timeline',
+    'iter_accumulated_stats_timeline',
+    'create_cumulative_charts_data',
+    'iter_cumulative_charts_data',
+    'count_player_matches_and_titles',
+    'create_player_statistics',
+    'iter_player_statistics',
+    'RankingIndex',
+    'create_weekly_rankings_data',
+    'iter_weekly_rankings_data',
+    'generate_atp_data',
+    'write_atp_csvs',
+]
@@ -0,0 +1,18 @@
+"""
+Benchmark suite for the data builders, on synthetic ATP data at any scale
+Run with: python -m tennis_data.benchmark --help
+"""
+
+from .suite import (append_history, check_golden, find_regressions, load_golden, load_history, previous_run,
+                    run_benchmark, update_golden)
+
+__all__ = [
+    'run_benchmark',
+    'load_golden',
+    'check_golden',
+    'update_golden',
+    'load_history',
+    'append_history',
+    'previous_run',
+    'find_regressions',
+]
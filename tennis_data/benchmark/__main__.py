@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Command-line entry point for the benchmark suite
+
+Examples:
+  python -m tennis_data.benchmark                          # every stage at 1x, checked against golden.json
+  python -m tennis_data.benchmark --scale 1 10 100         # how the builders scale
+  python -m tennis_data.benchmark momentum_score --repeat 3
+  python -m tennis_data.benchmark --workers 0 --no-memory  # parallel stages on every CPU core
+  python -m tennis_data.benchmark --update-golden          # regenerate golden.json from the baseline builders
+"""
+
+import argparse
+from pathlib import Path
+
+from ..parallel import default_workers
+from .suite import (BENCHMARK_DIR, GOLDEN_FILE, HISTORY_FILE_NAME, append_history, check_golden, find_regressions,
+                    load_golden, load_history, previous_run, run_benchmark, run_key, update_golden)
+from .reference import reference_record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the data builders on synthetic ATP data")
+    parser.add_argument('stages', nargs='*', help="Stages to benchmark (default: all)")
+    parser.add_argument('--scale', type=float, nargs='+', default=[1],
+                        help="Synthetic data sizes; 1 is about a tenth of the real data, 10 about its size")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic data")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processes for the per-timepoint stages (0 = one per CPU core)")
+    parser.add_argument('--repeat', type=int, default=1, help="Timed runs per stage (the best one is kept)")
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="Skip the extra run under tracemalloc that measures peak memory (much slower)")
+    parser.add_argument('--verbose', action='store_true', help="Show the builders' own progress output")
+    parser.add_argument('--dir', default=str(BENCHMARK_DIR),
+                        help="Where the synthetic data, caches and history are kept")
+    parser.add_argument('--golden', default=str(GOLDEN_FILE), help="Golden output hashes")
+    parser.add_argument('--update-golden', action='store_true',
+                        help="Regenerate the golden hashes by running the baseline notebook's builders (slow), "
+                             "then check this run against them")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or default_workers()
+    history_path = Path(args.dir) / HISTORY_FILE_NAME
+    failed = False
+
+    for scale in args.scale:
+        if args.update_golden:
+            print(f"\n📝 Golden hashes for {run_key(scale, args.seed)} from the baseline builders")
+            update_golden(reference_record(scale, args.seed, root=args.dir, verbose=args.verbose), args.golden)
+
+        print(f"\n📏 Benchmark {run_key(scale, args.seed)}, {workers} worker(s)")
+        record = run_benchmark(scale, args.seed, workers=workers, repeat=args.repeat, memory=args.memory,
+                               verbose=args.verbose, targets=args.stages or None, root=args.dir)
+
+        record['golden'] = check_golden(record, load_golden(args.golden))
+        if record['golden']['status'] == 'ok':
+            print("✅ Outputs match golden.json")
+        elif record['golden']['status'] == 'missing':
+            print(f"⚠️  No golden hashes for {run_key(scale, args.seed)} (use --update-golden)")
+        else:
+            failed = True
+            for mismatched in record['golden']['mismatched']:
+                print(f"❌ Output differs from golden: {mismatched}")
+
+        previous = previous_run(load_history(history_path), record)
+        record['regressions'] = find_regressions(previous, record) if previous else []
+        for regression in record['regressions']:
+            print(f"🐢 {regression['stage']}: {regression['metric']} {regression['before']:.4g} -> "
+                  f"{regression['after']:.4g} ({regression['ratio']}x, previous run "
+                  f"{(previous['environment']['commit'] or '?')[:10]})")
+        append_history(history_path, record)
+
+    print(f"\n📈 History: {history_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,107 @@
+"""
+Golden hashes from the pre-series builders
+The builder cells of data_analyzer.ipynb as of BASELINE_REVISION (before any of the engines in
+tennis_data existed) are run, as the notebook ran them, on the synthetic CSVs; the files they
+write are hashed like the benchmark hashes the pipeline's outputs. golden.json is made from
+this run, so the benchmark checks the engines against the original code and not against themselves.
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from ..ingest import MATCHES_DATA_FILE_NAME, PLAYERS_DATA_FILE_NAME, RANKINGS_DATA_FILE_NAME
+from ..pipeline.core import Source
+from ..pipeline.stages import default_stages
+from .suite import BENCHMARK_DIR, output_hash, prepare_data
+
+# The repository's first commit: the notebook with the builders inline
+BASELINE_REVISION = '12dddefbde75a9f034d855c24d1eec78019cc7a4'
+NOTEBOOK_FILE_NAME = 'data_analyzer.ipynb'
+
+# Cells writing the pipeline's files: weekly rankings, player statistics, monthly title momentum,
+# momentum score, most matches/titles, top 25, accumulated timeline (5-7 and 10 write files the
+# pipeline does not produce)
+BUILDER_CELLS = [8, 9, 11, 12, 13, 14, 15]
+# Cell 15 reads the monthly timeline from the web data directory, where it was copied by hand
+ACCUMULATED_CELL = 15
+MONTHLY_FILE_NAME = 'monthly_title_momentum_data.json'
+WEB_DATA_DIR = Path('tennis-scrollytelling/data')
+
+
+def baseline_notebook(revision=BASELINE_REVISION):
+    """The notebook as of revision, read from the git repository this package is in"""
+    source = subprocess.run(['git', 'show', f"{revision}:{NOTEBOOK_FILE_NAME}"], capture_output=True, text=True,
+                            encoding='utf-8', check=True, cwd=Path(__file__).resolve().parent).stdout
+    return json.loads(source)
+
+
+def cell_source(notebook, index):
+    source = notebook['cells'][index]['source']
+    return source if isinstance(source, str) else ''.join(source)
+
+
+def load_baseline_frames(data_dir):
+    """The CSVs loaded as the baseline notebook's first cell loaded them"""
+    matches_data = pd.read_csv(Path(data_dir) / MATCHES_DATA_FILE_NAME)
+    players_data = pd.read_csv(Path(data_dir) / PLAYERS_DATA_FILE_NAME)
+    rankings_data = pd.read_csv(Path(data_dir) / RANKINGS_DATA_FILE_NAME)
+    rankings_data['ranking_date'] = pd.to_datetime(rankings_data['ranking_date'], format='%Y%m%d')
+    return matches_data, players_data, rankings_data
+
+
+def run_baseline(data_dir, work_dir, revision=BASELINE_REVISION, verbose=False):
+    """Run the builder cells of the baseline notebook in work_dir; returns {file name: path} of what they wrote"""
+    notebook = baseline_notebook(revision)
+    matches_data, players_data, rankings_data = load_baseline_frames(data_dir)
+    namespace = {'matches_data': matches_data, 'players_data': players_data, 'rankings_data': rankings_data}
+
+    work_dir = Path(work_dir)
+    (work_dir / WEB_DATA_DIR).mkdir(parents=True, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        for index in BUILDER_CELLS:
+            if index == ACCUMULATED_CELL:
+                shutil.copyfile(MONTHLY_FILE_NAME, WEB_DATA_DIR / MONTHLY_FILE_NAME)
+            start_time = time.time()
+            with contextlib.redirect_stdout(io.StringIO()) if not verbose else contextlib.nullcontext():
+                exec(compile(cell_source(notebook, index), f"<baseline cell {index}>", 'exec'), namespace)
+            print(f"⏱️  baseline cell {index:<17} {time.time() - start_time:8.3f}s")
+    finally:
+        os.chdir(cwd)
+
+    written = {}
+    for path in list(work_dir.glob('*.json')) + list((work_dir / WEB_DATA_DIR).glob('*.json')):
+        written.setdefault(path.name, path)
+    return written
+
+
+def reference_record(scale=1, seed=0, revision=BASELINE_REVISION, root=BENCHMARK_DIR, verbose=False):
+    """
+    A benchmark-like record ({'scale', 'seed', 'revision', 'stages': {name: {'outputs': ...}}}) of the
+    baseline's output hashes, for every pipeline stage output the baseline writes
+    """
+    data_dir, _ = prepare_data(scale, seed, root)
+    with tempfile.TemporaryDirectory() as work_dir:
+        written = run_baseline(data_dir, work_dir, revision, verbose)
+        stages = {}
+        for stage in default_stages():
+            if isinstance(stage, Source):
+                continue
+            for path, _ in stage.outputs:
+                filename = Path(path).name
+                if filename not in written:
+                    raise FileNotFoundError(f"The baseline notebook did not write {filename}")
+                with open(written[filename], 'r', encoding='utf-8') as f:
+                    content_hash = output_hash(json.load(f))
+                stages.setdefault(stage.name, {'outputs': {}})['outputs'][filename] = content_hash
+    return {'scale': scale, 'seed': seed, 'revision': revision, 'stages': stages}
@@ -0,0 +1,281 @@
+"""
+Benchmark runs of the pipeline builders on synthetic data
+Every stage of default_stages() is timed (best of repeat runs) and, optionally, run once more
+under tracemalloc for its peak Python/NumPy allocation (worker processes of parallel stages
+are not traced). The JSON each stage writes is hashed and
+compared with golden.json, made by running the original notebook's builders on the same data
+(see reference.py), so a faster engine has to reproduce the original files exactly.
+Each run is appended to a JSONL history and compared with the previous run of the same
+scale, seed and worker count.
+"""
+
+import collections
+import contextlib
+import hashlib
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ..ingest import load_atp_data
+from ..pipeline.cache import hash_bytes
+from ..pipeline.core import Source
+from ..pipeline.stages import MATCHES_COLUMNS, PLAYERS_COLUMNS, RANKINGS_COLUMNS, default_stages
+from ..synthetic import write_atp_csvs
+
+BENCHMARK_DIR = Path('.benchmarks')
+GOLDEN_FILE = Path(__file__).with_name('golden.json')
+HISTORY_FILE_NAME = 'history.jsonl'
+
+# A stage is reported as a regression when it got this much slower (or hungrier) than the previous run
+REGRESSION_RATIO = 1.25
+# ...and the difference is above this floor, so sub-second noise is not flagged
+MIN_REGRESSION_SECONDS = 0.2
+MIN_REGRESSION_BYTES = 8 * 1024 * 1024
+
+
+def run_key(scale, seed):
+    return f"{scale:g}x-seed{seed}"
+
+
+def output_hash(data):
+    """
+    Hash of data's JSON in compact form: it spells every value exactly as the pipeline's indented
+    files do, so equal hashes mean equal files, and the C encoder makes it many times faster
+    """
+    return hash_bytes(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+
+def stream_hashes(stage, timepoints):
+    """
+    output_hash of every output of a streamed stage, fed while run() yields (see Stage.stream),
+    so a streamed stage is measured without its timelines being held
+    """
+    digests = [hashlib.sha256(b'[') for _ in stage.outputs]
+    counts = [0] * len(stage.outputs)
+    keys = [key for _, key in stage.outputs]
+    for item in timepoints:
+        for i, key in enumerate(keys):
+            timepoint = item if key is None else item[key]
+            if timepoint is not None:
+                digests[i].update((b',' if counts[i] else b'') +
+                                  json.dumps(timepoint, separators=(',', ':')).encode('utf-8'))
+                counts[i] += 1
+    for digest in digests:
+        digest.update(b']')
+    return {Path(path).name: digest.hexdigest() for (path, _), digest in zip(stage.outputs, digests)}
+
+
+def prepare_data(scale, seed, root=BENCHMARK_DIR):
+    """Directory with the synthetic CSVs for scale and seed, generated on first use; returns (path, row counts)"""
+    data_dir = Path(root) / 'data' / run_key(scale, seed)
+    counts_path = data_dir / 'rows.json'
+    if counts_path.exists():
+        with open(counts_path, 'r', encoding='utf-8') as f:
+            return data_dir, json.load(f)
+
+    print(f"🧪 Generating synthetic ATP data ({run_key(scale, seed)})...")
+    counts = write_atp_csvs(data_dir, scale, seed)
+    with open(counts_path, 'w', encoding='utf-8') as f:
+        json.dump(counts, f, indent=2)
+    return data_dir, counts
+
+
+def measure(function, repeat=1, memory=True, verbose=False):
+    """
+    (result, best seconds over repeat runs, tracemalloc peak bytes or None)
+    The builders' progress prints are swallowed unless verbose
+    """
+    def call():
+        if verbose:
+            return function()
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function()
+
+    best = None
+    result = None
+    for _ in range(max(1, repeat)):
+        start_time = time.perf_counter()
+        result = call()
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            call()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return result, best, peak
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def plan(stages, targets=None):
+    """Stage names needed for targets (all by default), dependencies first"""
+    order = []
+
+    def visit(name):
+        if name in order:
+            return
+        if name not in stages:
+            raise KeyError(f"Unknown stage: {name}")
+        for dependency in stages[name].inputs:
+            visit(dependency)
+        order.append(name)
+
+    for target in targets or stages:
+        visit(target)
+    return order
+
+
+def run_benchmark(scale=1, seed=0, workers=1, repeat=1, memory=True, verbose=False, targets=None,
+                  root=BENCHMARK_DIR):
+    """Time (and memory-profile) the load step and every stage needed for targets; returns the run record"""
+    root = Path(root)
+    data_dir, rows = prepare_data(scale, seed, root)
+    stages = {stage.name: stage for stage in default_stages()}
+
+    def load():
+        return load_atp_data(data_dir, MATCHES_COLUMNS, PLAYERS_COLUMNS, RANKINGS_COLUMNS)
+
+    # Once untimed so the columnar cache is built; the timed runs measure loading a built cache
+    measure(load, memory=False, verbose=verbose)
+    frames, seconds, peak = measure(load, repeat, memory, verbose)
+    values = dict(zip(['matches_data', 'players_data', 'rankings_data'], frames))
+    results = {'load': {'seconds': seconds, 'peak_bytes': peak}}
+    print(f"⏱️  {'load':<28} {seconds:8.3f}s")
+
+    for name in plan(stages, targets):
+        stage = stages[name]
+        if isinstance(stage, Source):
+            continue
+        arguments = {dependency: values[dependency] for dependency in stage.inputs}
+        if stage.parallel and workers > 1:
+            arguments['workers'] = workers
+        if stage.stream:
+            # Timed like the other stages, without serializing; the outputs are hashed in one more, untimed run
+            _, seconds, peak = measure(lambda: collections.deque(stage.run(**arguments, **stage.params), maxlen=0),
+                                       repeat, memory, verbose)
+            hashes, _, _ = measure(lambda: stream_hashes(stage, stage.run(**arguments, **stage.params)),
+                                   memory=False, verbose=verbose)
+            results[name] = {'seconds': seconds, 'peak_bytes': peak, 'outputs': hashes}
+        else:
+            value, seconds, peak = measure(lambda: stage.run(**arguments, **stage.params), repeat, memory, verbose)
+            results[name] = {'seconds': seconds, 'peak_bytes': peak}
+            values[name] = value
+            if stage.outputs:
+                results[name]['outputs'] = {
+                    Path(path).name: output_hash(value if key is None else value[key])
+                    for path, key in stage.outputs
+                }
+        memory_text = f"  {peak / 1024 / 1024:8.1f} MB peak" if peak is not None else ''
+        print(f"⏱️  {name:<28} {seconds:8.3f}s{memory_text}")
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment(),
+        'scale': scale,
+        'seed': seed,
+        'workers': workers,
+        'repeat': repeat,
+        'memory': memory,
+        'rows': rows,
+        'stages': results,
+    }
+
+
+def load_golden(path=GOLDEN_FILE):
+    if not Path(path).exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def check_golden(record, golden):
+    """{'status': 'ok' | 'mismatch' | 'missing', 'mismatched': [stage/file, ...]} against the golden hashes"""
+    expected = golden.get(run_key(record['scale'], record['seed']))
+    if expected is None:
+        return {'status': 'missing', 'mismatched': []}
+    mismatched = []
+    for name, result in record['stages'].items():
+        for filename, content_hash in result.get('outputs', {}).items():
+            if expected.get(name, {}).get(filename) != content_hash:
+                mismatched.append(f"{name}/{filename}")
+    return {'status': 'mismatch' if mismatched else 'ok', 'mismatched': mismatched}
+
+
+def update_golden(record, path=GOLDEN_FILE):
+    """Replace the golden hashes of the record's scale and seed with the record's outputs (see reference_record)"""
+    golden = load_golden(path)
+    golden[run_key(record['scale'], record['seed'])] = {
+        name: result['outputs'] for name, result in record['stages'].items() if 'outputs' in result
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(golden, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load_history(path):
+    records = []
+    if Path(path).exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    return records
+
+
+def append_history(path, record):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+def previous_run(history, record):
+    """Latest earlier run with the same scale, seed and workers (None if there is none)"""
+    for previous in reversed(history):
+        if all(previous.get(field) == record[field] for field in ('scale', 'seed', 'workers')):
+            return previous
+    return None
+
+
+def find_regressions(previous, record, ratio=REGRESSION_RATIO):
+    """Stages slower or using more memory than in previous by more than ratio (and the noise floor)"""
+    regressions = []
+    for name, result in record['stages'].items():
+        before = previous['stages'].get(name)
+        if before is None:
+            continue
+        for field, floor in (('seconds', MIN_REGRESSION_SECONDS), ('peak_bytes', MIN_REGRESSION_BYTES)):
+            old, new = before.get(field), result.get(field)
+            if old and new and new > old * ratio and new - old > floor:
+                regressions.append({'stage': name, 'metric': field, 'before': old, 'after': new,
+                                    'ratio': round(new / old, 2)})
+    return regressions
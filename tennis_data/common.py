@@ -0,0 +1,68 @@
+"""
+Shared helpers for the ATP data builders
+Player lookup, date parsing and ranking-date selection used by every builder
+"""
+
+import numpy as np
+import pandas as pd
+
+# Finals of Grand Slam (G), ATP 1000 (A) and ATP 500 (M) tournaments count as titles
+TITLE_LEVELS = ('G', 'A', 'M')
+TITLE_ROUND = 'F'
+
+
+def to_datetime(values):
+    """Parse YYYYMMDD dates, passing through columns that are already datetimes"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, format='%Y%m%d')
+
+
+def to_days(values):
+    """Convert a date column to int64 days since the epoch"""
+    return np.asarray(to_datetime(values)).astype('datetime64[D]').astype(np.int64)
+
+
+def to_day(date):
+    """Convert a single date to days since the epoch"""
+    return int(np.datetime64(pd.Timestamp(date), 'D').astype(np.int64))
+
+
+def build_player_lookup(players_data):
+    """
+    Map player_id -> full name
+    Same naming rules as the notebook builders ("Player <id>" when both names are empty)
+    """
+    player_lookup = {}
+    for player_id, first_name, last_name in zip(players_data['player_id'].tolist(),
+                                                players_data['name_first'].tolist(),
+                                                players_data['name_last'].tolist()):
+        full_name = f"{first_name or ''} {last_name or ''}".strip()
+        if not full_name:
+            full_name = f"Player {player_id}"
+        player_lookup[player_id] = full_name
+    return player_lookup
+
+
+def select_title_matches(matches_data):
+    """Return only title matches (finals of G/A/M tournaments)"""
+    return matches_data[
+        (matches_data['round'] == TITLE_ROUND) &
+        (matches_data['tourney_level'].isin(TITLE_LEVELS))
+    ]
+
+
+def dates_from(dates, start_date=None):
+    """The dates on or after start_date (all of them when start_date is None)"""
+    if start_date is None:
+        return list(dates)
+    start_date = pd.Timestamp(start_date)
+    return [date for date in dates if date >= start_date]
+
+
+def monthly_ranking_dates(rankings_data):
+    """Last ranking date of every month, sorted"""
+    ranking_dates = pd.Series(sorted(pd.Series(to_datetime(rankings_data['ranking_date']).unique()).tolist()))
+    monthly_last = ranking_dates.groupby(ranking_dates.dt.to_period('M')).max()
+    return sorted(monthly_last.tolist())
+
@@ -0,0 +1,358 @@
+"""
+Cumulative career stats engine
+Running totals of matches, wins and titles by level per player, built in one chronological
+pass and shared by most_matches_data.json, most_titles_data.json and
+accumulated_stats_timeline.json
+"""
+
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .common import TITLE_LEVELS, build_player_lookup, dates_from, to_day
+from .instrument import phase
+from .match_store import MatchStore
+from .momentum import PlayerEventIndex
+from .parallel import iter_parallel, worker_match_store
+from .ranking_index import RankingIndex
+
+
+class TopK:
+    """
+    Incremental top-K for counters that only grow
+    A player outside the top K can only get in when one of its own counters changes,
+    so it is enough to offer the players touched by each batch of matches.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.keys = {}
+
+    def offer(self, player_id, key):
+        if player_id in self.keys or len(self.keys) < self.k:
+            self.keys[player_id] = key
+            return
+        weakest = min(self.keys, key=self.keys.get)
+        if key > self.keys[weakest]:
+            del self.keys[weakest]
+            self.keys[player_id] = key
+
+    def ranked(self):
+        """Player ids from best to worst"""
+        return sorted(self.keys, key=self.keys.get, reverse=True)
+
+
+class CumulativeStats:
+    """
+    Career totals per player as of any date
+    - totals_as_of(date): prefix-sum lookup for every player, no pass over the history
+    - advance(date): chronological pass that keeps running totals and top-K leaderboards
+    """
+
+    def __init__(self, matches_data, player_lookup, top_n=10, match_store=None):
+        self.player_lookup = player_lookup
+        self.top_n = top_n
+        store = match_store if match_store is not None else MatchStore(matches_data, player_lookup)
+
+        self.player_ids = store.player_ids
+        n_players = store.n_players
+        self.known = store.known
+
+        days = store.days.astype(np.int64)
+        winner_idx = store.winner.astype(np.int64)
+        loser_idx = store.loser.astype(np.int64)
+        has_winner = winner_idx >= 0
+        has_loser = loser_idx >= 0
+        is_title = store.is_title
+        self.level_codes = {level: store.level_code(level) for level in TITLE_LEVELS}
+        levels = store.level
+
+        # Chronological order; rows on the same date keep their source order
+        order = np.argsort(days, kind='stable')
+        self.days = days[order]
+        self.row = order
+        self.winner_idx = winner_idx[order]
+        self.loser_idx = loser_idx[order]
+        self.is_title = is_title[order]
+        self.level = levels[order]
+
+        # Prefix sums for random-access totals
+        participants = np.concatenate((winner_idx[has_winner], loser_idx[has_loser]))
+        participant_days = np.concatenate((days[has_winner], days[has_loser]))
+        won = np.concatenate((np.ones(has_winner.sum(), dtype=np.int64), np.zeros(has_loser.sum(), dtype=np.int64)))
+        self.match_index = PlayerEventIndex(participants, participant_days, n_players, values={'wins': won})
+        self.title_index = PlayerEventIndex(
+            winner_idx[is_title], days[is_title], n_players,
+            values={level: (levels[is_title] == code).astype(np.int64) for level, code in self.level_codes.items()}
+        )
+
+        # Running state for the chronological pass
+        self.position = 0
+        self.matches = np.zeros(n_players, dtype=np.int64)
+        self.wins = np.zeros(n_players, dtype=np.int64)
+        self.titles = {level: np.zeros(n_players, dtype=np.int64) for level in TITLE_LEVELS}
+        # First appearance in source row order, used to break ties like the notebook did
+        never = np.iinfo(np.int64).max
+        self.first_match = np.full(n_players, never, dtype=np.int64)
+        self.first_title = np.full(n_players, never, dtype=np.int64)
+        self.top_matches = TopK(top_n)
+        self.top_titles = TopK(top_n)
+
+    def index_of(self, player_id):
+        pos = np.searchsorted(self.player_ids, player_id)
+        if pos < len(self.player_ids) and self.player_ids[pos] == player_id:
+            return int(pos)
+        return None
+
+    def totals_as_of(self, current_date):
+        """Matches, wins and titles by level for every player up to current_date"""
+        end_day = to_day(current_date)
+        start_day = int(self.days[0]) if len(self.days) else end_day
+        totals = {
+            'matches': self.match_index.window_count(start_day, end_day),
+            'wins': self.match_index.window_sum('wins', start_day, end_day),
+        }
+        for level in TITLE_LEVELS:
+            totals[level] = self.title_index.window_sum(level, start_day, end_day)
+        totals['titles'] = sum(totals[level] for level in TITLE_LEVELS)
+        return totals
+
+    def advance(self, current_date):
+        """Add every match up to current_date to the running totals and leaderboards"""
+        end = int(np.searchsorted(self.days, to_day(current_date), side='right'))
+        if end <= self.position:
+            return
+        batch = slice(self.position, end)
+        self.position = end
+
+        winners = self.winner_idx[batch]
+        losers = self.loser_idx[batch]
+        rows = self.row[batch]
+        has_winner = winners >= 0
+        has_loser = losers >= 0
+
+        np.add.at(self.matches, winners[has_winner], 1)
+        np.add.at(self.matches, losers[has_loser], 1)
+        np.add.at(self.wins, winners[has_winner], 1)
+        np.minimum.at(self.first_match, winners[has_winner], rows[has_winner] * 2)
+        np.minimum.at(self.first_match, losers[has_loser], rows[has_loser] * 2 + 1)
+
+        titles = self.is_title[batch]
+        title_winners = winners[titles]
+        title_levels = self.level[batch][titles]
+        for level, code in self.level_codes.items():
+            np.add.at(self.titles[level], title_winners[title_levels == code], 1)
+        np.minimum.at(self.first_title, title_winners, rows[titles])
+
+        touched = np.unique(np.concatenate((winners[has_winner], losers[has_loser])))
+        for i in touched[self.known[touched]].tolist():
+            self.top_matches.offer(i, (int(self.matches[i]), -int(self.first_match[i])))
+        title_touched = np.unique(title_winners)
+        for i in title_touched[self.known[title_touched]].tolist():
+            total_titles = sum(int(self.titles[level][i]) for level in TITLE_LEVELS)
+            self.top_titles.offer(i, (total_titles, -int(self.first_title[i])))
+
+    def most_matches(self):
+        """Top players by total matches played so far"""
+        top_performers = []
+        for i in self.top_matches.ranked():
+            player_id = int(self.player_ids[i])
+            total_matches = int(self.matches[i])
+            total_wins = int(self.wins[i])
+            top_performers.append({
+                'player_id': player_id,
+                'player_name': self.player_lookup[player_id],
+                'total_matches': total_matches,
+                'total_wins': total_wins,
+                'win_rate': round(total_wins / total_matches, 3) if total_matches > 0 else 0
+            })
+        return top_performers
+
+    def most_titles(self):
+        """Top players by total G/A/M titles won so far"""
+        top_performers = []
+        for i in self.top_titles.ranked():
+            player_id = int(self.player_ids[i])
+            top_performers.append({
+                'player_id': player_id,
+                'player_name': self.player_lookup[player_id],
+                'total_titles': sum(int(self.titles[level][i]) for level in TITLE_LEVELS),
+                'grand_slams': int(self.titles['G'][i]),
+                'masters': int(self.titles['A'][i]),
+                'atp_500': int(self.titles['M'][i])
+            })
+        return top_performers
+
+    def accumulated(self, player_ids):
+        """Running totals for a fixed list of players, sorted by titles then matches"""
+        rank_list = []
+        for player_id in player_ids:
+            i = self.index_of(player_id)
+            rank_list.append({
+                'player_id': str(player_id),
+                'player_name': self.player_lookup.get(player_id, f"Player {player_id}"),
+                'acc_games': int(self.matches[i]) if i is not None else 0,
+                'acc_titles': sum(int(self.titles[level][i]) for level in TITLE_LEVELS) if i is not None else 0
+            })
+        rank_list.sort(key=lambda x: (x['acc_titles'], x['acc_games']), reverse=True)
+        return rank_list
+
+
+def _cumulative_snapshots(stats, dates, tracked_player_ids):
+    """(most matches, most titles, tracked players) after advancing stats to each date"""
+    for current_date in dates:
+        stats.advance(current_date)
+        accumulated = stats.accumulated(tracked_player_ids) if tracked_player_ids is not None else None
+        yield stats.most_matches(), stats.most_titles(), accumulated
+
+
+def _cumulative_chunk(state, dates, top_n, tracked_player_ids):
+    """Worker task: snapshots for a chunk of dates, from totals rebuilt up to the chunk's first date"""
+    stats = CumulativeStats(None, state['player_lookup'], top_n=top_n, match_store=worker_match_store(state))
+    return list(_cumulative_snapshots(stats, dates, tracked_player_ids))
+
+
+def iter_cumulative_charts_data(matches_data, players_data, rankings_data, tracked_player_ids=None,
+                                top_n=10, player_lookup=None, ranking_index=None, match_store=None, workers=1,
+                                start_date=None):
+    """
+    One chronological pass over the matches yielding, for every monthly timepoint, a
+    (most matches, most titles, accumulated) triple of timepoints
+    - most matches played (total cumulative)
+    - most titles won (total cumulative)
+    - accumulated matches/titles for the tracked players (None if not given)
+    workers > 1 splits the months across a process pool; start_date skips the months before it
+    """
+    print("🏆 Creating cumulative charts data...")
+    start_time = time.time()
+
+    with phase('index'):
+        if player_lookup is None:
+            player_lookup = build_player_lookup(players_data)
+        if ranking_index is None:
+            ranking_index = RankingIndex(rankings_data)
+        monthly_dates = dates_from(ranking_index.month_end_dates(), start_date)
+        print(f"📅 Processing {len(monthly_dates):,} monthly timepoints")
+
+        if workers > 1:
+            snapshots = iter_parallel(_cumulative_chunk, monthly_dates, matches_data, rankings_data, player_lookup,
+                                      {'top_n': top_n, 'tracked_player_ids': tracked_player_ids}, workers)
+        else:
+            stats = CumulativeStats(matches_data, player_lookup, top_n=top_n, match_store=match_store)
+            snapshots = _cumulative_snapshots(stats, monthly_dates, tracked_player_ids)
+
+    with phase('timepoints', timepoints=len(monthly_dates)):
+        for current_date, (most_matches, most_titles, accumulated) in zip(monthly_dates, snapshots):
+            date = current_date.strftime('%Y-%m-%d')
+            year_month = current_date.strftime('%Y-%m')
+            accumulated_timepoint = None
+            if tracked_player_ids is not None:
+                accumulated_timepoint = {
+                    'date': date,
+                    'year_month': year_month,
+                    'rank': accumulated
+                }
+            yield ({'date': date, 'year_month': year_month, 'top_players': most_matches},
+                   {'date': date, 'year_month': year_month, 'top_players': most_titles},
+                   accumulated_timepoint)
+
+    print(f"✅ Processed all timepoints in {time.time() - start_time:.1f} seconds")
+
+
+def create_cumulative_charts_data(matches_data, players_data, rankings_data, tracked_player_ids=None,
+                                  top_n=10, player_lookup=None, ranking_index=None, match_store=None, workers=1,
+                                  start_date=None):
+    """
+    most_matches_data, most_titles_data and accumulated_timeline (empty without tracked players)
+    as lists, from iter_cumulative_charts_data
+    """
+    most_matches_data = []
+    most_titles_data = []
+    accumulated_timeline = []
+    for most_matches, most_titles, accumulated in iter_cumulative_charts_data(
+            matches_data, players_data, rankings_data, tracked_player_ids=tracked_player_ids, top_n=top_n,
+            player_lookup=player_lookup, ranking_index=ranking_index, match_store=match_store, workers=workers,
+            start_date=start_date):
+        most_matches_data.append(most_matches)
+        most_titles_data.append(most_titles)
+        if accumulated is not None:
+            accumulated_timeline.append(accumulated)
+    return most_matches_data, most_titles_data, accumulated_timeline
+
+
+def create_auxiliary_charts_data(matches_data, players_data, rankings_data, player_lookup=None, ranking_index=None,
+                                 match_store=None, workers=1):
+    """
+    Create auxiliary data for line charts:
+    - Most matches played (total cumulative)
+    - Most titles won (total cumulative)
+    """
+    most_matches_data, most_titles_data, _ = create_cumulative_charts_data(
+        matches_data, players_data, rankings_data, player_lookup=player_lookup, ranking_index=ranking_index,
+        match_store=match_store, workers=workers)
+    return most_matches_data, most_titles_data
+
+
+def count_player_matches_and_titles(matches_data, players_data, top_n=25, player_lookup=None, match_store=None):
+    """
+    Count ALL matches and titles (A/M/G only) per player
+    Returns the top N players by total matches and the top N by total titles
+    """
+    if player_lookup is None:
+        player_lookup = build_player_lookup(players_data)
+    stats = CumulativeStats(matches_data, player_lookup, match_store=match_store)
+    if len(stats.days):
+        stats.advance(pd.Timestamp(int(stats.days[-1]), unit='D'))
+
+    # Players in order of first appearance, like the notebook's dict of counters
+    played = np.nonzero(stats.known & (stats.matches > 0))[0]
+    played = played[np.argsort(stats.first_match[played], kind='stable')]
+    all_players = []
+    for i in played.tolist():
+        player_id = int(stats.player_ids[i])
+        all_players.append({
+            'player_id': player_id,
+            'player_name': player_lookup[player_id],
+            'total_matches': int(stats.matches[i]),
+            'total_titles': sum(int(stats.titles[level][i]) for level in TITLE_LEVELS)
+        })
+
+    top_matches = sorted(all_players, key=lambda x: x['total_matches'], reverse=True)[:top_n]
+    top_titles = sorted(all_players, key=lambda x: x['total_titles'], reverse=True)[:top_n]
+    return top_matches, top_titles
+
+
+def iter_accumulated_stats_timeline(matches_data, players_data, monthly_data_file,
+                                    top_players_file='top_25_titles_amg.json'):
+    """
+    Accumulated matches and titles of the top players, yielded one timepoint at a time
+    Timepoints are taken from monthly_data_file, tracked players from top_players_file
+    """
+    print("🏆 Creating accumulated stats timeline...")
+
+    with open(monthly_data_file, 'r') as f:
+        monthly_dates = [(timepoint['date'], timepoint['year_month']) for timepoint in json.load(f)]
+    with open(top_players_file, 'r') as f:
+        top_player_ids = [p['player_id'] for p in json.load(f)]
+    print(f"📅 Found {len(monthly_dates)} monthly timepoints, tracking {len(top_player_ids)} top players")
+
+    stats = CumulativeStats(matches_data, build_player_lookup(players_data))
+    for date, year_month in monthly_dates:
+        stats.advance(pd.Timestamp(datetime.strptime(date, '%Y-%m-%d')))
+        yield {
+            'date': date,
+            'year_month': year_month,
+            'rank': stats.accumulated(top_player_ids)
+        }
+
+
+def create_accumulated_stats_timeline(matches_data, players_data, monthly_data_file,
+                                      top_players_file='top_25_titles_amg.json'):
+    """
+    Create timeline with accumulated matches and titles for top players
+    The timepoints of iter_accumulated_stats_timeline as a list
+    """
+    return list(iter_accumulated_stats_timeline(matches_data, players_data, monthly_data_file, top_players_file))
@@ -0,0 +1,451 @@
+"""
+Streaming, compact and chunked export of the scrollytelling timelines
+JsonArrayWriter writes a JSON array element by element (optionally gzip/brotli compressed
+on the fly), so timepoints yielded by the iter_* builders never have to be held together;
+TimelineWriter feeds the compact encoding and the era chunks from the same stream.
+Player names are stored once in a shared table and referenced by index; per-timepoint
+lists (rank, top, ...) are stored column by column. Precompressed .gz/.br siblings are
+written next to the file for servers that serve static precompressed assets.
+Timelines can also be split into per-era chunk files described by a small manifest, so
+the page only fetches the part of history being viewed.
+decodeCompactTimeline() and openChunkedTimeline() in tennis-scrollytelling/js/scrollytelling.js
+are the readers.
+"""
+
+import gzip
+import json
+import os
+import shutil
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional: .br siblings are skipped without it
+    brotli = None
+
+COMPACT_FORMAT = 'tennis-compact-timeline'
+COMPACT_VERSION = 1
+COMPACT_SUFFIX = '.compact.json'
+
+CHUNK_FORMAT = 'tennis-timeline-chunks'
+CHUNK_VERSION = 1
+MANIFEST_SUFFIX = '.manifest.json'
+CHUNK_YEARS = 10
+
+# Entry fields holding a player name, replaced by an index into the players table
+NAME_FIELDS = ('name', 'player_name')
+
+
+COMPRESSIONS = ('gzip', 'br')
+
+
+class JsonArrayWriter:
+    """
+    Incremental writer for a JSON array of items
+    With indent=2 the file is byte-identical to json.dump(items, f, indent=2); only one
+    item is serialized at a time. compression='gzip' or 'br' compresses the stream on
+    the fly (the path is used as given, e.g. momentum_score_data.json.gz).
+    Items go to a temporary file that replaces path on close(); if the block writing them
+    raises, the temporary file is deleted and path keeps its previous content.
+    """
+
+    def __init__(self, path, indent=2, compression=None):
+        if compression not in (None,) + COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression} (expected one of {COMPRESSIONS})")
+        if compression == 'br' and brotli is None:
+            raise ValueError("brotli compression needs the brotli package")
+        self.path = Path(path)
+        self.indent = indent
+        self.count = 0
+        self._compressor = brotli.Compressor(quality=11) if compression == 'br' else None
+        self._temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        self._file = open(self._temp_path, 'wb')
+        # mtime=0 keeps the .gz byte-identical across rebuilds of the same data
+        self._stream = gzip.GzipFile(fileobj=self._file, mode='wb', mtime=0) if compression == 'gzip' else None
+        self._separator = ',\n' + ' ' * indent if indent is not None else ', '
+        self._item_indent = '\n' + ' ' * indent if indent is not None else None
+
+    def _emit(self, text):
+        data = text.encode('utf-8')
+        if self._stream is not None:
+            self._stream.write(data)
+        elif self._compressor is not None:
+            self._file.write(self._compressor.process(data))
+        else:
+            self._file.write(data)
+
+    def write(self, item):
+        text = json.dumps(item, indent=self.indent)
+        if self._item_indent is not None:
+            # Nest the item one level down; newlines inside strings are escaped, so this only touches layout
+            text = text.replace('\n', self._item_indent)
+        if self.count == 0:
+            self._emit('[' + ('\n' + ' ' * self.indent if self.indent is not None else '') + text)
+        else:
+            self._emit(self._separator + text)
+        self.count += 1
+
+    def write_all(self, items):
+        for item in items:
+            self.write(item)
+        return self.count
+
+    def close(self):
+        """Finish the array and move it to path; returns path"""
+        if self._file is None:
+            return self.path
+        if self.count == 0:
+            self._emit('[]')
+        else:
+            self._emit('\n]' if self.indent is not None else ']')
+        if self._stream is not None:
+            self._stream.close()
+        if self._compressor is not None:
+            self._file.write(self._compressor.finish())
+        self._file.close()
+        self._file = None
+        os.replace(self._temp_path, self.path)
+        return self.path
+
+    def discard(self):
+        """Drop what was written so far, leaving path untouched"""
+        if self._file is None:
+            return
+        if self._stream is not None:
+            self._stream.close()
+        self._file.close()
+        self._file = None
+        self._temp_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+
+def write_json_stream(path, items, indent=2, compression=None):
+    """Write an iterable of items (e.g. an iter_* builder) as a JSON array; returns the item count"""
+    with JsonArrayWriter(path, indent=indent, compression=compression) as writer:
+        return writer.write_all(items)
+
+
+def compact_path(path):
+    """momentum_score_data.json -> momentum_score_data.compact.json"""
+    path = Path(path)
+    return path.with_name(path.stem + COMPACT_SUFFIX)
+
+
+class CompactEncoder:
+    """
+    encode_compact fed one timepoint at a time
+    Only the columns grow with the timeline (numbers and player indexes, not the timepoint dicts)
+    """
+
+    def __init__(self):
+        self.players = []
+        self.player_index = {}
+        self.length = 0
+        self.keys = None
+        self.columns = {}
+        self.lists = {}
+
+    def _intern(self, name):
+        if name not in self.player_index:
+            self.player_index[name] = len(self.players)
+            self.players.append(name)
+        return self.player_index[name]
+
+    def add(self, timepoint):
+        if self.keys is None:
+            self.keys = list(timepoint)
+            list_keys = [key for key in self.keys if isinstance(timepoint[key], list)]
+            self.columns = {key: [] for key in self.keys if key not in list_keys}
+            self.lists = {key: {'counts': [], 'keys': None, 'names': [], 'columns': {}} for key in list_keys}
+        if list(timepoint) != self.keys:
+            raise ValueError(f"Timepoint fields differ: {list(timepoint)} != {self.keys}")
+
+        for key, column in self.columns.items():
+            column.append(timepoint[key])
+        for key, section in self.lists.items():
+            entries = timepoint[key]
+            section['counts'].append(len(entries))
+            for entry in entries:
+                if section['keys'] is None:
+                    section['keys'] = list(entry)
+                    section['names'] = [field for field in entry if field in NAME_FIELDS]
+                    section['columns'] = {field: [] for field in entry}
+                if list(entry) != section['keys']:
+                    raise ValueError(f"Entry fields differ in {key}: {list(entry)} != {section['keys']}")
+                for field, value in entry.items():
+                    section['columns'][field].append(self._intern(value) if field in section['names'] else value)
+        self.length += 1
+
+    def payload(self):
+        for section in self.lists.values():
+            if section['keys'] is None:
+                section['keys'] = []
+        return {
+            'format': COMPACT_FORMAT,
+            'version': COMPACT_VERSION,
+            'length': self.length,
+            'keys': self.keys or [],
+            'players': self.players,
+            'columns': self.columns,
+            'lists': self.lists,
+        }
+
+    def save(self, path):
+        """Write the compact encoding next to path (see compact_path); returns the written files"""
+        data = json.dumps(self.payload(), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        return write_precompressed(compact_path(path), data)
+
+
+def encode_compact(timepoints):
+    """
+    Encode timepoints (dicts of scalars and lists of flat dicts; a list or any iterable)
+    - columns: one array per scalar field, indexed by timepoint
+    - lists: per list field, the entry count of every timepoint and one array per entry field
+    """
+    encoder = CompactEncoder()
+    for timepoint in timepoints:
+        encoder.add(timepoint)
+    return encoder.payload()
+
+
+def decode_compact(payload):
+    """Inverse of encode_compact"""
+    if payload.get('format') != COMPACT_FORMAT or payload.get('version') != COMPACT_VERSION:
+        raise ValueError(f"Unsupported compact format: {payload.get('format')} v{payload.get('version')}")
+
+    players = payload['players']
+    positions = {key: 0 for key in payload['lists']}
+    timepoints = []
+    for i in range(payload['length']):
+        timepoint = {}
+        for key in payload['keys']:
+            if key in payload['columns']:
+                timepoint[key] = payload['columns'][key][i]
+                continue
+            section = payload['lists'][key]
+            start = positions[key]
+            end = start + section['counts'][i]
+            positions[key] = end
+            timepoint[key] = [{
+                field: (players[section['columns'][field][j]] if field in section['names']
+                        else section['columns'][field][j])
+                for field in section['keys']
+            } for j in range(start, end)]
+        timepoints.append(timepoint)
+    return timepoints
+
+
+def write_precompressed(path, data):
+    """Write data (bytes) to path plus .gz and, when brotli is installed, .br siblings"""
+    path = Path(path)
+    written = [path]
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    gz_path = path.with_name(path.name + '.gz')
+    # mtime=0 keeps the .gz byte-identical across rebuilds of the same data
+    with open(gz_path, 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    written.append(gz_path)
+
+    if brotli is not None:
+        br_path = path.with_name(path.name + '.br')
+        with open(br_path, 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+        written.append(br_path)
+    return written
+
+
+def write_compact(path, timepoints):
+    """
+    Write the compact encoding of timepoints next to path (see compact_path)
+    Returns the written files (compact JSON and its compressed siblings)
+    """
+    encoder = CompactEncoder()
+    for timepoint in timepoints:
+        encoder.add(timepoint)
+    return encoder.save(path)
+
+
+def manifest_path(path):
+    """momentum_score_data.json -> momentum_score_data.manifest.json"""
+    path = Path(path)
+    return path.with_name(path.stem + MANIFEST_SUFFIX)
+
+
+def chunk_dir(path):
+    """momentum_score_data.json -> momentum_score_data/ (holds the chunk files)"""
+    path = Path(path)
+    return path.with_name(path.stem)
+
+
+class ChunkWriter:
+    """
+    Writes timepoints as one chunk file per era plus a manifest next to path
+    The manifest lists every timepoint date and, per chunk, its file, index range, date range
+    and size, so the page can lay out the whole timeline before any chunk is loaded.
+    Only the timepoints of the current era are held. Chunks are written to a temporary
+    directory that replaces the chunk directory on close(); discard() drops it instead.
+    """
+
+    def __init__(self, path, years=CHUNK_YEARS, compact=False):
+        self.path = Path(path)
+        self.years = years
+        self.compact = compact
+        self.directory = chunk_dir(self.path)
+        self._temp_dir = self.directory.with_name(f"{self.directory.name}.{os.getpid()}.tmp")
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
+        self._temp_dir.mkdir(parents=True)
+        self.start_year = None
+        self.era = []
+        self.chunks = []
+        self.dates = []
+        self.files = []
+        self.closed = False
+
+    def write(self, timepoint):
+        start_year = int(timepoint['date'][:4]) // self.years * self.years
+        if self.era and start_year != self.start_year:
+            self._flush()
+        self.start_year = start_year
+        self.era.append(timepoint)
+
+    def _flush(self):
+        era = self.era
+        chunk_path = self._temp_dir / f"{self.start_year}.json"
+        data = json.dumps(era, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        self.files.extend(file.name for file in write_precompressed(chunk_path, data))
+        chunk = {
+            'file': f"{self.directory.name}/{chunk_path.name}",
+            'start_year': self.start_year,
+            'start_index': len(self.dates),
+            'count': len(era),
+            'start_date': era[0]['date'],
+            'end_date': era[-1]['date'],
+            'bytes': len(data),
+        }
+        if self.compact:
+            compact_files = write_compact(chunk_path, era)
+            self.files.extend(file.name for file in compact_files)
+            chunk['compact_bytes'] = compact_files[0].stat().st_size
+        self.chunks.append(chunk)
+        self.dates.extend(timepoint['date'] for timepoint in era)
+        self.era = []
+
+    def close(self):
+        """Write the last chunk and the manifest; returns the written files"""
+        if self.closed:
+            return []
+        if self.era:
+            self._flush()
+        # The directory only holds chunks of this timeline; those of a previous split go with it
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.replace(self._temp_dir, self.directory)
+        self.closed = True
+
+        manifest = {
+            'format': CHUNK_FORMAT,
+            'version': CHUNK_VERSION,
+            'length': len(self.dates),
+            'years_per_chunk': self.years,
+            'dates': self.dates,
+            'chunks': self.chunks,
+        }
+        manifest_file = manifest_path(self.path)
+        with open(manifest_file, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return [self.directory / name for name in self.files] + [manifest_file]
+
+    def discard(self):
+        if not self.closed:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self.closed = True
+
+
+def write_chunks(path, timepoints, years=CHUNK_YEARS, compact=False):
+    """
+    Write timepoints as one chunk file per era plus a manifest next to path (see ChunkWriter)
+    timepoints may be a generator; only one era is held at a time.
+    Returns the written files
+    """
+    writer = ChunkWriter(path, years, compact)
+    try:
+        for timepoint in timepoints:
+            writer.write(timepoint)
+    except BaseException:
+        writer.discard()
+        raise
+    return writer.close()
+
+
+class TimelineWriter:
+    """
+    A timeline written while its timepoints are produced: the JSON array at path and, optionally,
+    its compact encoding (compact=True) and era chunks (chunk_years=N) from the same stream.
+    The JSON and the chunks hold one timepoint (one era) at a time; the compact encoding keeps
+    its columns until close(), since the format stores the whole timeline column by column.
+    Used as a context manager, an error while writing leaves the previous files in place.
+    """
+
+    def __init__(self, path, compact=False, chunk_years=None, indent=2, compression=None):
+        self.path = Path(path)
+        self.json = JsonArrayWriter(self.path, indent=indent, compression=compression)
+        self.compact = CompactEncoder() if compact else None
+        self.chunks = ChunkWriter(self.path, chunk_years, compact=compact) if chunk_years else None
+        self.files = None
+
+    @property
+    def count(self):
+        return self.json.count
+
+    def write(self, timepoint):
+        self.json.write(timepoint)
+        if self.compact is not None:
+            self.compact.add(timepoint)
+        if self.chunks is not None:
+            self.chunks.write(timepoint)
+
+    def write_all(self, timepoints):
+        for timepoint in timepoints:
+            self.write(timepoint)
+        return self.count
+
+    def close(self):
+        """Finish every file; returns the written files, the JSON array first"""
+        if self.files is None:
+            self.files = [self.json.close()]
+            if self.compact is not None:
+                self.files += self.compact.save(self.path)
+            if self.chunks is not None:
+                self.files += self.chunks.close()
+        return self.files
+
+    def discard(self):
+        self.json.discard()
+        if self.chunks is not None:
+            self.chunks.discard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+
+def write_timeline(path, timepoints, compact=False, chunk_years=None):
+    """Write an iterable of timepoints (e.g. an iter_* builder) with TimelineWriter; returns the timepoint count"""
+    with TimelineWriter(path, compact=compact, chunk_years=chunk_years) as writer:
+        return writer.write_all(timepoints)
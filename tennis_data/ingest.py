@@ -0,0 +1,196 @@
+"""
+Columnar cache for the ATP CSV inputs
+The CSVs are converted once into one .npy file per column with compact dtypes
+(int32 ids, categorical codes for strings, parsed datetime64 dates). Later loads
+memory-map only the columns a caller asks for instead of re-reading the CSV.
+The cache lives next to the CSVs (<data_dir>/.atp_cache) unless a cache directory is given.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .common import to_datetime
+
+MATCHES_DATA_FILE_NAME = "atp_matches_till_2022.csv"
+PLAYERS_DATA_FILE_NAME = "atp_players_till_2022.csv"
+RANKINGS_DATA_FILE_NAME = "atp_rankings_till_2022.csv"
+
+# Per table: source file, YYYYMMDD date columns and player id columns
+TABLES = {
+    'matches': {
+        'file': MATCHES_DATA_FILE_NAME,
+        'dates': ['tourney_date'],
+        'ids': ['winner_id', 'loser_id'],
+    },
+    'players': {
+        'file': PLAYERS_DATA_FILE_NAME,
+        'dates': [],
+        'ids': ['player_id'],
+    },
+    'rankings': {
+        'file': RANKINGS_DATA_FILE_NAME,
+        'dates': ['ranking_date'],
+        'ids': ['player'],
+    },
+}
+
+# Largest integer float32 stores exactly
+FLOAT32_EXACT = 2 ** 24
+
+FORMAT_VERSION = 1
+
+CACHE_DIR_NAME = '.atp_cache'
+
+
+def _compact_numeric(values):
+    """Smallest lossless dtype for a numeric column"""
+    if pd.api.types.is_integer_dtype(values):
+        return pd.to_numeric(values, downcast='integer').to_numpy()
+    if pd.api.types.is_float_dtype(values):
+        present = values.dropna()
+        whole = bool((present == np.floor(present)).all()) and bool((present.abs() < FLOAT32_EXACT).all())
+        return values.to_numpy(dtype=np.float32 if whole else np.float64)
+    return values.to_numpy()
+
+
+def _source_fingerprint(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class ColumnarCache:
+    """
+    One directory per table: meta.json plus <column>.npy
+    String columns are stored as categorical codes with their categories in meta.json
+    Without cache_dir the tables go to <data_dir>/.atp_cache; a cache_dir that is given holds one
+    subdirectory per data directory, named after a hash of its resolved path, so it can be shared
+    """
+
+    def __init__(self, data_dir, cache_dir=None):
+        self.data_dir = Path(data_dir)
+        if cache_dir is None:
+            self.cache_dir = self.data_dir / CACHE_DIR_NAME
+        else:
+            source_key = hashlib.sha256(str(self.data_dir.resolve()).encode('utf-8')).hexdigest()[:16]
+            self.cache_dir = Path(cache_dir) / source_key
+        # Tables whose cache was checked against the CSV's content by this instance
+        self._current = set()
+
+    def source_path(self, table):
+        return self.data_dir / TABLES[table]['file']
+
+    def table_dir(self, table):
+        return self.cache_dir / table
+
+    def meta(self, table):
+        meta_path = self.table_dir(table) / 'meta.json'
+        if not meta_path.exists():
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def is_current(self, table):
+        """
+        True if the cache was built from the current version of the CSV: same size and mtime, and
+        same SHA-256 (checked once per instance), so a CSV rewritten in place is never missed
+        """
+        if table in self._current:
+            return True
+        from .pipeline.cache import hash_file
+
+        meta = self.meta(table)
+        source_path = self.source_path(table)
+        current = (meta is not None and meta.get('format') == FORMAT_VERSION and
+                   meta.get('source') == _source_fingerprint(source_path) and
+                   meta.get('source_sha256') == hash_file(source_path))
+        if current:
+            self._current.add(table)
+        return current
+
+    def build(self, table):
+        """Convert the CSV for table into the columnar cache"""
+        from .pipeline.cache import hash_file
+
+        spec = TABLES[table]
+        source_path = self.source_path(table)
+        print(f"📦 Converting {source_path.name} to columnar cache...")
+        frame = pd.read_csv(source_path, low_memory=False)
+
+        table_dir = self.table_dir(table)
+        table_dir.mkdir(parents=True, exist_ok=True)
+        columns = {}
+        for column in frame.columns:
+            values = frame[column]
+            info = {}
+            if column in spec['dates']:
+                array = np.asarray(to_datetime(values), dtype='datetime64[ns]')
+                info['kind'] = 'date'
+            elif column in spec['ids'] and not values.isna().any():
+                array = values.to_numpy(dtype=np.int32)
+                info['kind'] = 'id'
+            elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                array = _compact_numeric(values)
+                info['kind'] = 'numeric'
+            else:
+                categorical = pd.Categorical(values)
+                codes = categorical.codes
+                array = codes.astype(np.int8 if len(categorical.categories) < 127 else
+                                     np.int16 if len(categorical.categories) < 32767 else np.int32)
+                info['kind'] = 'category'
+                info['categories'] = [str(c) for c in categorical.categories]
+            np.save(table_dir / f"{column}.npy", array, allow_pickle=False)
+            info['dtype'] = str(array.dtype)
+            columns[column] = info
+
+        meta = {
+            'format': FORMAT_VERSION,
+            'source': _source_fingerprint(source_path),
+            'source_sha256': hash_file(source_path),
+            'rows': len(frame),
+            'columns': columns,
+        }
+        with open(table_dir / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        self._current.add(table)
+        print(f"✅ Cached {len(frame):,} rows x {len(columns)} columns in {table_dir}")
+        return meta
+
+    def ensure(self, table):
+        return self.meta(table) if self.is_current(table) else self.build(table)
+
+    def source_hash(self, table):
+        """Content hash of the CSV, recorded at conversion time"""
+        return self.ensure(table)['source_sha256']
+
+    def load_columns(self, table, columns=None):
+        """Memory-mapped arrays for the requested columns (categoricals as pd.Categorical)"""
+        meta = self.ensure(table)
+        names = list(meta['columns']) if columns is None else list(columns)
+        arrays = {}
+        for column in names:
+            info = meta['columns'].get(column)
+            if info is None:
+                raise KeyError(f"{table} has no column {column!r}")
+            array = np.load(self.table_dir(table) / f"{column}.npy", mmap_mode='r', allow_pickle=False)
+            if info['kind'] == 'category':
+                array = pd.Categorical.from_codes(np.asarray(array), categories=info['categories'])
+            arrays[column] = array
+        return arrays
+
+    def load(self, table, columns=None):
+        """DataFrame with only the requested columns"""
+        return pd.DataFrame(self.load_columns(table, columns), copy=False)
+
+
+def load_atp_data(data_dir, matches_columns=None, players_columns=None, rankings_columns=None,
+                  cache_dir=None):
+    """Load (matches_data, players_data, rankings_data) through the columnar cache (see ColumnarCache)"""
+    cache = ColumnarCache(data_dir, cache_dir)
+    return (cache.load('matches', matches_columns),
+            cache.load('players', players_columns),
+            cache.load('rankings', rankings_columns))
@@ -0,0 +1,282 @@
+"""
+Run instrumentation for the data builders
+Phase timers, rows/timepoints counters, peak RSS sampling and optional cProfile capture,
+collected into a JSON run report. Builders mark their phases with phase(); outside an
+instrumented run (the notebook, pool workers) a phase is a no-op.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_FORMAT = 'tennis-data-run-report'
+REPORT_VERSION = 1
+RSS_SAMPLE_INTERVAL = 0.05
+PROFILE_TOP_N = 25
+
+# Entries (stages, sources) currently being recorded, innermost last
+_active = []
+
+
+def current_rss():
+    """Resident set size of this process in bytes, None where /proc is not available"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def max_rss(children=False):
+    """Peak RSS in bytes of this process (or of its largest finished child process) so far"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # Kilobytes on Linux, bytes on macOS
+    return usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+
+
+class RssSampler:
+    """
+    Background thread sampling the current RSS, tracking the peak of every open window
+    Falls back to the process-lifetime peak (getrusage) where the current RSS cannot be read
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def _sample(self):
+        rss = current_rss()
+        if rss is None:
+            rss = max_rss()
+        if rss is not None:
+            with self.lock:
+                for window, peak in self.windows.items():
+                    if peak is None or rss > peak:
+                        self.windows[window] = rss
+        return rss
+
+    def _loop(self):
+        while not self.stop_event.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._loop, name='rss-sampler', daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+    def open_window(self, window):
+        with self.lock:
+            self.windows[window] = None
+        self._sample()
+
+    def peak(self, window):
+        """Peak RSS in bytes seen since open_window (None if it could not be sampled)"""
+        self._sample()
+        with self.lock:
+            return self.windows.get(window)
+
+    def close_window(self, window):
+        peak = self.peak(window)
+        with self.lock:
+            self.windows.pop(window, None)
+        return peak
+
+
+class EntryMetrics:
+    """Timers and counters of one stage or source of a run"""
+
+    def __init__(self, name):
+        self.name = name
+        self.status = None
+        self.seconds = None
+        self.peak_rss_bytes = None
+        self.phases = {}
+        self.counters = {}
+        self.profile = None
+        # Time of interleaved() blocks so far, taken off the phases open around them
+        self.interleaved_seconds = 0.0
+
+    def add_phase(self, name, seconds, rows=None, timepoints=None):
+        entry = self.phases.setdefault(name, {'seconds': 0.0, 'calls': 0})
+        entry['seconds'] += seconds
+        entry['calls'] += 1
+        for field, value in (('rows', rows), ('timepoints', timepoints)):
+            if value is not None:
+                entry[field] = entry.get(field, 0) + value
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @staticmethod
+    def _rates(entry, seconds):
+        for field in ('rows', 'timepoints'):
+            if field in entry and seconds:
+                entry[f'{field}_per_sec'] = round(entry[field] / seconds, 1)
+        return entry
+
+    def as_dict(self):
+        result = {'status': self.status, 'seconds': round(self.seconds, 4) if self.seconds is not None else None,
+                  'peak_rss_bytes': self.peak_rss_bytes}
+        result.update(self._rates(dict(self.counters), self.seconds))
+        result['phases'] = {name: self._rates({**entry, 'seconds': round(entry['seconds'], 4)}, entry['seconds'])
+                            for name, entry in self.phases.items()}
+        if self.profile is not None:
+            result['profile'] = self.profile
+        return result
+
+
+@contextmanager
+def phase(name, rows=None, timepoints=None):
+    """
+    Time a phase of the stage being recorded (no-op outside an instrumented run)
+    Yields a {'rows', 'timepoints'} dict the block can fill in when the counts are only known at the end
+    """
+    counts = {'rows': rows, 'timepoints': timepoints}
+    if not _active:
+        yield counts
+        return
+    metrics = _active[-1]
+    start_time = time.perf_counter()
+    start_interleaved = metrics.interleaved_seconds
+    try:
+        yield counts
+    finally:
+        seconds = time.perf_counter() - start_time - (metrics.interleaved_seconds - start_interleaved)
+        metrics.add_phase(name, seconds, counts['rows'], counts['timepoints'])
+
+
+@contextmanager
+def interleaved(name):
+    """
+    Time a block that runs while other phases are open without being part of them, e.g. writing
+    the timepoint a builder's generator yielded while its 'timepoints' phase is suspended:
+    the block is added to phase name and its time is taken off every phase open around it
+    """
+    if not _active:
+        yield
+        return
+    metrics = _active[-1]
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start_time
+        metrics.add_phase(name, seconds)
+        metrics.interleaved_seconds += seconds
+
+
+def count(name, n=1):
+    """Add n to a counter (e.g. 'rows', 'timepoints') of the stage being recorded"""
+    if _active:
+        _active[-1].count(name, n)
+
+
+def profile_summary(profiler, top_n=PROFILE_TOP_N):
+    """The top_n functions by cumulative time, as JSON-friendly dicts"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({'function': f"{Path(filename).name}:{line}({function})", 'calls': calls,
+                     'tottime': round(tottime, 4), 'cumtime': round(cumtime, 4)})
+    rows.sort(key=lambda row: row['cumtime'], reverse=True)
+    return rows[:top_n]
+
+
+class RunReport:
+    """
+    JSON report of one pipeline run: per source and stage the status, wall time, peak RSS,
+    phase timers and rows/timepoints rates, plus a cProfile summary of profile_stage if given
+    (its full profile is saved next to the report as <report stem>.<stage>.prof)
+    """
+
+    def __init__(self, path, profile_stage=None, sample_interval=RSS_SAMPLE_INTERVAL):
+        self.path = Path(path)
+        self.profile_stage = profile_stage
+        self.sampler = RssSampler(sample_interval)
+        self.started_at = None
+        self.start_time = None
+        self.entries = {'sources': {}, 'stages': {}}
+
+    def __enter__(self):
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.start_time = time.perf_counter()
+        self.sampler.start()
+        self.sampler.open_window(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.write()
+        self.sampler.close_window(self)
+        self.sampler.stop()
+        return False
+
+    @contextmanager
+    def record(self, name, kind='stages'):
+        """Record a stage (or, with kind='sources', a raw input) while the block runs; yields its EntryMetrics"""
+        metrics = EntryMetrics(name)
+        profiler = cProfile.Profile() if kind == 'stages' and name == self.profile_stage else None
+        _active.append(metrics)
+        self.sampler.open_window(metrics)
+        start_time = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield metrics
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            metrics.seconds = time.perf_counter() - start_time
+            metrics.peak_rss_bytes = self.sampler.close_window(metrics)
+            _active.remove(metrics)
+            if profiler is not None:
+                profile_path = self.path.with_name(f"{self.path.stem}.{name}.prof")
+                profiler.dump_stats(profile_path)
+                metrics.profile = {'file': profile_path.name, 'top': profile_summary(profiler)}
+            self.entries[kind][name] = metrics
+
+    def as_dict(self):
+        return {
+            'format': REPORT_FORMAT,
+            'version': REPORT_VERSION,
+            'started_at': self.started_at,
+            'seconds': round(time.perf_counter() - self.start_time, 4),
+            'peak_rss_bytes': self.sampler.peak(self),
+            'max_rss_bytes': max_rss(),
+            # Largest finished child, e.g. a process pool worker of a parallel stage
+            'children_max_rss_bytes': max_rss(children=True),
+            'sources': {name: metrics.as_dict() for name, metrics in self.entries['sources'].items()},
+            'stages': {name: metrics.as_dict() for name, metrics in self.entries['stages'].items()},
+        }
+
+    def write(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
+        os.replace(temp_path, self.path)
+        return self.path
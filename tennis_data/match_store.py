@@ -0,0 +1,95 @@
+"""
+Compact match store
+Matches as parallel NumPy arrays with interned player ids, built once and shared by the
+engines instead of each of them re-reading the matches frame
+"""
+
+import numpy as np
+import pandas as pd
+
+from .common import TITLE_LEVELS, TITLE_ROUND, to_days
+
+# Code used in the uint8 level/round arrays for a missing value
+MISSING_CODE = 255
+
+
+def _encode(values):
+    """uint8 codes and the list of categories for a low-cardinality string column"""
+    categorical = pd.Categorical(values)
+    if len(categorical.categories) >= MISSING_CODE:
+        raise ValueError(f"Too many categories to encode as uint8: {len(categorical.categories)}")
+    codes = np.where(categorical.codes < 0, MISSING_CODE, categorical.codes).astype(np.uint8)
+    return codes, [str(c) for c in categorical.categories]
+
+
+class MatchStore:
+    """
+    Matches in source row order, about 14 bytes per match
+    - days: int32 days since the epoch
+    - winner/loser: dense int32 player index (-1 when the id is missing)
+    - level/round: uint8 codes into levels/rounds (MISSING_CODE when missing)
+    Players get a dense index in id order; known marks ids present in player_lookup
+    and names holds their display name (None for unknown ids).
+    Ids that only appear in rankings_data get an index too, so ranking-based engines
+    can share the same player numbering.
+    """
+
+    def __init__(self, matches_data, player_lookup, rankings_data=None):
+        winner_ids = matches_data['winner_id'].to_numpy(dtype=np.float64, na_value=np.nan)
+        loser_ids = matches_data['loser_id'].to_numpy(dtype=np.float64, na_value=np.nan)
+        all_ids = [winner_ids, loser_ids]
+        if rankings_data is not None:
+            all_ids.append(rankings_data['player'].to_numpy(dtype=np.float64, na_value=np.nan))
+        player_ids = np.unique(np.concatenate(all_ids))
+        self.player_ids = player_ids[~np.isnan(player_ids)].astype(np.int64)
+        self.includes_rankings = rankings_data is not None
+
+        self.names = [player_lookup.get(pid) for pid in self.player_ids.tolist()]
+        self.known = np.array([name is not None for name in self.names], dtype=bool)
+
+        self.days = to_days(matches_data['tourney_date']).astype(np.int32)
+        self.winner = self._intern(winner_ids)
+        self.loser = self._intern(loser_ids)
+        self.level, self.levels = _encode(matches_data['tourney_level'])
+        self.round, self.rounds = _encode(matches_data['round'])
+
+        title_levels = [self.levels.index(level) for level in TITLE_LEVELS if level in self.levels]
+        self.is_title = (np.isin(self.level, title_levels) & (self.round == self.round_code(TITLE_ROUND)) &
+                         (self.winner >= 0))
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def n_players(self):
+        return len(self.player_ids)
+
+    def _intern(self, ids):
+        present = ~np.isnan(ids)
+        idx = np.searchsorted(self.player_ids, np.where(present, ids, 0).astype(np.int64))
+        return np.where(present, idx, -1).astype(np.int32)
+
+    def index_of(self, ids):
+        """Dense index for each id and a mask of ids that are in the store"""
+        ids = np.asarray(pd.Series(ids).to_numpy(dtype=np.float64, na_value=np.nan))
+        present = ~np.isnan(ids)
+        ids = np.where(present, ids, -1).astype(np.int64)
+        idx = np.searchsorted(self.player_ids, ids)
+        idx = np.minimum(idx, max(self.n_players - 1, 0))
+        found = present & (self.n_players > 0)
+        found[found] = self.player_ids[idx[found]] == ids[found]
+        return idx, found
+
+    def level_code(self, level):
+        return self.levels.index(level) if level in self.levels else MISSING_CODE - 1
+
+    def round_code(self, round_name):
+        return self.rounds.index(round_name) if round_name in self.rounds else MISSING_CODE - 1
+
+    def known_winners(self):
+        """Mask of matches whose winner is a known player"""
+        return (self.winner >= 0) & self.known[np.maximum(self.winner, 0)]
+
+    def known_losers(self):
+        """Mask of matches whose loser is a known player"""
+        return (self.loser >= 0) & self.known[np.maximum(self.loser, 0)]
@@ -0,0 +1,386 @@
+"""
+Vectorized momentum engine
+Computes the momentum score of every player at every timepoint from data sorted once,
+instead of re-filtering the match/ranking frames per player and per date
+"""
+
+import time
+
+import numpy as np
+
+from .common import build_player_lookup, dates_from, to_day, to_days
+from .instrument import phase
+from .match_store import MatchStore
+from .parallel import cached, iter_parallel, worker_match_store
+from .ranking_index import RankingIndex
+
+TITLE_WEIGHTS = {'G': 100, 'A': 50, 'M': 25}
+
+# The notebook's scoring; momentum_weights() fills in whatever a query leaves out
+DEFAULT_MOMENTUM_WEIGHTS = {
+    'titles': TITLE_WEIGHTS,
+    # Win rate: win_rate_points per unit of win rate above the baseline (50% = 0, 100% = 50 points)
+    'win_rate_baseline': 0.5,
+    'win_rate_points': 100,
+    # Weeks in top 10: points per week, capped (52 weeks = 30 points)
+    'top10_week_points': 0.6,
+    'top10_max': 30,
+    # Current ranking bonus: [rank at most, bonus], best tier first
+    'ranking_bonus': [[5, 20], [10, 15], [20, 10]],
+}
+
+
+def momentum_weights(weights=None):
+    """DEFAULT_MOMENTUM_WEIGHTS with the given overrides ('titles' is merged per level)"""
+    merged = {**DEFAULT_MOMENTUM_WEIGHTS, 'titles': dict(TITLE_WEIGHTS)}
+    for key, value in (weights or {}).items():
+        if key not in DEFAULT_MOMENTUM_WEIGHTS:
+            raise ValueError(f"Unknown momentum weight: {key}")
+        if key == 'titles':
+            unknown = set(value) - set(TITLE_WEIGHTS)
+            if unknown:
+                raise ValueError(f"Title weights only apply to levels {sorted(TITLE_WEIGHTS)}, got {sorted(unknown)}")
+            merged['titles'].update(value)
+        elif key == 'ranking_bonus':
+            merged[key] = sorted([list(tier) for tier in value])
+        else:
+            merged[key] = value
+    return merged
+
+
+def positive_int(value, name):
+    """value (an int or a string of digits) as a positive int; ValueError naming the parameter otherwise"""
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, (int, np.integer)) or value <= 0:
+        raise ValueError(f"{name} must be a positive integer, got: {value!r}")
+    return int(value)
+
+
+class PlayerEventIndex:
+    """
+    Events (matches, titles, ranking weeks) sorted once by (player, date)
+    Answers "sum over [start, end] for every player" with two searchsorted calls
+    """
+
+    def __init__(self, player_idx, days, n_players, values=None):
+        player_idx = np.asarray(player_idx, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        self.n_players = n_players
+        self.min_day = int(days.min()) if len(days) else 0
+        span = (int(days.max()) - self.min_day) if len(days) else 0
+        # Offsets 1..span+1 for real events, 0 and span+2 are free for clipped queries
+        self.block = span + 3
+
+        keys = player_idx * self.block + (days - self.min_day + 1)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.order = order
+        self.player_idx = player_idx[order]
+        self.days = days[order]
+        self._players = np.arange(n_players, dtype=np.int64) * self.block
+
+        self.cumsum = {}
+        if values is not None:
+            for name, column in values.items():
+                self.add_values(name, column)
+
+    def add_values(self, name, column):
+        """Register a per-event value that can be summed over windows"""
+        column = np.asarray(column)[self.order]
+        self.cumsum[name] = np.concatenate(([0], np.cumsum(column)))
+
+    def _offset(self, day):
+        return min(max(day - self.min_day + 1, 0), self.block - 1)
+
+    def window_bounds(self, start_day, end_day):
+        """Per-player [lo, hi) positions of events with start_day <= day <= end_day"""
+        lo = np.searchsorted(self.keys, self._players + self._offset(start_day), side='left')
+        hi = np.searchsorted(self.keys, self._players + self._offset(end_day), side='right')
+        return lo, np.maximum(hi, lo)
+
+    def window_count(self, start_day, end_day):
+        lo, hi = self.window_bounds(start_day, end_day)
+        return hi - lo
+
+    def window_sum(self, name, start_day, end_day):
+        lo, hi = self.window_bounds(start_day, end_day)
+        cumsum = self.cumsum[name]
+        return cumsum[hi] - cumsum[lo]
+
+    def latest(self, end_day):
+        """Position of each player's last event on or before end_day (-1 if none)"""
+        pos = np.searchsorted(self.keys, self._players + self._offset(end_day), side='right') - 1
+        valid = pos >= 0
+        valid[valid] = self.player_idx[pos[valid]] == np.nonzero(valid)[0]
+        return np.where(valid, pos, -1)
+
+
+class MomentumEngine:
+    """
+    Momentum scores for all players at any date
+    Same formula as the notebook's calculate_momentum_score:
+      - G/A/M titles weighted 100/50/25
+      - win rate bonus: (rate - 50%) x 100
+      - weeks in top 10: 0.6 points per week (max 30)
+      - current ranking bonus: top 5 = 20, top 10 = 15, top 20 = 10
+    """
+
+    def __init__(self, matches_data, players_data, rankings_data, period_days=365, player_lookup=None,
+                 match_store=None):
+        self.period_days = positive_int(period_days, 'period_days')
+        self.player_lookup = player_lookup if player_lookup is not None else build_player_lookup(players_data)
+        if match_store is None:
+            match_store = MatchStore(matches_data, self.player_lookup, rankings_data)
+        elif not match_store.includes_rankings:
+            raise ValueError("MomentumEngine needs a MatchStore built with rankings_data")
+        store = match_store
+
+        # Dense player index shared with the match store; only known players get events
+        self.player_ids = store.player_ids
+        n_players = store.n_players
+        self.store = store
+
+        # Matches: one event per participant, value = 1 for the winner
+        winner_ok = store.known_winners()
+        loser_ok = store.known_losers()
+        self.matches = PlayerEventIndex(
+            np.concatenate((store.winner[winner_ok], store.loser[loser_ok])),
+            np.concatenate((store.days[winner_ok], store.days[loser_ok])),
+            n_players,
+            values={'wins': np.concatenate((np.ones(winner_ok.sum(), dtype=np.int64),
+                                            np.zeros(loser_ok.sum(), dtype=np.int64)))}
+        )
+
+        # Titles: winner of a G/A/M final, one 0/1 value per level (weighted at query time)
+        title_ok = store.is_title & winner_ok
+        title_levels = store.level[title_ok]
+        self.titles = PlayerEventIndex(
+            store.winner[title_ok],
+            store.days[title_ok],
+            n_players,
+            values={level: (title_levels == store.level_code(level)).astype(np.int64) for level in TITLE_WEIGHTS}
+        )
+
+        # Rankings: every ranking week (for activity and current rank) and top-10 weeks
+        ranking_days = to_days(rankings_data['ranking_date'])
+        ranked_idx, ranked_ok = store.index_of(rankings_data['player'])
+        # Every ranking row in source order (-1 for a missing id), for tie_order()
+        self.ranking_days = ranking_days
+        self.ranking_players = np.where(ranked_ok, ranked_idx, -1)
+        ranked_ok[ranked_ok] = store.known[ranked_idx[ranked_ok]]
+        ranks = rankings_data['rank'].to_numpy()
+        self.rankings = PlayerEventIndex(ranked_idx[ranked_ok], ranking_days[ranked_ok], n_players)
+        self.ranks = ranks[ranked_ok][self.rankings.order]
+        top10 = ranked_ok & (ranks <= 10)
+        self.top10 = PlayerEventIndex(ranked_idx[top10], ranking_days[top10], n_players)
+
+    def components(self, current_date, period_days=None, title_weights=None):
+        """Raw momentum components for every player at current_date"""
+        period_days = self.period_days if period_days is None else period_days
+        title_weights = TITLE_WEIGHTS if title_weights is None else title_weights
+        end_day = to_day(current_date)
+        start_day = end_day - period_days
+
+        matches_played = self.matches.window_count(start_day, end_day)
+        wins = self.matches.window_sum('wins', start_day, end_day)
+        titles_count = self.titles.window_count(start_day, end_day)
+        title_score = sum(self.titles.window_sum(level, start_day, end_day) * weight
+                          for level, weight in title_weights.items())
+        weeks_in_top10 = self.top10.window_count(start_day, end_day)
+        weeks_ranked = self.rankings.window_count(start_day, end_day)
+
+        latest = self.rankings.latest(end_day)
+        current_rank = np.where(latest >= 0, self.ranks[latest], np.inf).astype(np.float64)
+
+        return {
+            'active': (matches_played > 0) | (weeks_ranked > 0),
+            'matches': matches_played,
+            'wins': wins,
+            'titles_count': titles_count,
+            'title_score': title_score,
+            'weeks_in_top10': weeks_in_top10,
+            'current_rank': current_rank,
+        }
+
+    def top_momentum(self, current_date, top_n=15, period_days=None, weights=None):
+        """
+        Top-N momentum entries for current_date, in the momentum_score_data.json format
+        top_n=None returns every player with a positive score; weights as for momentum_weights()
+        """
+        if top_n is not None:
+            top_n = positive_int(top_n, 'top_n')
+        if period_days is not None:
+            period_days = positive_int(period_days, 'period_days')
+        weights = momentum_weights(weights)
+        comp = self.components(current_date, period_days, weights['titles'])
+
+        # Vectorized totals (same operation order as the scalar formula) to pick candidates
+        with np.errstate(divide='ignore', invalid='ignore'):
+            win_rate = np.where(comp['matches'] > 0, comp['wins'] / comp['matches'], 0.0)
+        win_rate_score = np.where(comp['matches'] > 0, np.maximum(
+            0, (win_rate - weights['win_rate_baseline']) * weights['win_rate_points']), 0.0)
+        top10_score = np.minimum(weights['top10_max'], comp['weeks_in_top10'] * weights['top10_week_points'])
+        rank = comp['current_rank']
+        ranking_bonus = np.select([rank <= max_rank for max_rank, _ in weights['ranking_bonus']],
+                                  [bonus for _, bonus in weights['ranking_bonus']], 0)
+        total = comp['title_score'] + win_rate_score + top10_score + ranking_bonus
+
+        candidates = np.nonzero(comp['active'] & (total > 0))[0]
+        if top_n is not None and len(candidates) > top_n:
+            cutoff = np.partition(total[candidates], len(candidates) - top_n)[len(candidates) - top_n]
+            # Margin keeps players whose rounded score may still tie with the cutoff
+            candidates = candidates[total[candidates] >= cutoff - 0.1]
+
+        momentum_scores = []
+        for i in candidates.tolist():
+            score_data = score_components(
+                title_score=comp['title_score'][i].item(),
+                matches=int(comp['matches'][i]),
+                wins=int(comp['wins'][i]),
+                weeks_in_top10=int(comp['weeks_in_top10'][i]),
+                current_rank=float(rank[i]),
+                titles_count=int(comp['titles_count'][i]),
+                weights=weights
+            )
+            if score_data['total_score'] > 0:
+                player_id = int(self.player_ids[i])
+                momentum_scores.append({
+                    'player_id': player_id,
+                    'player_name': self.player_lookup[player_id],
+                    'momentum_score': score_data['total_score'],
+                    **score_data
+                })
+
+        # Equal scores keep the notebook's order, which also decides who of them makes the top N
+        scores = [x['momentum_score'] for x in momentum_scores]
+        order = self.tie_order(current_date, period_days) if len(set(scores)) < len(scores) else {}
+        momentum_scores.sort(key=lambda x: (-x['momentum_score'], order.get(x['player_id'], 0)))
+        return momentum_scores[:top_n]
+
+    def tie_order(self, current_date, period_days=None):
+        """
+        {player_id: position} of the active players in the order the notebook iterated them: its
+        set of the window's winners, losers and ranked players, which is the order its stable sort
+        left equal scores in (and so which of them made the top N)
+        """
+        period_days = self.period_days if period_days is None else period_days
+        end_day = to_day(current_date)
+        start_day = end_day - period_days
+        store = self.store
+
+        in_window = np.nonzero((store.days >= start_day) & (store.days <= end_day))[0]
+        recent_match_players = set()
+        for players in (store.winner[in_window], store.loser[in_window]):
+            recent_match_players.update(self.player_ids[players[players >= 0]].tolist())
+        ranked = self.ranking_players[(self.ranking_days >= start_day) & (self.ranking_days <= end_day)]
+        recent_ranked_players = set(self.player_ids[ranked[ranked >= 0]].tolist())
+
+        active_players = (recent_match_players | recent_ranked_players) & set(self.player_lookup.keys())
+        return {player_id: position for position, player_id in enumerate(active_players)}
+
+
+def score_components(title_score, matches, wins, weeks_in_top10, current_rank, titles_count, weights=None):
+    """
+    Combine raw counts into the momentum score dict (types match the notebook output)
+    weights: a full momentum_weights() dict (default: the notebook's scoring)
+    """
+    weights = DEFAULT_MOMENTUM_WEIGHTS if weights is None else weights
+    if matches > 0:
+        win_rate = wins / matches
+        # Scale win rate: 50% = 0 points, 100% = 50 points
+        win_rate_score = max(0, (win_rate - weights['win_rate_baseline']) * weights['win_rate_points'])
+    else:
+        win_rate_score = 0
+
+    # Scale: 52 weeks in top 10 = 30 points
+    top10_score = min(weights['top10_max'], weeks_in_top10 * weights['top10_week_points'])
+
+    ranking_bonus = 0
+    for max_rank, bonus in weights['ranking_bonus']:
+        if current_rank <= max_rank:
+            ranking_bonus = bonus
+            break
+
+    total_score = title_score + win_rate_score + top10_score + ranking_bonus
+
+    return {
+        'total_score': round(total_score, 1),
+        'title_score': title_score,
+        'win_rate_score': round(win_rate_score, 1),
+        'top10_score': round(top10_score, 1),
+        'ranking_bonus': ranking_bonus,
+        'titles_count': titles_count,
+        'win_rate': round(win_rate, 3) if matches > 0 else 0,
+        'weeks_in_top10': weeks_in_top10
+    }
+
+
+def _momentum_chunk(state, dates, period_days, top_n, weights):
+    """Worker task: top momentum entries for a chunk of dates"""
+    store = worker_match_store(state)
+    engine = cached(state, ('momentum', period_days), lambda: MomentumEngine(
+        None, None, state['frames']['rankings_data'], period_days=period_days,
+        player_lookup=state['player_lookup'], match_store=store))
+    return [engine.top_momentum(current_date, top_n=top_n, weights=weights) for current_date in dates]
+
+
+def momentum_timepoint(current_date, top_momentum, ranking_index, player_lookup):
+    """One momentum_score_data.json timepoint"""
+    return {
+        'date': current_date.strftime('%Y-%m-%d'),
+        'year_month': current_date.strftime('%Y-%m'),
+        'rank': ranking_index.entries(current_date, player_lookup, top_n=20),
+        'top': top_momentum,
+        'total_momentum': sum(p['momentum_score'] for p in top_momentum)
+    }
+
+
+def iter_momentum_score_data(matches_data, players_data, rankings_data, period_days=365, top_n=15,
+                             player_lookup=None, ranking_index=None, match_store=None, workers=1, start_date=None,
+                             weights=None):
+    """
+    Monthly timepoints with sophisticated momentum scoring, yielded one at a time
+    Combines: G/A/M titles (weighted), win rate, weeks in top 10, ranking points
+    (weights overrides DEFAULT_MOMENTUM_WEIGHTS, see momentum_weights)
+    workers > 1 splits the months across a process pool; start_date skips the months before it
+    """
+    print("🏆 Creating momentum score data with multiple factors...")
+    start_time = time.time()
+
+    with phase('index'):
+        if player_lookup is None:
+            player_lookup = build_player_lookup(players_data)
+        if ranking_index is None:
+            ranking_index = RankingIndex(rankings_data)
+        monthly_dates = dates_from(ranking_index.month_end_dates(), start_date)
+
+        if workers > 1:
+            top_by_date = iter_parallel(_momentum_chunk, monthly_dates, matches_data, rankings_data, player_lookup,
+                                        {'period_days': period_days, 'top_n': top_n, 'weights': weights}, workers)
+        else:
+            engine = MomentumEngine(matches_data, players_data, rankings_data,
+                                    period_days=period_days, player_lookup=player_lookup, match_store=match_store)
+            print(f"✅ Indexed {len(engine.player_ids):,} players and {len(monthly_dates):,} monthly timepoints "
+                  f"in {time.time() - start_time:.1f} seconds")
+            top_by_date = (engine.top_momentum(current_date, top_n=top_n, weights=weights)
+                           for current_date in monthly_dates)
+
+    with phase('timepoints', timepoints=len(monthly_dates)):
+        for current_date, top_momentum in zip(monthly_dates, top_by_date):
+            yield momentum_timepoint(current_date, top_momentum, ranking_index, player_lookup)
+
+    print(f"✅ Processed all monthly timepoints in {time.time() - start_time:.1f} seconds")
+
+
+def create_momentum_score_data(matches_data, players_data, rankings_data, period_days=365, top_n=15,
+                               player_lookup=None, ranking_index=None, match_store=None, workers=1, start_date=None,
+                               weights=None):
+    """
+    Create monthly aggregated dataset with sophisticated momentum scoring
+    The timepoints of iter_momentum_score_data as a list
+    """
+    return list(iter_momentum_score_data(matches_data, players_data, rankings_data, period_days=period_days,
+                                         top_n=top_n, player_lookup=player_lookup, ranking_index=ranking_index,
+                                         match_store=match_store, workers=workers, start_date=start_date,
+                                         weights=weights))
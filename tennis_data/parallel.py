@@ -0,0 +1,151 @@
+"""
+Process-pool execution for the per-timepoint builders
+The input columns are copied once into shared memory and mapped back as NumPy arrays by
+every worker, instead of pickling DataFrames into each process. Timepoints are split into
+contiguous chunks and the chunk results are merged back in date order.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Columns the engines read; only these are copied into shared memory
+MATCH_COLUMNS = ['tourney_date', 'tourney_level', 'round', 'winner_id', 'loser_id']
+RANKING_COLUMNS = ['ranking_date', 'rank', 'player']
+
+# Chunks per worker: more chunks balance the load, each chunk re-derives its starting state
+CHUNKS_PER_WORKER = 2
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+class SharedFrames:
+    """
+    DataFrames copied column by column into shared memory blocks
+    String/categorical columns are stored as integer codes plus their categories.
+    spec is a small picklable description that attach() turns back into DataFrames.
+    """
+
+    def __init__(self, frames):
+        self.blocks = []
+        self.spec = {}
+        for name, frame in frames.items():
+            columns = {}
+            for column in frame.columns:
+                values = frame[column]
+                categories = None
+                if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype == object:
+                    categorical = pd.Categorical(values)
+                    array = categorical.codes
+                    categories = categorical.categories.tolist()
+                else:
+                    array = values.to_numpy()
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+                self.blocks.append(block)
+                columns[column] = (block.name, array.shape, array.dtype.str, categories)
+            self.spec[name] = columns
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(spec):
+    """DataFrames backed by the shared blocks described by spec, and the open blocks"""
+    frames = {}
+    blocks = []
+    for name, columns in spec.items():
+        data = {}
+        for column, (block_name, shape, dtype, categories) in columns.items():
+            # Pool workers share the parent's resource tracker, which forgets the block when
+            # the parent unlinks it, so attaching here needs no extra bookkeeping
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            if categories is not None:
+                array = pd.Categorical.from_codes(array, categories=categories)
+            data[column] = array
+        frames[name] = pd.DataFrame(data, copy=False)
+    return frames, blocks
+
+
+# Per-process state set up by the pool initializer
+_worker = {}
+
+
+def _init_worker(spec, context):
+    frames, blocks = attach(spec)
+    _worker.update(frames=frames, blocks=blocks, cache={}, **context)
+
+
+def _run_chunk(task, index, dates, params):
+    return index, task(_worker, dates, **params)
+
+
+def cached(state, key, build):
+    """Object built once per worker process (engines, match store) and reused across chunks"""
+    if key not in state['cache']:
+        state['cache'][key] = build()
+    return state['cache'][key]
+
+
+def worker_match_store(state):
+    """MatchStore over the shared matches (with ranked players), built once per worker"""
+    from .match_store import MatchStore
+
+    return cached(state, 'match_store', lambda: MatchStore(
+        state['frames']['matches_data'], state['player_lookup'], state['frames']['rankings_data']))
+
+
+def split_chunks(items, n_chunks):
+    """Split items into at most n_chunks contiguous, non-empty chunks"""
+    n_chunks = max(1, min(n_chunks, len(items)))
+    bounds = np.linspace(0, len(items), n_chunks + 1).astype(int)
+    return [items[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def iter_parallel(task, dates, matches_data, rankings_data, player_lookup, params, workers):
+    """
+    Run task(state, chunk_dates, **params) over contiguous chunks of dates in a process pool
+    and yield the per-date results in date order, each chunk as soon as it and every earlier
+    chunk are done
+    """
+    chunks = split_chunks(list(dates), workers * CHUNKS_PER_WORKER)
+    frames = {
+        'matches_data': matches_data[MATCH_COLUMNS],
+        'rankings_data': rankings_data[RANKING_COLUMNS],
+    }
+    print(f"⚙️  Running {len(dates):,} timepoints in {len(chunks)} chunks on {workers} workers")
+    start_time = time.time()
+
+    finished = {}
+    next_chunk = 0
+    with SharedFrames(frames) as shared:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared.spec, {'player_lookup': player_lookup})) as pool:
+            futures = [pool.submit(_run_chunk, task, i, chunk, params) for i, chunk in enumerate(chunks)]
+            for done, future in enumerate(as_completed(futures), 1):
+                index, value = future.result()
+                finished[index] = value
+                elapsed = time.time() - start_time
+                print(f"  Progress: {done}/{len(chunks)} chunks - {elapsed:.1f}s elapsed")
+                # Chunks finishing out of order wait here until the ones before them are out
+                while next_chunk in finished:
+                    yield from finished.pop(next_chunk)
+                    next_chunk += 1
+
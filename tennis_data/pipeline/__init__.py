@@ -0,0 +1,10 @@
+"""
+Cached build pipeline for the scrollytelling data files
+Run with: python -m tennis_data.pipeline --help
+"""
+
+from .cache import StageCache
+from .core import Pipeline, Source, Stage
+from .stages import default_stages
+
+__all__ = ['Pipeline', 'Source', 'Stage', 'StageCache', 'default_stages']
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Command-line entry point for the data pipeline
+
+Examples:
+  python -m tennis_data.pipeline                          # refresh every data file
+  python -m tennis_data.pipeline momentum_score           # one output and what it needs
+  python -m tennis_data.pipeline --set momentum_score.period_days=180
+  python -m tennis_data.pipeline --workers 0                # use every CPU core
+  python -m tennis_data.pipeline --compact                  # also write .compact.json (+ .gz/.br)
+  python -m tennis_data.pipeline --chunk-years 10           # also write per-decade chunks + manifest
+  python -m tennis_data.pipeline --force --profile momentum_score  # run report with a cProfile of one stage
+  python -m tennis_data.pipeline --incremental              # after new weeks: recompute only the new months
+"""
+
+import argparse
+import json
+
+from ..parallel import default_workers
+from .core import REPORT_FILE_NAME, Pipeline
+from .stages import default_stages
+
+
+def parse_param(text):
+    """Parse stage.param=value (value as JSON, falling back to a plain string)"""
+    target, _, raw_value = text.partition('=')
+    stage_name, _, param = target.partition('.')
+    if not stage_name or not param or not raw_value:
+        raise argparse.ArgumentTypeError(f"Expected stage.param=value, got: {text}")
+    try:
+        value = json.loads(raw_value)
+    except json.JSONDecodeError:
+        value = raw_value
+    return stage_name, param, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the tennis scrollytelling data files")
+    parser.add_argument('stages', nargs='*', help="Stages to build (default: all)")
+    parser.add_argument('--data-dir', help="Directory with the ATP CSV files (default: download with kagglehub)")
+    parser.add_argument('--output-dir', default='.', help="Repository root the output paths are relative to")
+    parser.add_argument('--cache-dir', default='.pipeline_cache', help="Where stage results are cached")
+    parser.add_argument('--set', dest='params', action='append', type=parse_param, default=[],
+                        metavar='STAGE.PARAM=VALUE', help="Override a stage parameter")
+    parser.add_argument('--force', action='store_true', help="Rebuild every selected stage")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Recompute the timelines only from the first month whose data changed")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processes for the per-timepoint stages (0 = one per CPU core)")
+    parser.add_argument('--compact', action='store_true',
+                        help="Also write the timelines in the compact encoding, with precompressed copies")
+    parser.add_argument('--chunk-years', type=int, default=None, metavar='YEARS',
+                        help="Also split the main timeline into chunks of this many years, with a manifest")
+    parser.add_argument('--report', default=REPORT_FILE_NAME, metavar='PATH',
+                        help="Run report with per-stage timings, rates and peak memory (relative to --output-dir)")
+    parser.add_argument('--no-report', dest='report', action='store_const', const=None,
+                        help="Do not write the run report")
+    parser.add_argument('--profile', metavar='STAGE', help="Run this stage under cProfile (summary in the report)")
+    parser.add_argument('--list', action='store_true', help="List stages and exit")
+    args = parser.parse_args(argv)
+
+    stages = default_stages()
+    if args.list:
+        for stage in stages:
+            inputs = ', '.join(stage.inputs) or '-'
+            print(f"{stage.name:<28} <- {inputs}")
+        return 0
+
+    data_dir = args.data_dir
+    if data_dir is None:
+        import kagglehub
+        data_dir = kagglehub.dataset_download("sijovm/atpdata")
+
+    workers = args.workers or default_workers()
+    pipeline = Pipeline(stages, data_dir, output_dir=args.output_dir, cache_dir=args.cache_dir, workers=workers,
+                        compact=args.compact, chunk_years=args.chunk_years, report_path=args.report,
+                        profile_stage=args.profile, incremental=args.incremental)
+    for stage_name, param, value in args.params:
+        pipeline.set_param(stage_name, param, value)
+
+    report = pipeline.run(args.stages or None, force=args.force)
+    built = sum(1 for status in report.values() if status in ('built', 'incremental'))
+    print(f"\n🎉 Done: {built} stage(s) rebuilt, {len(report) - built} up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
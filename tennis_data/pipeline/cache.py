@@ -0,0 +1,135 @@
+"""
+Content-addressed cache for pipeline stage results
+Each stage result is stored once under a key derived from its code, parameters and
+the content hashes of its inputs
+"""
+
+import hashlib
+import json
+import pickle
+import shutil
+from pathlib import Path
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_value(value):
+    """SHA-256 of a JSON-like value (dict keys sorted so the hash is stable)"""
+    return hash_bytes(json.dumps(value, sort_keys=True, default=str).encode('utf-8'))
+
+
+def hash_result(value):
+    """Content hash of a stage result; objects that are not JSON-like are hashed by their pickle"""
+    if value is None or isinstance(value, (dict, list, tuple, str, int, float)):
+        return hash_value(value)
+    return hash_bytes(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class StageCache:
+    """
+    On-disk store of stage results
+    manifest.json keeps, per stage, the key of the last run, the content hash of its result
+    and the hashes of the files it wrote; results themselves are pickled next to it, except
+    those of streamed stages, kept as copies of the JSON files they wrote (see store_files)
+    """
+
+    def __init__(self, cache_dir='.pipeline_cache'):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.cache_dir / 'manifest.json'
+        if self.manifest_path.exists():
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {}
+
+    @staticmethod
+    def _files(entry):
+        return entry['files'] if 'files' in entry else [entry['file']]
+
+    def _exists(self, entry):
+        return all((self.cache_dir / filename).exists() for filename in self._files(entry))
+
+    def lookup(self, stage_name, key):
+        """Manifest entry for stage_name if it was last built with this key"""
+        entry = self.manifest.get(stage_name)
+        if entry and entry['key'] == key and self._exists(entry):
+            return entry
+        return None
+
+    def load(self, entry):
+        """A stage result; that of a streamed stage is its list of timepoints (a tuple of them with several outputs)"""
+        if 'files' in entry:
+            parts = self.load_parts(entry)
+            return parts[0] if len(parts) == 1 else tuple(parts)
+        with open(self.cache_dir / entry['file'], 'rb') as f:
+            return pickle.load(f)
+
+    def load_parts(self, entry):
+        """The timepoints of every output of a streamed stage, in output order"""
+        parts = []
+        for filename in entry['files']:
+            with open(self.cache_dir / filename, 'r', encoding='utf-8') as f:
+                parts.append(json.load(f))
+        return parts
+
+    def checkpoint(self, stage_name, key):
+        """Manifest entry for stage_name if its result has a checkpoint with this key (see incremental.py)"""
+        entry = self.manifest.get(stage_name)
+        checkpoint = entry.get('checkpoint') if entry else None
+        if checkpoint and checkpoint['key'] == key and self._exists(entry):
+            return entry
+        return None
+
+    def store(self, stage_name, key, value, content_hash, outputs=None, checkpoint=None):
+        """Save a stage result, replacing the previous one for the same stage"""
+        filename = f"{stage_name}-{key[:16]}.pkl"
+        with open(self.cache_dir / filename, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return self._save_entry(stage_name, {'key': key, 'content_hash': content_hash, 'file': filename},
+                                outputs, checkpoint)
+
+    def store_files(self, stage_name, key, paths, content_hash, outputs=None, checkpoint=None):
+        """
+        Save the result of a streamed stage as copies of the JSON files it wrote (one per output),
+        so it is never held in memory as a whole to be pickled
+        """
+        filenames = []
+        for i, path in enumerate(paths):
+            filename = f"{stage_name}-{key[:16]}.{i}.json"
+            shutil.copyfile(path, self.cache_dir / filename)
+            filenames.append(filename)
+        return self._save_entry(stage_name, {'key': key, 'content_hash': content_hash, 'files': filenames},
+                                outputs, checkpoint)
+
+    def _save_entry(self, stage_name, entry, outputs, checkpoint):
+        previous = self.manifest.get(stage_name)
+        if previous:
+            for filename in set(self._files(previous)) - set(self._files(entry)):
+                (self.cache_dir / filename).unlink(missing_ok=True)
+
+        entry['outputs'] = outputs or {}
+        if checkpoint is not None:
+            entry['checkpoint'] = checkpoint
+        self.manifest[stage_name] = entry
+        self.save()
+        return entry
+
+    def record_outputs(self, stage_name, outputs):
+        self.manifest[stage_name]['outputs'] = outputs
+        self.save()
+
+    def save(self):
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
@@ -0,0 +1,407 @@
+"""
+Stage-based build pipeline
+Stages declare their inputs and parameters; a stage is rerun only when its code,
+parameters or the content of one of its inputs changed since the cached run
+"""
+
+import inspect
+import json
+import sys
+import time
+from contextlib import ExitStack, nullcontext
+from pathlib import Path
+
+from ..export import TimelineWriter, compact_path, manifest_path
+from ..instrument import RunReport, interleaved, phase
+from .cache import StageCache, hash_file, hash_result, hash_value
+from .incremental import (DATED_TABLES, FULL_REBUILD, PLAYERS_TABLE, data_fingerprint, first_changed_date,
+                          merge_timepoints, timepoints_before)
+
+REPORT_FILE_NAME = 'pipeline_report.json'
+
+
+class Source:
+    """
+    Raw input file (one of the ATP CSVs); its content hash keys every stage that reads it
+    fingerprint(path) may supply that hash without rereading the file (default: SHA-256 of the file)
+    """
+
+    def __init__(self, name, filename, loader, fingerprint=None):
+        self.name = name
+        self.filename = filename
+        self.loader = loader
+        self.fingerprint = fingerprint or hash_file
+        self.inputs = []
+
+
+class Stage:
+    """
+    One build step
+    - inputs: names of sources or other stages, passed to run() as keyword arguments
+    - params: extra keyword arguments; changing one invalidates the stage
+    - outputs: (path, key) pairs written as JSON arrays; key picks a part of the result (None = whole result)
+    - stream: run() is an iter_* builder; its timepoints (or, with keys, tuples holding one timepoint
+      per output, None for none) are written as they are yielded and never held as a whole
+    - parallel: run() accepts workers=N; the worker count does not change the result or the key
+    - compact: the outputs (True) or those listed are timelines the front end can also read in the
+      compact encoding
+    - chunked: the outputs are timelines the front end can also load era by era from chunk files
+    - index: built from the raw tables alone (lookups, indexes); incremental stages treat it like the tables
+    - incremental: the result is a timeline (or tuple of timelines) of dated timepoints and run()
+      accepts start_date=, computing only the timepoints from that date on
+    """
+
+    def __init__(self, name, inputs, run, params=None, outputs=None, version=1, stream=False, parallel=False,
+                 compact=False, chunked=False, index=False, incremental=False):
+        self.name = name
+        self.inputs = list(inputs)
+        self.run = run
+        self.params = dict(params or {})
+        self.outputs = list(outputs or [])
+        if stream and not self.outputs:
+            raise ValueError(f"Streamed stage {name} has no outputs to stream to")
+        self.version = version
+        self.stream = stream
+        self.parallel = parallel
+        self.compact = compact
+        self.chunked = chunked
+        self.index = index
+        self.incremental = incremental
+
+    def code_hash(self):
+        """
+        Hash of the module defining run() and of the tennis_data modules it imports,
+        so editing a builder or one of its engines invalidates the stage
+        """
+        module = sys.modules.get(self.run.__module__)
+        if module is None:
+            return hash_value(self.run.__qualname__)
+
+        modules = {module.__name__: module}
+        for value in vars(module).values():
+            name = getattr(value, '__module__', None) or getattr(value, '__name__', '')
+            if isinstance(name, str) and name.startswith('tennis_data') and name in sys.modules:
+                modules[name] = sys.modules[name]
+
+        sources = {}
+        for name, dependency in sorted(modules.items()):
+            try:
+                sources[name] = inspect.getsource(dependency)
+            except (OSError, TypeError):
+                sources[name] = name
+        return hash_value(sources)
+
+
+class Pipeline:
+    def __init__(self, stages, data_dir, output_dir='.', cache_dir='.pipeline_cache', workers=1,
+                 compact=False, chunk_years=None, report_path=REPORT_FILE_NAME, profile_stage=None,
+                 incremental=False):
+        self.stages = {stage.name: stage for stage in stages}
+        self.data_dir = Path(data_dir)
+        self.output_dir = Path(output_dir)
+        self.cache = StageCache(cache_dir)
+        self.workers = workers
+        self.compact = compact
+        self.chunk_years = chunk_years
+        self.values = {}
+        self.hashes = {}
+        # Run report (relative to output_dir; None = no report) and the stage to run under cProfile
+        self.report_path = report_path
+        self.profile_stage = profile_stage
+        self.report = None
+        # Recompute only the timepoints of incremental stages from the first month whose data changed
+        self.incremental = incremental
+        self.fingerprint = None
+
+    def set_param(self, stage_name, param, value):
+        self.stages[stage_name].params[param] = value
+
+    def plan(self, targets=None):
+        """Stages needed for the targets (all stages by default), dependencies first"""
+        targets = list(targets) if targets else list(self.stages)
+        order = []
+        visiting = set()
+
+        def visit(name):
+            if name in order:
+                return
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage: {name}")
+            if name in visiting:
+                raise ValueError(f"Stage dependency cycle at {name}")
+            visiting.add(name)
+            for dependency in self.stages[name].inputs:
+                visit(dependency)
+            visiting.discard(name)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    def value(self, name):
+        """Result of a source or stage, loaded from disk/cache on first use"""
+        if name not in self.values:
+            stage = self.stages[name]
+            if isinstance(stage, Source):
+                print(f"📂 Loading {stage.filename}...")
+                with self._record(name, 'sources') as metrics:
+                    self.values[name] = stage.loader(self.data_dir / stage.filename)
+                    if metrics is not None:
+                        metrics.status = 'loaded'
+                        metrics.count('rows', len(self.values[name]))
+            else:
+                self.values[name] = self.cache.load(self.cache.manifest[name])
+        return self.values[name]
+
+    def _stage_key(self, stage):
+        return hash_value({
+            'stage': stage.name,
+            'version': stage.version,
+            'code': stage.code_hash(),
+            'params': stage.params,
+            'inputs': {name: self.hashes[name] for name in stage.inputs},
+        })
+
+    def _incremental_key(self, stage):
+        """Stage key without the tables and the indexes built from them: what a checkpoint has to match"""
+        return hash_value({
+            'stage': stage.name,
+            'version': stage.version,
+            'code': stage.code_hash(),
+            'params': stage.params,
+            'inputs': {name: self.hashes[name] for name in stage.inputs
+                       if not (isinstance(self.stages[name], Source) or self.stages[name].index)},
+        })
+
+    def _tables(self):
+        return {name: self.value(name) for name in [*DATED_TABLES, PLAYERS_TABLE]}
+
+    def _data_fingerprint(self):
+        """Monthly hashes of the tables (incremental.data_fingerprint), computed once per run"""
+        if self.fingerprint is None:
+            self.fingerprint = data_fingerprint(self._tables())
+        return self.fingerprint
+
+    def _output_path(self, path):
+        return self.output_dir / path
+
+    def _writes_compact(self, stage, path=None):
+        if not self.compact or not stage.compact:
+            return False
+        if stage.compact is True or path is None:
+            return True
+        return path in stage.compact
+
+    def _writes_chunks(self, stage):
+        return bool(self.chunk_years) and stage.chunked
+
+    def _outputs_current(self, stage, entry):
+        recorded = entry.get('outputs', {})
+        expected = [path for path, _ in stage.outputs]
+        expected += [compact_path(path) for path, _ in stage.outputs if self._writes_compact(stage, path)]
+        if self._writes_chunks(stage):
+            expected += [manifest_path(path) for path, _ in stage.outputs]
+        if any(str(path) not in recorded for path in expected):
+            return False
+        if self._writes_chunks(stage):
+            for path, _ in stage.outputs:
+                with open(self._output_path(manifest_path(path))) as f:
+                    if json.load(f).get('years_per_chunk') != self.chunk_years:
+                        return False
+        for path, content_hash in recorded.items():
+            output_path = self._output_path(path)
+            if not output_path.exists() or content_hash != hash_file(output_path):
+                return False
+        return True
+
+    def _writers(self, stage, stack):
+        """A TimelineWriter per output of stage, closed (or, on an error, discarded) with stack"""
+        writers = []
+        for path, _ in stage.outputs:
+            output_path = self._output_path(path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            chunk_years = self.chunk_years if self._writes_chunks(stage) else None
+            writers.append(stack.enter_context(
+                TimelineWriter(output_path, compact=self._writes_compact(stage, path), chunk_years=chunk_years)))
+        return writers
+
+    def _written(self, writers):
+        """{path relative to output_dir: content hash} of every file the writers wrote"""
+        return {str(file.relative_to(self.output_dir)): hash_file(file)
+                for writer in writers for file in writer.close()}
+
+    def _write_outputs(self, stage, value):
+        with phase('write'), ExitStack() as stack:
+            writers = self._writers(stage, stack)
+            for writer, (_, key) in zip(writers, stage.outputs):
+                writer.write_all(value if key is None else value[key])
+            return self._written(writers)
+
+    def _cached_parts(self, stage, entry):
+        """The cached timepoints of every output of a streamed stage (also from a result pickled before it streamed)"""
+        if 'files' in entry:
+            return self.cache.load_parts(entry)
+        value = self.cache.load(entry)
+        return [value if key is None else value[key] for _, key in stage.outputs]
+
+    def _stream_outputs(self, stage, timepoints, previous=None):
+        """
+        Write the outputs of a streamed stage while run() yields them: single timepoints or,
+        with output keys, tuples holding one timepoint per output (None for none).
+        previous (a list of timepoints per output, e.g. those an incremental run keeps) goes first.
+        Returns the written files like _write_outputs
+        """
+        with ExitStack() as stack:
+            writers = self._writers(stage, stack)
+            keys = [key for _, key in stage.outputs]
+            # The writing is its own 'write' phase, not part of the builder's phases it runs between
+            with interleaved('write'):
+                for writer, part in zip(writers, previous or []):
+                    writer.write_all(part)
+            for item in timepoints:
+                with interleaved('write'):
+                    for writer, key in zip(writers, keys):
+                        timepoint = item if key is None else item[key]
+                        if timepoint is not None:
+                            writer.write(timepoint)
+            with interleaved('write'):
+                return self._written(writers)
+
+    def _record(self, name, kind='stages'):
+        """Record name in the run report while the block runs (yields None when there is no report)"""
+        if self.report is None:
+            return nullcontext()
+        return self.report.record(name, kind)
+
+    def run(self, targets=None, force=False):
+        """
+        Build the targets, rerunning only stages whose key changed; returns {stage: status}
+        Timings, rates and peak memory of the run go to the report at report_path
+        """
+        if self.report_path is None:
+            return self._run(targets, force)
+        self.report = RunReport(self._output_path(self.report_path), profile_stage=self.profile_stage)
+        try:
+            with self.report:
+                report = self._run(targets, force)
+            print(f"📊 Run report: {self.report.path}")
+            return report
+        finally:
+            self.report = None
+
+    def _run(self, targets, force):
+        report = {}
+        for name in self.plan(targets):
+            stage = self.stages[name]
+
+            if isinstance(stage, Source):
+                self.hashes[name] = stage.fingerprint(self.data_dir / stage.filename)
+                continue
+
+            with self._record(name) as metrics:
+                report[name] = self._run_stage(stage, force)
+                if metrics is not None:
+                    metrics.status = report[name]
+
+        return report
+
+    def _run_stage(self, stage, force):
+        name = stage.name
+        key = self._stage_key(stage)
+        entry = None if force else self.cache.lookup(name, key)
+        if entry is not None:
+            self.hashes[name] = entry['content_hash']
+            if self._outputs_current(stage, entry):
+                status = 'cached'
+            elif stage.stream:
+                with phase('cache_load'):
+                    parts = self._cached_parts(stage, entry)
+                outputs = self._stream_outputs(stage, (), parts)
+                self.cache.record_outputs(name, outputs)
+                status = 'restored'
+            else:
+                self.cache.record_outputs(name, self._write_outputs(stage, self.value(name)))
+                status = 'restored'
+            print(f"⏭️  {name}: {status}")
+            return status
+
+        print(f"🔄 {name}: running...")
+        start_time = time.time()
+        with phase('inputs'):
+            arguments = {dependency: self.value(dependency) for dependency in stage.inputs}
+        if stage.parallel and self.workers > 1:
+            arguments['workers'] = self.workers
+        # Rows of the raw tables the stage reads, for its rows/sec
+        rows = sum(len(self.values[dependency]) for dependency in stage.inputs
+                   if isinstance(self.stages[dependency], Source))
+
+        checkpoint = None
+        previous = None
+        start_date = None
+        if stage.incremental:
+            with phase('checkpoint'):
+                checkpoint = {'key': self._incremental_key(stage), 'data': self._data_fingerprint()}
+                entry = None if force or not self.incremental else self.cache.checkpoint(name, checkpoint['key'])
+                if entry is not None:
+                    start_date = first_changed_date(entry['checkpoint']['data'], checkpoint['data'],
+                                                    self._tables())
+                    if start_date != FULL_REBUILD:
+                        previous = self._cached_parts(stage, entry) if stage.stream else self.cache.load(entry)
+
+        if stage.stream:
+            return self._run_streamed(stage, key, arguments, rows, checkpoint, previous, start_date, start_time)
+
+        if previous is not None and start_date is None:
+            print(f"⏩ {name}: no timepoint affected by the data change")
+            value = previous
+        elif previous is not None:
+            print(f"⏩ {name}: recomputing timepoints from {start_date:%Y-%m-%d}")
+            with phase('run', rows=rows or None):
+                value = stage.run(**arguments, **stage.params, start_date=start_date)
+            with phase('merge'):
+                value = merge_timepoints(previous, value, start_date)
+        else:
+            with phase('run', rows=rows or None):
+                value = stage.run(**arguments, **stage.params)
+        with phase('hash'):
+            content_hash = hash_result(value)
+
+        self.values[name] = value
+        self.hashes[name] = content_hash
+        outputs = self._write_outputs(stage, value)
+        with phase('cache_store'):
+            self.cache.store(name, key, value, content_hash, outputs, checkpoint)
+        status = 'incremental' if previous is not None else 'built'
+        print(f"✅ {name}: {status} in {time.time() - start_time:.1f} seconds")
+        return status
+
+    def _run_streamed(self, stage, key, arguments, rows, checkpoint, previous, start_date, start_time):
+        """
+        Run a streamed stage straight into its output files, which (copied to the cache) are its result;
+        the writing between its timepoints is timed as 'write', apart from 'run' and the builder's phases.
+        previous: the cached timepoints per output, if incremental
+        """
+        name = stage.name
+        if previous is not None and start_date is None:
+            print(f"⏩ {name}: no timepoint affected by the data change")
+            timepoints = ()
+        elif previous is not None:
+            print(f"⏩ {name}: recomputing timepoints from {start_date:%Y-%m-%d}")
+            previous = [timepoints_before(part, start_date) for part in previous]
+            timepoints = stage.run(**arguments, **stage.params, start_date=start_date)
+        else:
+            timepoints = stage.run(**arguments, **stage.params)
+        with phase('run', rows=rows or None):
+            outputs = self._stream_outputs(stage, timepoints, previous)
+        # The result is what the JSON outputs hold, whichever other encodings were written with them
+        content_hash = hash_value([outputs[str(path)] for path, _ in stage.outputs])
+
+        self.values.pop(name, None)
+        self.hashes[name] = content_hash
+        with phase('cache_store'):
+            self.cache.store_files(name, key, [self._output_path(path) for path, _ in stage.outputs], content_hash,
+                                   outputs, checkpoint)
+        status = 'incremental' if previous is not None else 'built'
+        print(f"✅ {name}: {status} in {time.time() - start_time:.1f} seconds")
+        return status
@@ -0,0 +1,100 @@
+"""
+Incremental rebuilds of the timeline stages
+Every timepoint of a timeline (weekly rankings, monthly momentum, cumulative charts) is
+computed from the data up to its date, so new or corrected data only invalidates the
+timepoints from its month on. The checkpoint kept with a timeline's cached result records
+the data it was built from: a hash per month of the matches and rankings, and the row
+count and hash of the players table. On the next run the first month whose hash differs
+(or that is new) is where recomputing starts; the rolling windows are refilled from the
+data before that month, as the parallel chunks already do, so the result equals a full
+rebuild.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ..common import to_datetime
+from .cache import hash_bytes
+
+# Tables with one date per row, and the column holding it
+DATED_TABLES = {'matches_data': 'tourney_date', 'rankings_data': 'ranking_date'}
+PLAYERS_TABLE = 'players_data'
+# Columns holding player ids, checked against players appended to the players table
+PLAYER_ID_COLUMNS = {'matches_data': ['winner_id', 'loser_id'], 'rankings_data': ['player']}
+
+# first_changed_date when the whole timeline has to be rebuilt
+FULL_REBUILD = pd.Timestamp.min
+
+
+def row_hashes(frame):
+    """One uint64 per row, from the row's values (categoricals hash by value, not code)"""
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def monthly_hashes(frame, date_column):
+    """{'YYYY-MM': hash of that month's rows in table order}"""
+    hashes = row_hashes(frame)
+    months = np.asarray(to_datetime(frame[date_column])).astype('datetime64[M]')
+    order = np.argsort(months, kind='stable')
+    months, hashes = months[order], hashes[order]
+    unique_months, starts = np.unique(months, return_index=True)
+    ends = np.append(starts[1:], len(months))
+    return {str(month): hash_bytes(hashes[start:end].tobytes())[:16]
+            for month, start, end in zip(unique_months, starts, ends)}
+
+
+def data_fingerprint(values):
+    """Checkpoint of the tables a timeline was built from (values: {table name: frame})"""
+    players = row_hashes(values[PLAYERS_TABLE])
+    fingerprint = {name: monthly_hashes(values[name], column) for name, column in DATED_TABLES.items()}
+    fingerprint[PLAYERS_TABLE] = {'rows': len(players), 'hash': hash_bytes(players.tobytes())}
+    return fingerprint
+
+
+def first_changed_date(previous, current, values):
+    """
+    First day of the earliest month whose data differs between the previous and current fingerprints
+    - None: nothing the timelines read has changed
+    - FULL_REBUILD: the players table was edited (not just appended to)
+    Players appended to the players table count as a change from their first match or ranking
+    """
+    changed = []
+    for name in DATED_TABLES:
+        old, new = previous.get(name, {}), current[name]
+        changed += [month for month in set(old) | set(new) if old.get(month) != new.get(month)]
+    start = pd.Timestamp(min(changed)) if changed else None
+
+    old_players = previous.get(PLAYERS_TABLE, {})
+    players = values[PLAYERS_TABLE]
+    n_old = old_players.get('rows', -1)
+    if not 0 <= n_old <= len(players) or \
+            hash_bytes(row_hashes(players.iloc[:n_old]).tobytes()) != old_players.get('hash'):
+        return FULL_REBUILD
+    if n_old < len(players):
+        new_ids = players['player_id'].to_numpy()[n_old:]
+        for name, columns in PLAYER_ID_COLUMNS.items():
+            frame = values[name]
+            seen = np.zeros(len(frame), dtype=bool)
+            for column in columns:
+                seen |= np.isin(frame[column].to_numpy(), new_ids)
+            if seen.any():
+                first_seen = pd.Timestamp(to_datetime(frame[DATED_TABLES[name]])[seen].min())
+                first_seen = first_seen.to_period('M').to_timestamp()
+                start = first_seen if start is None else min(start, first_seen)
+    return start
+
+
+def timepoints_before(timepoints, start_date):
+    """The timepoints dated before start_date"""
+    cutoff = pd.Timestamp(start_date).strftime('%Y-%m-%d')
+    return [timepoint for timepoint in timepoints if timepoint['date'] < cutoff]
+
+
+def merge_timepoints(previous, new, start_date):
+    """
+    previous timepoints dated before start_date followed by new (the timepoints from start_date on)
+    Tuples of timelines (e.g. the cumulative charts) are merged element by element
+    """
+    if isinstance(previous, tuple):
+        return tuple(merge_timepoints(old, fresh, start_date) for old, fresh in zip(previous, new))
+    return timepoints_before(previous, start_date) + list(new)
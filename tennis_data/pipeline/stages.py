@@ -0,0 +1,88 @@
+"""
+Stage definitions for the scrollytelling data files
+Inputs are named after the builder arguments, so most stages run a builder directly;
+the timelines run their iter_* builders, streamed into the output files
+"""
+
+from pathlib import Path
+
+from ..common import build_player_lookup
+from ..cumulative import count_player_matches_and_titles, iter_cumulative_charts_data
+from ..ingest import (MATCHES_DATA_FILE_NAME, PLAYERS_DATA_FILE_NAME, RANKINGS_DATA_FILE_NAME,
+                      ColumnarCache)
+from ..match_store import MatchStore
+from ..momentum import iter_momentum_score_data
+from ..player_statistics import iter_player_statistics
+from ..ranking_index import RankingIndex
+from ..rankings import iter_weekly_rankings_data
+from ..title_momentum import iter_monthly_title_momentum_data
+from .core import Source, Stage
+
+WEB_DATA_DIR = Path('tennis-scrollytelling/data')
+
+# Only the columns the builders read are mapped from the columnar cache
+MATCHES_COLUMNS = ['tourney_date', 'tourney_level', 'round', 'winner_id', 'loser_id']
+PLAYERS_COLUMNS = ['player_id', 'name_first', 'name_last']
+RANKINGS_COLUMNS = ['ranking_date', 'rank', 'player', 'points']
+
+
+def table_source(name, table, filename, columns, caches):
+    """
+    Source read through the columnar cache next to the CSVs; caches holds one ColumnarCache per
+    data directory, so each CSV's content is checked once by the fingerprint and the load
+    """
+    def cache(path):
+        if path.parent not in caches:
+            caches[path.parent] = ColumnarCache(path.parent)
+        return caches[path.parent]
+
+    def load(path):
+        return cache(path).load(table, columns)
+
+    def fingerprint(path):
+        return cache(path).source_hash(table)
+
+    return Source(name, filename, load, fingerprint=fingerprint)
+
+
+def tracked_players(top_25):
+    """Players followed by the accumulated stats timeline (top 25 by titles)"""
+    _, top_25_titles = top_25
+    return [p['player_id'] for p in top_25_titles]
+
+
+def default_stages():
+    """Every data file produced by data_analyzer.ipynb, as pipeline stages"""
+    frames = ['matches_data', 'players_data', 'rankings_data', 'player_lookup', 'ranking_index', 'match_store']
+    caches = {}
+    return [
+        table_source('matches_data', 'matches', MATCHES_DATA_FILE_NAME, MATCHES_COLUMNS, caches),
+        table_source('players_data', 'players', PLAYERS_DATA_FILE_NAME, PLAYERS_COLUMNS, caches),
+        table_source('rankings_data', 'rankings', RANKINGS_DATA_FILE_NAME, RANKINGS_COLUMNS, caches),
+
+        Stage('player_lookup', ['players_data'], build_player_lookup, index=True),
+        Stage('ranking_index', ['rankings_data'], RankingIndex, params={'top_k': 20}, index=True),
+        Stage('match_store', ['matches_data', 'player_lookup', 'rankings_data'], MatchStore, index=True),
+        Stage('weekly_rankings', ['rankings_data', 'players_data', 'player_lookup', 'ranking_index'],
+              iter_weekly_rankings_data, params={'top_n': 10}, stream=True, compact=True, incremental=True,
+              outputs=[(WEB_DATA_DIR / 'weekly_rankings.json', None)]),
+        Stage('monthly_title_momentum', frames, iter_monthly_title_momentum_data,
+              params={'window_days': 365}, stream=True, parallel=True, compact=True, incremental=True,
+              outputs=[(WEB_DATA_DIR / 'monthly_title_momentum_data.json', None)]),
+        Stage('momentum_score', frames, iter_momentum_score_data,
+              params={'period_days': 365, 'top_n': 15}, stream=True, parallel=True, compact=True, chunked=True,
+              incremental=True, outputs=[(WEB_DATA_DIR / 'momentum_score_data.json', None)]),
+        Stage('player_statistics', frames, iter_player_statistics,
+              params={'period_days': 2*365}, stream=True,
+              outputs=[(Path('player_statistics_optimized.json'), None)]),
+        Stage('top_25', ['matches_data', 'players_data', 'player_lookup', 'match_store'],
+              count_player_matches_and_titles, params={'top_n': 25},
+              outputs=[(Path('top_25_matches_all.json'), 0), (Path('top_25_titles_amg.json'), 1)]),
+        Stage('tracked_player_ids', ['top_25'], tracked_players),
+        # One pass yields the three charts; each (most matches, most titles, accumulated) triple goes to three files
+        Stage('cumulative_charts', frames + ['tracked_player_ids'], iter_cumulative_charts_data,
+              params={'top_n': 10}, stream=True, parallel=True, incremental=True,
+              compact=[WEB_DATA_DIR / 'accumulated_stats_timeline.json'],
+              outputs=[(WEB_DATA_DIR / 'most_matches_data.json', 0), (WEB_DATA_DIR / 'most_titles_data.json', 1),
+                       (WEB_DATA_DIR / 'accumulated_stats_timeline.json', 2)]),
+    ]
@@ -0,0 +1,13 @@
+"""
+On-demand momentum queries with any window and weights, from Python or a local HTTP endpoint
+Run with: python -m tennis_data.query --help
+"""
+
+from .engine import MomentumQuery
+from .server import make_handler, serve
+
+__all__ = [
+    'MomentumQuery',
+    'make_handler',
+    'serve',
+]
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Command-line entry point for momentum queries
+
+Examples:
+  python -m tennis_data.query --date 2019-12-31                           # momentum top 15 at a date
+  python -m tennis_data.query --date 2019-12-31 --window 180 --top-n 30
+  python -m tennis_data.query --weights '{"titles": {"G": 150}}' --export momentum_score_data.json
+  python -m tennis_data.query --serve --port 8765                          # local HTTP endpoint
+"""
+
+import argparse
+import json
+import time
+
+from ..ingest import load_atp_data
+from ..momentum import positive_int
+from ..pipeline.stages import MATCHES_COLUMNS, PLAYERS_COLUMNS, RANKINGS_COLUMNS
+from .engine import DEFAULT_WINDOW_DAYS, MomentumQuery
+from .server import DEFAULT_HOST, DEFAULT_PORT, serve
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query momentum scores with any window and weights")
+    parser.add_argument('--data-dir', help="Directory with the ATP CSV files (default: download with kagglehub)")
+    parser.add_argument('--date', help="Print the momentum ranking at this date")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW_DAYS, help="Window in days")
+    parser.add_argument('--weights', type=json.loads, default=None,
+                        help='Weight overrides as JSON, e.g. \'{"titles": {"G": 150}, "top10_max": 20}\'')
+    parser.add_argument('--top-n', type=int, default=15, help="Players per date")
+    parser.add_argument('--export', metavar='PATH', help="Write the monthly timeline of this variant as JSON")
+    parser.add_argument('--serve', action='store_true', help="Answer queries over HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    for name, option in (('window', '--window'), ('top_n', '--top-n')):
+        try:
+            positive_int(getattr(args, name), option)
+        except ValueError as e:
+            parser.error(str(e))
+
+    data_dir = args.data_dir
+    if data_dir is None:
+        import kagglehub
+        data_dir = kagglehub.dataset_download("sijovm/atpdata")
+
+    start_time = time.time()
+    query = MomentumQuery(*load_atp_data(data_dir, MATCHES_COLUMNS, PLAYERS_COLUMNS, RANKINGS_COLUMNS))
+    print(f"✅ Indexed {len(query.engine.player_ids):,} players in {time.time() - start_time:.1f} seconds")
+
+    if args.date:
+        start_time = time.perf_counter()
+        players = query.momentum(args.date, args.window, args.weights, args.top_n)
+        print(f"📊 Momentum on {args.date} over {args.window} days "
+              f"({(time.perf_counter() - start_time) * 1000:.1f} ms):")
+        for position, player in enumerate(players, 1):
+            print(f"  {position:>3}. {player['player_name']:<30} {player['momentum_score']:>7.1f}")
+    if args.export:
+        count = query.export(args.export, args.window, args.weights, args.top_n)
+        print(f"💾 Wrote {count:,} timepoints to {args.export}")
+    if args.serve:
+        serve(query, args.host, args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+"""
+On-demand momentum queries
+MomentumQuery answers momentum(date, window, weights) for every player from the per-player
+event indexes of MomentumEngine, built once, so trying another window or weighting takes
+milliseconds instead of a notebook run. Recent answers are kept in an LRU cache. A chosen
+variant exports as momentum_score_data.json (same schema as the pipeline output).
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from ..common import build_player_lookup, dates_from
+from ..momentum import MomentumEngine, momentum_timepoint, momentum_weights, positive_int
+from ..ranking_index import RankingIndex
+
+DEFAULT_WINDOW_DAYS = 365
+DEFAULT_CACHE_SIZE = 256
+
+
+class MomentumQuery:
+    """
+    Momentum of every player at any date, for any window and weights (see momentum_weights)
+    Safe to share between threads: the indexes are read-only and the cache is locked
+    """
+
+    def __init__(self, matches_data, players_data, rankings_data, player_lookup=None, ranking_index=None,
+                 match_store=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.player_lookup = player_lookup if player_lookup is not None else build_player_lookup(players_data)
+        self.ranking_index = ranking_index if ranking_index is not None else RankingIndex(rankings_data)
+        self.engine = MomentumEngine(matches_data, players_data, rankings_data, period_days=DEFAULT_WINDOW_DAYS,
+                                     player_lookup=self.player_lookup, match_store=match_store)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def momentum(self, date, window=DEFAULT_WINDOW_DAYS, weights=None, top_n=None):
+        """
+        Momentum entries at date over the window days before it, best first, in the 'top' format of
+        momentum_score_data.json: every player with a positive score, or the top_n best
+        window and top_n must be positive integers (ValueError otherwise)
+        """
+        window = positive_int(window, 'window')
+        top_n = None if top_n is None else positive_int(top_n, 'top_n')
+        weights = momentum_weights(weights)
+        date = pd.Timestamp(date).normalize()
+        key = (date.value, window, json.dumps(weights, sort_keys=True), top_n)
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.stats['hits'] += 1
+                return [dict(entry) for entry in self.cache[key]]
+
+        result = self.engine.top_momentum(date, top_n=top_n, period_days=window, weights=weights)
+        with self.lock:
+            self.stats['misses'] += 1
+            self.cache[key] = result
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return [dict(entry) for entry in result]
+
+    def timeline(self, window=DEFAULT_WINDOW_DAYS, weights=None, top_n=15, start_date=None):
+        """Monthly timepoints in the momentum_score_data.json schema (not cached: one query per month)"""
+        window = positive_int(window, 'window')
+        top_n = positive_int(top_n, 'top_n')
+        weights = momentum_weights(weights)
+        return [
+            momentum_timepoint(current_date, self.engine.top_momentum(current_date, top_n=top_n,
+                                                                      period_days=window, weights=weights),
+                               self.ranking_index, self.player_lookup)
+            for current_date in dates_from(self.ranking_index.month_end_dates(), start_date)
+        ]
+
+    def export(self, path, window=DEFAULT_WINDOW_DAYS, weights=None, top_n=15):
+        """Write the timeline of this variant where momentum_score_data.json goes"""
+        timeline = self.timeline(window, weights, top_n)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(timeline, f, indent=2)
+        return len(timeline)
@@ -0,0 +1,87 @@
+"""
+Local HTTP endpoint for momentum queries, so the scoring can be tuned from a browser
+  GET /momentum?date=2019-12-31&window=365&top_n=15&weights=<JSON overrides>
+  GET /timeline?window=365&top_n=15&weights=<JSON overrides>
+  GET /weights
+Answers are JSON; bad parameters (e.g. a window or top_n that is not a positive integer)
+get a 400 with {'error': ...}
+"""
+
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from ..momentum import DEFAULT_MOMENTUM_WEIGHTS, momentum_weights, positive_int
+from .engine import DEFAULT_WINDOW_DAYS
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+def _query_params(query_string):
+    """(date, window, weights, top_n) from ?date=...&window=...&weights=<json>&top_n=..."""
+    params = {name: values[-1] for name, values in parse_qs(query_string).items()}
+    window = positive_int(params.get('window', DEFAULT_WINDOW_DAYS), 'window')
+    top_n = positive_int(params['top_n'], 'top_n') if 'top_n' in params else None
+    weights = json.loads(params['weights']) if 'weights' in params else None
+    return params.get('date'), window, weights, top_n
+
+
+def make_handler(query):
+    """HTTP handler class answering /momentum, /timeline and /weights from query"""
+
+    class MomentumHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, data):
+            body = json.dumps(data).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            # Lets a page served from elsewhere (e.g. the scrollytelling dev server) call the endpoint
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            try:
+                date, window, weights, top_n = _query_params(url.query)
+                start_time = time.perf_counter()
+                if url.path == '/momentum':
+                    if date is None:
+                        raise ValueError("Missing date")
+                    players = query.momentum(date, window, weights, top_n)
+                    data = {'date': pd.Timestamp(date).strftime('%Y-%m-%d'), 'window': window,
+                            'weights': momentum_weights(weights), 'players': players}
+                elif url.path == '/timeline':
+                    data = {'window': window, 'weights': momentum_weights(weights),
+                            'timeline': query.timeline(window, weights, top_n or 15)}
+                elif url.path == '/weights':
+                    data = {'defaults': DEFAULT_MOMENTUM_WEIGHTS}
+                else:
+                    self._send_json(404, {'error': f"Unknown path: {url.path}"})
+                    return
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                self._send_json(400, {'error': str(e)})
+                return
+            data['elapsed_ms'] = round((time.perf_counter() - start_time) * 1000, 2)
+            self._send_json(200, data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MomentumHandler
+
+
+def serve(query, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Serve query over HTTP until interrupted"""
+    server = ThreadingHTTPServer((host, port), make_handler(query))
+    print(f"🌐 Momentum queries on http://{host}:{server.server_port}/momentum?date=2019-12-31&window=365")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,76 @@
+"""
+Top-N rankings for every ranking date
+Built with one sort of rankings_data and shared by every builder that shows a ranking list
+"""
+
+import numpy as np
+import pandas as pd
+
+from .common import to_days
+
+EPOCH = np.datetime64(0, 'D')
+
+
+class RankingIndex:
+    """
+    Top-k (rank, player, points) of each ranking date, stored in contiguous arrays
+    Date i owns rows offsets[i]:offsets[i+1], best rank first
+    """
+
+    def __init__(self, rankings_data, top_k=20):
+        self.top_k = top_k
+        days = to_days(rankings_data['ranking_date'])
+        ranks = rankings_data['rank'].to_numpy()
+
+        # Rank within date; lexsort is stable so ties keep source row order
+        order = np.lexsort((ranks, days))
+        sorted_days = days[order]
+        dates, starts, counts = np.unique(sorted_days, return_index=True, return_counts=True)
+        position = np.arange(len(order)) - np.repeat(starts, counts)
+        keep = order[position < top_k]
+
+        self.days = dates
+        self.offsets = np.concatenate(([0], np.cumsum(np.minimum(counts, top_k))))
+        self.ranks = ranks[keep]
+        self.players = rankings_data['player'].to_numpy()[keep]
+        self.points = rankings_data['points'].to_numpy(dtype=np.float64, na_value=np.nan)[keep]
+        self._positions = {int(day): i for i, day in enumerate(dates.tolist())}
+
+    def __len__(self):
+        return len(self.days)
+
+    def dates(self):
+        """Every ranking date as a sorted list of Timestamps"""
+        return [pd.Timestamp(day) for day in (EPOCH + self.days).tolist()]
+
+    def month_end_dates(self):
+        """Last ranking date of every month, sorted"""
+        months = (EPOCH + self.days).astype('datetime64[M]')
+        last = np.append(months[1:] != months[:-1], True) if len(months) else np.zeros(0, dtype=bool)
+        return [pd.Timestamp(day) for day in (EPOCH + self.days[last]).tolist()]
+
+    def position(self, date):
+        """Index of a ranking date, or None if nobody was ranked that day"""
+        return self._positions.get(int(np.datetime64(pd.Timestamp(date), 'D').astype(np.int64)))
+
+    def top(self, date, top_n=None):
+        """(rank, player, points) of the best-ranked players on a date, empty if the date is unknown"""
+        i = self.position(date)
+        if i is None:
+            return []
+        start = self.offsets[i]
+        end = self.offsets[i + 1] if top_n is None else min(self.offsets[i + 1], start + top_n)
+        return list(zip(self.ranks[start:end].tolist(), self.players[start:end].tolist(),
+                        self.points[start:end].tolist()))
+
+    def entries(self, date, player_lookup, top_n=None):
+        """Ranking list ({'rank', 'name', 'points'}) for one date; missing points become 0"""
+        return [{
+            'rank': int(rank),
+            'name': player_lookup.get(player, f"Player {player}"),
+            'points': int(points) if not np.isnan(points) else 0
+        } for rank, player, points in self.top(date, top_n)]
+
+    def rankings_by_date(self, dates, player_lookup, top_n=None):
+        """{date: ranking list} for the given dates"""
+        return {date: self.entries(date, player_lookup, top_n) for date in dates}
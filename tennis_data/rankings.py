@@ -0,0 +1,45 @@
+"""
+Weekly rankings builder
+Top 10 of every ATP ranking week for weekly_rankings.json
+"""
+
+from .common import build_player_lookup, dates_from
+from .instrument import phase
+from .ranking_index import RankingIndex
+
+
+def iter_weekly_rankings_data(rankings_data, players_data, top_n=10, player_lookup=None, ranking_index=None,
+                              start_date=None):
+    """
+    Top 10 of every ranking date (no sampling), yielded one week at a time
+    start_date skips the weeks before it (for incremental rebuilds)
+    """
+    with phase('index'):
+        if player_lookup is None:
+            player_lookup = build_player_lookup(players_data)
+        if ranking_index is None:
+            ranking_index = RankingIndex(rankings_data, top_k=top_n)
+
+    with phase('timepoints') as counts:
+        counts['timepoints'] = 0
+        for date in dates_from(ranking_index.dates(), start_date):
+            rankings_list = ranking_index.entries(date, player_lookup, top_n=top_n)
+            if not rankings_list:
+                continue
+
+            counts['timepoints'] += 1
+            yield {
+                'date': date.strftime('%Y-%m-%d'),
+                'formatted_date': date.strftime('%B %d, %Y'),
+                # Missing or negative points are shown as 0
+                'rankings': [{**entry, 'points': max(entry['points'], 0)} for entry in rankings_list]
+            }
+
+
+def create_weekly_rankings_data(rankings_data, players_data, top_n=10, player_lookup=None, ranking_index=None,
+                                start_date=None):
+    """
+    Prepare the weekly data: top 10 for every ranking date (no sampling)
+    """
+    return list(iter_weekly_rankings_data(rankings_data, players_data, top_n=top_n, player_lookup=player_lookup,
+                                          ranking_index=ranking_index, start_date=start_date))
@@ -0,0 +1,241 @@
+"""
+Synthetic ATP data
+Matches, players and rankings frames with the column layout of the real ATP CSVs, at any
+scale: scale multiplies the players, the tournaments per week and the ranking depth, over
+the same 1968-2022 calendar. 1x is about a tenth of the real dataset, 10x about its size.
+Tournaments are 32-player knockouts decided by hidden player strengths that peak around
+each player's 27th year, so titles and rankings concentrate on a few players per era the
+way the real ones do.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .ingest import MATCHES_DATA_FILE_NAME, PLAYERS_DATA_FILE_NAME, RANKINGS_DATA_FILE_NAME
+
+MATCH_COLUMNS = [
+    'tourney_id', 'tourney_name', 'surface', 'draw_size', 'tourney_level', 'tourney_date', 'match_num',
+    'winner_id', 'winner_seed', 'winner_entry', 'winner_name', 'winner_hand', 'winner_ht', 'winner_ioc',
+    'winner_age', 'loser_id', 'loser_seed', 'loser_entry', 'loser_name', 'loser_hand', 'loser_ht', 'loser_ioc',
+    'loser_age', 'score', 'best_of', 'round', 'minutes', 'w_ace', 'w_df', 'w_svpt', 'w_1stIn', 'w_1stWon',
+    'w_2ndWon', 'w_SvGms', 'w_bpSaved', 'w_bpFaced', 'l_ace', 'l_df', 'l_svpt', 'l_1stIn', 'l_1stWon',
+    'l_2ndWon', 'l_SvGms', 'l_bpSaved', 'l_bpFaced', 'winner_rank', 'winner_rank_points', 'loser_rank',
+    'loser_rank_points',
+]
+PLAYER_COLUMNS = ['player_id', 'name_first', 'name_last', 'hand', 'dob', 'ioc', 'height', 'wikidata_id']
+RANKING_COLUMNS = ['ranking_date', 'rank', 'player', 'points']
+
+# At 1x
+BASE_PLAYERS = 500
+BASE_TOURNAMENTS_PER_WEEK = 0.5
+BASE_RANKING_DEPTH = 100
+
+# Player strength is base * exp(-((year - peak year) / CAREER_WIDTH)^2 / 2)
+PEAK_AGE = 27
+CAREER_WIDTH = 4.0
+ACTIVE_YEARS = 8
+
+DRAW_SIZE = 32
+ROUNDS = ['R32', 'R16', 'QF', 'SF', 'F']
+START_DATE = '1968-01-01'
+END_DATE = '2022-12-31'
+# First weekly ranking list, and the first one with points (as in the real data)
+RANKINGS_START = '1973-08-27'
+POINTS_START = '1990-01-01'
+
+LEVELS = np.array(['G', 'M', 'A', 'D', 'F', 'C'])
+LEVEL_WEIGHTS = np.array([0.04, 0.12, 0.6, 0.1, 0.02, 0.12])
+SURFACES = np.array(['Hard', 'Clay', 'Grass', 'Carpet'])
+FIRST_NAMES = np.array(['Alex', 'Bjorn', 'Carlos', 'Daniil', 'Ellis', 'Fabio', 'Goran', 'Henri', 'Ivan',
+                        'Jannik', 'Karen', 'Lleyton', 'Marat', 'Novak', 'Olli', 'Pete', 'Rafael', 'Stan'],
+                       dtype=object)
+COUNTRIES = np.array(['USA', 'ESP', 'FRA', 'GER', 'ITA', 'ARG', 'AUS', 'GBR', 'SUI', 'SRB', 'RUS', 'SWE'],
+                     dtype=object)
+
+
+def scaled_sizes(scale):
+    players = max(DRAW_SIZE * 2, int(BASE_PLAYERS * scale))
+    return {
+        'players': players,
+        'tournaments_per_week': BASE_TOURNAMENTS_PER_WEEK * scale,
+        'ranking_depth': min(players, int(BASE_RANKING_DEPTH * scale)),
+    }
+
+
+def _yyyymmdd(dates):
+    dates = pd.DatetimeIndex(dates)
+    return (dates.year * 10000 + dates.month * 100 + dates.day).to_numpy()
+
+
+def generate_players(rng, n_players, peak_year):
+    player_ids = np.arange(100001, 100001 + n_players)
+    name_first = FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), n_players)]
+    # Some players have no first name in the real data
+    name_first[rng.random(n_players) < 0.02] = np.nan
+    height = rng.normal(185, 7, n_players).round()
+    height[rng.random(n_players) < 0.4] = np.nan
+    birth = (pd.to_datetime((peak_year - PEAK_AGE).astype(str), format='%Y') +
+             pd.to_timedelta(rng.integers(0, 365, n_players), unit='D'))
+    return pd.DataFrame({
+        'player_id': player_ids,
+        'name_first': name_first,
+        'name_last': np.array([f"Synthetic{i}" for i in range(n_players)], dtype=object),
+        'hand': np.where(rng.random(n_players) < 0.85, 'R', 'L'),
+        'dob': _yyyymmdd(birth),
+        'ioc': COUNTRIES[rng.integers(0, len(COUNTRIES), n_players)],
+        'height': height,
+        'wikidata_id': np.array([f"Q{900000 + i}" for i in range(n_players)], dtype=object),
+    })
+
+
+def strength_at(career, years):
+    """Strength of the players in career (base, peak_year) arrays in the given years (broadcast)"""
+    base, peak_year = career
+    return base * np.exp(-0.5 * ((years - peak_year) / CAREER_WIDTH) ** 2) + 1e-3
+
+
+def generate_matches(rng, players, career, tournaments_per_week):
+    """Every tournament as a full 32-player knockout; winners drawn with probability by strength"""
+    n_players = len(players)
+    weeks = pd.date_range(START_DATE, END_DATE, freq='W-MON')
+    n_tournaments = max(1, int(round(len(weeks) * tournaments_per_week)))
+    tournament_week = np.minimum((np.arange(n_tournaments) / tournaments_per_week).astype(int), len(weeks) - 1)
+    tournament_dates = _yyyymmdd(weeks[tournament_week])
+
+    # Entrants: DRAW_SIZE distinct players, spaced step apart from a random start (then shuffled),
+    # among the players peaking within ACTIVE_YEARS of the tournament (players are sorted by peak year)
+    years = tournament_dates // 10000
+    low = np.searchsorted(career[1], years - ACTIVE_YEARS)
+    width = np.maximum(np.searchsorted(career[1], years + ACTIVE_YEARS, side='right') - low, DRAW_SIZE)
+    low = np.minimum(low, n_players - width)
+    start = rng.integers(0, width)
+    step = rng.integers(1, np.maximum(2, (width - 1) // (DRAW_SIZE - 1) + 1))
+    entrants = low[:, None] + (start[:, None] + np.arange(DRAW_SIZE)[None, :] * step[:, None]) % width[:, None]
+    entrants = rng.permuted(entrants, axis=1)
+
+    columns = {'tournament': [], 'round': [], 'winner': [], 'loser': []}
+    strength = strength_at((career[0][entrants], career[1][entrants]), years[:, None])
+    alive = np.arange(DRAW_SIZE)[None, :].repeat(n_tournaments, axis=0)
+    rows = np.arange(n_tournaments)[:, None]
+    for round_name in ROUNDS:
+        left, right = alive[:, 0::2], alive[:, 1::2]
+        p_left = strength[rows, left] / (strength[rows, left] + strength[rows, right])
+        left_wins = rng.random(left.shape) < p_left
+        winners = np.where(left_wins, left, right)
+        losers = np.where(left_wins, right, left)
+        columns['tournament'].append(np.repeat(np.arange(n_tournaments), left.shape[1]))
+        columns['round'].append(np.full(left.size, round_name, dtype=object))
+        columns['winner'].append(np.take_along_axis(entrants, winners, axis=1).ravel())
+        columns['loser'].append(np.take_along_axis(entrants, losers, axis=1).ravel())
+        alive = winners
+    tournament = np.concatenate(columns['tournament'])
+    order = np.argsort(tournament, kind='stable')
+    tournament = tournament[order]
+    round_names = np.concatenate(columns['round'])[order]
+    winner = np.concatenate(columns['winner'])[order]
+    loser = np.concatenate(columns['loser'])[order]
+    n = len(tournament)
+
+    level = rng.choice(LEVELS, n_tournaments, p=LEVEL_WEIGHTS)[tournament]
+    dates = tournament_dates[tournament]
+    names = players['name_first'].fillna('').to_numpy(dtype=object) + ' ' + players['name_last'].to_numpy(dtype=object)
+
+    def stat(low, high):
+        return rng.integers(low, high, n).astype(float)
+
+    data = {
+        'tourney_id': np.char.add(np.char.add((dates // 10000).astype(str), '-'), tournament.astype(str)),
+        'tourney_name': np.char.add('Synthetic Open ', (tournament % 97).astype(str)),
+        'surface': SURFACES[rng.integers(0, len(SURFACES), n_tournaments)][tournament],
+        'draw_size': np.full(n, DRAW_SIZE),
+        'tourney_level': level,
+        'tourney_date': dates,
+        'match_num': np.arange(n) % (DRAW_SIZE - 1) + 1,
+        'winner_id': players['player_id'].to_numpy()[winner],
+        'winner_seed': np.full(n, np.nan),
+        'winner_entry': np.full(n, np.nan),
+        'winner_name': names[winner],
+        'winner_hand': players['hand'].to_numpy()[winner],
+        'winner_ht': players['height'].to_numpy()[winner],
+        'winner_ioc': players['ioc'].to_numpy()[winner],
+        'winner_age': ((dates // 10000) - (players['dob'].to_numpy() // 10000)[winner]).astype(float),
+        'loser_id': players['player_id'].to_numpy()[loser],
+        'loser_seed': np.full(n, np.nan),
+        'loser_entry': np.full(n, np.nan),
+        'loser_name': names[loser],
+        'loser_hand': players['hand'].to_numpy()[loser],
+        'loser_ht': players['height'].to_numpy()[loser],
+        'loser_ioc': players['ioc'].to_numpy()[loser],
+        'loser_age': ((dates // 10000) - (players['dob'].to_numpy() // 10000)[loser]).astype(float),
+        'score': np.where(rng.random(n) < 0.5, '6-4 6-4', '7-6(4) 3-6 6-3'),
+        'best_of': np.where(level == 'G', 5, 3),
+        'round': round_names,
+        'minutes': stat(60, 240),
+    }
+    for prefix in ('w', 'l'):
+        data.update({
+            f'{prefix}_ace': stat(0, 20), f'{prefix}_df': stat(0, 10), f'{prefix}_svpt': stat(40, 120),
+            f'{prefix}_1stIn': stat(20, 80), f'{prefix}_1stWon': stat(15, 60), f'{prefix}_2ndWon': stat(5, 30),
+            f'{prefix}_SvGms': stat(8, 20), f'{prefix}_bpSaved': stat(0, 10), f'{prefix}_bpFaced': stat(0, 15),
+        })
+    data.update({
+        'winner_rank': stat(1, 500), 'winner_rank_points': stat(1, 10000),
+        'loser_rank': stat(1, 500), 'loser_rank_points': stat(1, 10000),
+    })
+    matches = pd.DataFrame(data, columns=MATCH_COLUMNS)
+    # Stats are missing for most of the early matches, as in the real data
+    early = dates < 19910000
+    matches.loc[early, MATCH_COLUMNS[27:]] = np.nan
+    return matches
+
+
+def generate_rankings(rng, players, career, ranking_depth):
+    """Weekly top ranking_depth by noisy strength; points missing before POINTS_START"""
+    weeks = pd.date_range(RANKINGS_START, END_DATE, freq='W-MON')
+    player_ids = players['player_id'].to_numpy()
+    points_from = int(_yyyymmdd([pd.Timestamp(POINTS_START)])[0])
+    dates = _yyyymmdd(weeks)
+
+    ranked = np.empty((len(weeks), ranking_depth), dtype=np.int64)
+    points = np.empty((len(weeks), ranking_depth), dtype=float)
+    for week in range(len(weeks)):
+        form = strength_at(career, weeks[week].year) * rng.lognormal(0, 0.3, len(player_ids))
+        top = np.argpartition(-form, ranking_depth - 1)[:ranking_depth]
+        top = top[np.argsort(-form[top], kind='stable')]
+        ranked[week] = player_ids[top]
+        points[week] = np.round(form[top] * 1000)
+    points[dates < points_from] = np.nan
+
+    return pd.DataFrame({
+        'ranking_date': np.repeat(dates, ranking_depth),
+        'rank': np.tile(np.arange(1, ranking_depth + 1), len(weeks)),
+        'player': ranked.ravel(),
+        'points': points.ravel(),
+    }, columns=RANKING_COLUMNS)
+
+
+def generate_atp_data(scale=1, seed=0):
+    """(matches_data, players_data, rankings_data) as the real CSVs read with pandas"""
+    sizes = scaled_sizes(scale)
+    rng = np.random.default_rng(seed)
+    # Few strong players and a long tail, so titles and top rankings are concentrated
+    career = (rng.pareto(2.5, sizes['players']) + 0.1,
+              np.sort(rng.integers(int(START_DATE[:4]) - ACTIVE_YEARS, int(END_DATE[:4]) + ACTIVE_YEARS,
+                                   sizes['players'])))
+    players = generate_players(rng, sizes['players'], career[1])
+    matches = generate_matches(rng, players, career, sizes['tournaments_per_week'])
+    rankings = generate_rankings(rng, players, career, sizes['ranking_depth'])
+    return matches, players, rankings
+
+
+def write_atp_csvs(data_dir, scale=1, seed=0):
+    """Write the synthetic data under the real CSV file names (what load_atp_data / the pipeline read)"""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    matches, players, rankings = generate_atp_data(scale, seed)
+    for frame, filename in ((matches, MATCHES_DATA_FILE_NAME), (players, PLAYERS_DATA_FILE_NAME),
+                            (rankings, RANKINGS_DATA_FILE_NAME)):
+        frame.to_csv(data_dir / filename, index=False)
+    return {'matches': len(matches), 'players': len(players), 'rankings': len(rankings)}
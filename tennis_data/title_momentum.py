@@ -0,0 +1,228 @@
+"""
+Rolling-window title momentum
+Counts G/A/M titles per player over a sliding date window with two pointers,
+shared by the weekly (2-year) and monthly (1-year) title momentum builders
+"""
+
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+from .common import build_player_lookup, dates_from, to_day
+from .instrument import phase
+from .match_store import MatchStore
+from .parallel import iter_parallel, worker_match_store
+from .ranking_index import RankingIndex
+
+
+class RollingTitleCounter:
+    """
+    Per-player title counts over a sliding window of days
+    Titles enter when the window end passes them and leave when the window start does.
+    Players are kept in buckets by title count, so each add/remove is O(1) and the
+    leaderboard can be read from the highest bucket down without re-sorting counts.
+    """
+
+    def __init__(self, title_days, winner_ids, window_days, row_order=None):
+        """
+        title_days must be sorted ascending; row_order gives each title's position in the
+        source data and is used to order players with equal counts (first title seen first)
+        """
+        self.title_days = np.asarray(title_days, dtype=np.int64)
+        self.winner_ids = list(winner_ids)
+        self.row_order = list(range(len(self.winner_ids))) if row_order is None else list(row_order)
+        self.window_days = window_days
+
+        self.lo = 0  # first title still inside the window
+        self.hi = 0  # first title not yet added
+        self.counts = {}
+        self.buckets = defaultdict(set)
+        self.max_count = 0
+        self.total = 0
+        self._positions = defaultdict(deque)
+
+    def _add(self, i):
+        player_id = self.winner_ids[i]
+        count = self.counts.get(player_id, 0)
+        if count:
+            self.buckets[count].discard(player_id)
+        self.counts[player_id] = count + 1
+        self.buckets[count + 1].add(player_id)
+        self.max_count = max(self.max_count, count + 1)
+        self._positions[player_id].append(self.row_order[i])
+        self.total += 1
+
+    def _remove(self, i):
+        player_id = self.winner_ids[i]
+        count = self.counts[player_id]
+        self.buckets[count].discard(player_id)
+        if count == 1:
+            del self.counts[player_id]
+            del self._positions[player_id]
+        else:
+            self.counts[player_id] = count - 1
+            self.buckets[count - 1].add(player_id)
+            self._positions[player_id].popleft()
+        while self.max_count and not self.buckets[self.max_count]:
+            self.max_count -= 1
+        self.total -= 1
+
+    def advance(self, current_day):
+        """Move the window to end at current_day (days must not go backwards)"""
+        n_titles = len(self.title_days)
+        while self.hi < n_titles and self.title_days[self.hi] <= current_day:
+            self._add(self.hi)
+            self.hi += 1
+
+        period_start = current_day - self.window_days
+        while self.lo < self.hi and self.title_days[self.lo] < period_start:
+            self._remove(self.lo)
+            self.lo += 1
+
+    def top(self, k=None):
+        """(player_id, titles) pairs ordered by titles in the window, highest first"""
+        leaders = []
+        for count in range(self.max_count, 0, -1):
+            bucket = self.buckets.get(count)
+            if not bucket:
+                continue
+            for player_id in sorted(bucket, key=lambda pid: min(self._positions[pid])):
+                leaders.append((player_id, count))
+                if k is not None and len(leaders) >= k:
+                    return leaders
+        return leaders
+
+
+def title_counter(matches_data, player_lookup, window_days, match_store=None):
+    """RollingTitleCounter over the G/A/M finals won by known players"""
+    store = match_store if match_store is not None else MatchStore(matches_data, player_lookup)
+    known = store.is_title & store.known_winners()
+
+    title_days = store.days[known].astype(np.int64)
+    winners = store.player_ids[store.winner[known]]
+    row_order = np.nonzero(known)[0]
+
+    order = np.argsort(title_days, kind='stable')
+    return RollingTitleCounter(title_days[order], winners[order].tolist(), window_days, row_order[order])
+
+
+def _iter_title_leaders(counter, dates, progress_every=None):
+    """(leaders, total titles in window) for each date, moving the counter's window forward"""
+    total_dates = len(dates)
+    start_time = time.time()
+
+    for idx, current_date in enumerate(dates):
+        if progress_every and idx % progress_every == 0 and idx > 0:
+            elapsed = time.time() - start_time
+            eta_min = (total_dates - idx) / (idx / elapsed) / 60
+            print(f"  Progress: {idx:,}/{total_dates:,} ({idx/total_dates*100:.1f}%) - ETA: {eta_min:.1f}min")
+
+        counter.advance(to_day(current_date))
+        yield counter.top(), counter.total
+
+    if progress_every:
+        print(f"✅ Processed all timepoints in {time.time() - start_time:.1f} seconds")
+
+
+def _title_chunk(state, dates, window_days):
+    """Worker task: leaders for a chunk of dates, from a counter started at the chunk's first date"""
+    counter = title_counter(None, state['player_lookup'], window_days, match_store=worker_match_store(state))
+    return list(_iter_title_leaders(counter, dates))
+
+
+def _title_leaders_by_date(matches_data, rankings_data, dates, player_lookup, window_days, match_store, workers,
+                           progress_every):
+    if workers > 1:
+        return iter_parallel(_title_chunk, dates, matches_data, rankings_data, player_lookup,
+                             {'window_days': window_days}, workers)
+    with phase('index'):
+        counter = title_counter(matches_data, player_lookup, window_days, match_store=match_store)
+    print(f"📊 Found {len(counter.title_days):,} title matches (G/A/M finals)")
+    return _iter_title_leaders(counter, dates, progress_every)
+
+
+def _title_timepoints(leaders_by_date, dates, ranking_index, player_lookup, monthly):
+    with phase('timepoints', timepoints=len(dates)):
+        for current_date, (leaders, total) in zip(dates, leaders_by_date):
+            top_performers = [{
+                'player_id': int(player_id),
+                'player_name': player_lookup[player_id],
+                'period_titles': titles
+            } for player_id, titles in leaders]
+
+            timepoint = {'date': current_date.strftime('%Y-%m-%d')}
+            if monthly:
+                timepoint['year_month'] = current_date.strftime('%Y-%m')
+            timepoint['rank'] = ranking_index.entries(current_date, player_lookup, top_n=20)
+            timepoint['top'] = top_performers
+            timepoint['total_period_titles'] = total
+            yield timepoint
+
+
+def iter_title_momentum_data(matches_data, players_data, rankings_data, window_days=2*365, player_lookup=None,
+                             ranking_index=None, match_store=None, workers=1, start_date=None):
+    """
+    Title momentum for each ranking timepoint, yielded one at a time
+    2-year rolling window, one timepoint per ranking date (from start_date on, if given)
+    """
+    print("🏆 Creating title momentum data...")
+    with phase('index'):
+        if player_lookup is None:
+            player_lookup = build_player_lookup(players_data)
+        if ranking_index is None:
+            ranking_index = RankingIndex(rankings_data)
+
+    ranking_dates = dates_from(ranking_index.dates(), start_date)
+    print(f"📅 Processing {len(ranking_dates):,} ranking dates")
+
+    leaders_by_date = _title_leaders_by_date(matches_data, rankings_data, ranking_dates, player_lookup, window_days,
+                                             match_store, workers, progress_every=200)
+    yield from _title_timepoints(leaders_by_date, ranking_dates, ranking_index, player_lookup, monthly=False)
+
+
+def iter_monthly_title_momentum_data(matches_data, players_data, rankings_data, window_days=365,
+                                     player_lookup=None, ranking_index=None, match_store=None, workers=1,
+                                     start_date=None):
+    """
+    Monthly title momentum timepoints, yielded one at a time
+    Each scroll step = 1 month with last ranking update and 1-year title momentum
+    start_date skips the months before it; the window is refilled from the titles before it
+    """
+    print("🏆 Creating monthly title momentum data...")
+    with phase('index'):
+        if player_lookup is None:
+            player_lookup = build_player_lookup(players_data)
+        if ranking_index is None:
+            ranking_index = RankingIndex(rankings_data)
+
+    monthly_dates = dates_from(ranking_index.month_end_dates(), start_date)
+    print(f"✅ Created {len(monthly_dates):,} monthly timepoints")
+
+    leaders_by_date = _title_leaders_by_date(matches_data, rankings_data, monthly_dates, player_lookup, window_days,
+                                             match_store, workers, progress_every=50)
+    yield from _title_timepoints(leaders_by_date, monthly_dates, ranking_index, player_lookup, monthly=True)
+
+
+def create_title_momentum_data(matches_data, players_data, rankings_data, window_days=2*365, player_lookup=None,
+                               ranking_index=None, match_store=None, workers=1, start_date=None):
+    """
+    Create focused dataset showing title momentum for each ranking timepoint
+    The timepoints of iter_title_momentum_data as a list
+    """
+    return list(iter_title_momentum_data(matches_data, players_data, rankings_data, window_days=window_days,
+                                         player_lookup=player_lookup, ranking_index=ranking_index,
+                                         match_store=match_store, workers=workers, start_date=start_date))
+
+
+def create_monthly_title_momentum_data(matches_data, players_data, rankings_data, window_days=365,
+                                       player_lookup=None, ranking_index=None, match_store=None, workers=1,
+                                       start_date=None):
+    """
+    Create monthly aggregated dataset for smoother scrolling
+    The timepoints of iter_monthly_title_momentum_data as a list
+    """
+    return list(iter_monthly_title_momentum_data(matches_data, players_data, rankings_data, window_days=window_days,
+                                                 player_lookup=player_lookup, ranking_index=ranking_index,
+                                                 match_store=match_store, workers=workers,
+                                                 start_date=start_date))
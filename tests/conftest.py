@@ -0,0 +1,72 @@
+"""
+Shared fixtures: a stub HTTP server on localhost whose answers each test sets per path
+The downloaders are top-level scripts, so the repository root is put on sys.path
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class StubServer:
+    """
+    routes: path -> answer(request headers) returning (status, headers, body), optionally after a delay;
+    an answer declaring a Content-Length longer than its body is cut short (the connection closes)
+    requests: (path, request headers) of every request received, in order
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests.append((self.path, dict(self.headers)))
+                answer = stub.routes.get(self.path)
+                status, headers, body = answer(self.headers) if answer else (404, {}, b'not found')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if 'Content-Length' not in headers:
+                    self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def count(self, path):
+        with self.lock:
+            return sum(1 for requested, _ in self.requests if requested == path)
+
+    def route(self, path, status=200, headers=None, body=b'', delay=0):
+        """Answer path with a fixed response (after delay seconds)"""
+        def answer(request_headers):
+            if delay:
+                time.sleep(delay)
+            return status, headers or {}, body
+        self.routes[path] = answer
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    server.thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
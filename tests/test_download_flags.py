@@ -0,0 +1,77 @@
+"""
+Hedged flag downloads against a stub server on localhost
+"""
+
+import json
+import os
+import time
+
+import download_flags
+from download_flags import NegativeCache, fetch_hedged
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 200
+
+
+def test_first_source_answering_in_time_is_the_only_request(stub_server):
+    stub_server.route('/1.png', headers={'Content-Type': 'image/png'}, body=PNG)
+    stub_server.route('/2.png', headers={'Content-Type': 'image/png'}, body=PNG)
+    sources = [stub_server.url('/1.png'), stub_server.url('/2.png')]
+
+    result = fetch_hedged('SUI', sources, hedge_delay=1.0, log=lambda line: None)
+
+    assert result == (sources[0], PNG)
+    assert stub_server.count('/2.png') == 0
+
+
+def test_hedge_delay_starts_the_next_source(stub_server):
+    stub_server.route('/slow.png', headers={'Content-Type': 'image/png'}, body=PNG, delay=1.0)
+    stub_server.route('/fast.png', headers={'Content-Type': 'image/png'}, body=PNG)
+    sources = [stub_server.url('/slow.png'), stub_server.url('/fast.png')]
+
+    start_time = time.monotonic()
+    result = fetch_hedged('SUI', sources, hedge_delay=0.1, log=lambda line: None)
+
+    assert result == (sources[1], PNG)
+    assert time.monotonic() - start_time < 0.9
+    assert stub_server.count('/slow.png') == 1
+
+
+def test_permanent_failures_go_to_the_negative_cache(stub_server, tmp_path):
+    stub_server.route('/html.png', headers={'Content-Type': 'text/html'}, body=b'<html>' * 50)
+    stub_server.route('/busy.png', status=503, body=b'busy')
+    stub_server.route('/flag.png', headers={'Content-Type': 'image/png'}, body=PNG)
+    sources = [stub_server.url(path) for path in ('/missing.png', '/html.png', '/busy.png', '/flag.png')]
+    negative_cache = NegativeCache(tmp_path / 'failures.json')
+
+    result = fetch_hedged('SUI', sources, negative_cache=negative_cache, hedge_delay=1.0, log=lambda line: None)
+
+    assert result == (sources[3], PNG)
+    assert negative_cache.is_bad('SUI', sources[0])
+    assert negative_cache.is_bad('SUI', sources[1])
+    assert not negative_cache.is_bad('SUI', sources[2])  # server errors may go away
+    assert not negative_cache.is_bad('SUI', sources[3])
+
+    negative_cache.save()
+    reloaded = NegativeCache(tmp_path / 'failures.json')
+    fetch_hedged('SUI', sources, negative_cache=reloaded, hedge_delay=1.0, log=lambda line: None)
+    assert stub_server.count('/missing.png') == 1
+    assert stub_server.count('/html.png') == 1
+    assert stub_server.count('/busy.png') == 2
+
+
+def test_failed_country_is_reported_and_the_negative_cache_saved(stub_server, tmp_path, monkeypatch, capsys):
+    stub_server.route('/ch.png', headers={'Content-Type': 'image/png'}, body=PNG)  # SUI maps to CH
+    monkeypatch.setattr(download_flags, 'FLAG_SOURCES', [stub_server.url('/{iso}.png')])
+    monkeypatch.chdir(tmp_path)
+    data_dir = tmp_path / 'tennis-scrollytelling' / 'data'
+    data_dir.mkdir(parents=True)
+    with open(data_dir / 'player_list.json', 'w', encoding='utf-8') as f:
+        json.dump([{'country': 'SUI'}, {'country': 'XXX'}], f)
+    negative_cache = NegativeCache(tmp_path / 'failures.json')
+
+    download_flags.main(negative_cache=negative_cache)
+
+    assert sorted(os.listdir(tmp_path / 'images' / 'flags')) == ['sui.png']
+    assert 'No flag for: XXX' in capsys.readouterr().out
+    reloaded = NegativeCache(tmp_path / 'failures.json')
+    assert reloaded.is_bad('XXX', stub_server.url('/xxx.png'))
@@ -0,0 +1,100 @@
+"""
+HttpCache against a stub server on localhost: TTL hits, revalidation, eviction
+"""
+
+import threading
+import time
+
+import requests
+
+from http_cache import HttpCache
+
+
+def fetch(url, params=None, headers=None):
+    return requests.get(url, params=params, headers=headers, timeout=5)
+
+
+def test_fresh_entry_is_served_without_a_request(stub_server, tmp_path):
+    stub_server.route('/a', body=b'answer', headers={'Content-Type': 'application/json'})
+    cache = HttpCache(tmp_path, ttl=60)
+
+    first = cache.get(fetch, stub_server.url('/a'))
+    second = cache.get(fetch, stub_server.url('/a'))
+
+    assert (first.content, first.from_cache) == (b'answer', False)
+    assert (second.content, second.from_cache) == (b'answer', True)
+    assert stub_server.count('/a') == 1
+    assert cache.stats == {'hits': 1, 'revalidated': 0, 'misses': 1, 'evicted': 0}
+
+
+def test_stale_entry_is_revalidated_with_304(stub_server, tmp_path):
+    def answer(request_headers):
+        if request_headers.get('If-None-Match') == '"v1"':
+            return 304, {'ETag': '"v1"'}, b''
+        return 200, {'ETag': '"v1"'}, b'answer'
+    stub_server.routes['/a'] = answer
+    cache = HttpCache(tmp_path, ttl=0)
+
+    cache.get(fetch, stub_server.url('/a'))
+    revalidated = cache.get(fetch, stub_server.url('/a'))
+
+    assert (revalidated.content, revalidated.from_cache) == (b'answer', True)
+    assert stub_server.requests[1][1].get('If-None-Match') == '"v1"'
+    assert cache.stats['revalidated'] == 1
+    assert cache.stats['misses'] == 1
+
+
+def test_changed_entry_is_fetched_again(stub_server, tmp_path):
+    stub_server.route('/a', headers={'ETag': '"v1"'}, body=b'old')
+    cache = HttpCache(tmp_path, ttl=0)
+    cache.get(fetch, stub_server.url('/a'))
+
+    stub_server.route('/a', headers={'ETag': '"v2"'}, body=b'new')
+    response = cache.get(fetch, stub_server.url('/a'))
+
+    assert (response.content, response.from_cache) == (b'new', False)
+    assert cache.lookup(stub_server.url('/a'), ttl=60).content == b'new'
+
+
+def test_error_answers_are_not_stored(stub_server, tmp_path):
+    cache = HttpCache(tmp_path, ttl=60)
+
+    assert cache.get(fetch, stub_server.url('/missing')).status_code == 404
+    assert cache.get(fetch, stub_server.url('/missing')).status_code == 404
+    assert stub_server.count('/missing') == 2
+
+
+def test_least_recently_used_entries_are_evicted(stub_server, tmp_path):
+    for path in ('/a', '/b', '/c'):
+        stub_server.route(path, body=path.encode() * 50)
+    cache = HttpCache(tmp_path, ttl=60, max_bytes=250)
+
+    cache.get(fetch, stub_server.url('/a'))
+    time.sleep(0.05)
+    cache.get(fetch, stub_server.url('/b'))
+    time.sleep(0.05)
+    cache.get(fetch, stub_server.url('/a'))  # a is now used more recently than b
+    time.sleep(0.05)
+    cache.get(fetch, stub_server.url('/c'))
+
+    assert cache.stats['evicted'] == 1
+    assert cache.lookup(stub_server.url('/b')) is None
+    assert cache.lookup(stub_server.url('/a')) is not None
+    assert cache.lookup(stub_server.url('/c')) is not None
+    assert cache.total_bytes == 200
+
+
+def test_counts_from_many_threads_are_not_lost(tmp_path):
+    cache = HttpCache(tmp_path)
+
+    def count_misses():
+        for _ in range(1000):
+            cache.count('misses', 2)
+
+    threads = [threading.Thread(target=count_misses) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.stats['misses'] == 16000
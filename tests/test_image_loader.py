@@ -0,0 +1,141 @@
+"""
+Image downloads against a stub server on localhost: resumed transfers, content-addressed
+objects and the manifest
+"""
+
+import importlib
+import json
+import logging
+import os
+
+import pytest
+
+IMAGE = b'\xff\xd8\xff\xe0' + bytes(range(256)) * 100 + b'\xff\xd9'
+OTHER_IMAGE = b'\xff\xd8\xff\xe0' + bytes(range(255, -1, -1)) * 100 + b'\xff\xd9'
+# Cut transfers stop at a chunk boundary of iter_content, so the partial file has exactly this size
+CUT_AT = 8192
+
+
+@pytest.fixture(scope='module')
+def image_loader(tmp_path_factory):
+    # The module logs to image_download.log in the working directory from import on
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('log'))
+    try:
+        return importlib.import_module('image_loader')
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def downloader(image_loader, tmp_path):
+    rate_limiter = image_loader.HostRateLimiter(default_rate=(1000, 1000))
+    return image_loader.TennisPlayerImageDownloader(tmp_path / 'players', rate_limiter=rate_limiter)
+
+
+def serve_image(stub_server, path, body, etag, cut_at=None):
+    """Serve body with Range/If-Range support, sending only cut_at bytes (of the whole file) if given"""
+    def answer(request_headers):
+        start = 0
+        requested = request_headers.get('Range')
+        if requested and request_headers.get('If-Range') == etag:
+            start = int(requested[len('bytes='):-1])
+        headers = {'Content-Type': 'image/jpeg', 'ETag': etag, 'Content-Length': str(len(body) - start)}
+        if start:
+            headers['Content-Range'] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+        return (206 if start else 200), headers, body[start:cut_at]
+    stub_server.routes[path] = answer
+
+
+def stored_bytes(downloader, player_id):
+    with open(downloader.output_dir / downloader.manifest.get(player_id)['file'], 'rb') as f:
+        return f.read()
+
+
+def partial_files(downloader):
+    return sorted(path.name for path in downloader.partial_dir.iterdir())
+
+
+def test_cut_transfer_resumes_with_range_and_if_range(downloader, stub_server):
+    serve_image(stub_server, '/a.jpg', IMAGE, '"v1"', cut_at=CUT_AT)
+    assert not downloader.download_image(stub_server.url('/a.jpg'), 'p1', max_retries=1)
+    assert len(partial_files(downloader)) == 2  # the partial file and its URL/ETag sidecar
+
+    serve_image(stub_server, '/a.jpg', IMAGE, '"v1"')
+    assert downloader.download_image(stub_server.url('/a.jpg'), 'p1', max_retries=1)
+
+    _, headers = stub_server.requests[-1]
+    assert headers['Range'] == f"bytes={CUT_AT}-"
+    assert headers['If-Range'] == '"v1"'
+    assert stored_bytes(downloader, 'p1') == IMAGE
+    assert partial_files(downloader) == []
+
+
+def test_changed_etag_restarts_from_zero(downloader, stub_server):
+    serve_image(stub_server, '/a.jpg', IMAGE, '"v1"', cut_at=CUT_AT)
+    assert not downloader.download_image(stub_server.url('/a.jpg'), 'p1', max_retries=1)
+
+    serve_image(stub_server, '/a.jpg', OTHER_IMAGE, '"v2"')
+    assert downloader.download_image(stub_server.url('/a.jpg'), 'p1', max_retries=1)
+
+    _, headers = stub_server.requests[-1]
+    assert headers['If-Range'] == '"v1"'
+    assert stored_bytes(downloader, 'p1') == OTHER_IMAGE
+
+
+def test_unsatisfiable_range_discards_the_partial_file(downloader, stub_server):
+    serve_image(stub_server, '/a.jpg', IMAGE, '"v1"', cut_at=CUT_AT)
+    assert not downloader.download_image(stub_server.url('/a.jpg'), 'p1', max_retries=1)
+
+    stub_server.route('/a.jpg', status=416, headers={'Content-Range': f"bytes */{len(IMAGE)}"})
+    assert not downloader.download_image(stub_server.url('/a.jpg'), 'p1', max_retries=1)
+    assert partial_files(downloader) == []
+
+    serve_image(stub_server, '/a.jpg', IMAGE, '"v1"')
+    assert downloader.download_image(stub_server.url('/a.jpg'), 'p1', max_retries=1)
+    _, headers = stub_server.requests[-1]
+    assert 'Range' not in headers
+    assert stored_bytes(downloader, 'p1') == IMAGE
+
+
+def test_partial_file_of_another_url_is_not_resumed(downloader, stub_server):
+    serve_image(stub_server, '/thumb.jpg', OTHER_IMAGE, '"v1"', cut_at=CUT_AT)
+    assert not downloader.download_image(stub_server.url('/thumb.jpg'), 'p1', max_retries=1)
+
+    serve_image(stub_server, '/original.jpg', IMAGE, '"v1"')
+    assert downloader.download_image(stub_server.url('/original.jpg'), 'p1', max_retries=1)
+
+    _, headers = stub_server.requests[-1]
+    assert 'Range' not in headers
+    assert stored_bytes(downloader, 'p1') == IMAGE
+    assert partial_files(downloader) == []
+
+
+def test_identical_images_share_one_object(downloader, stub_server):
+    serve_image(stub_server, '/a.jpg', IMAGE, '"a"')
+    serve_image(stub_server, '/b.jpg', IMAGE, '"b"')
+
+    assert downloader.download_image(stub_server.url('/a.jpg'), 'p1')
+    assert downloader.download_image(stub_server.url('/b.jpg'), 'p2')
+
+    objects = list(downloader.objects_dir.iterdir())
+    assert len(objects) == 1
+    assert objects[0].name.startswith(downloader.manifest.get('p1')['sha256'])
+    assert downloader.manifest.get('p1')['object'] == downloader.manifest.get('p2')['object']
+    assert stored_bytes(downloader, 'p1') == stored_bytes(downloader, 'p2') == IMAGE
+
+
+def test_manifest_skips_downloaded_players(image_loader, downloader, stub_server, tmp_path, caplog):
+    serve_image(stub_server, '/a.jpg', IMAGE, '"a"')
+    assert downloader.download_image(stub_server.url('/a.jpg'), 'p1')
+    players_file = tmp_path / 'player_list.json'
+    with open(players_file, 'w', encoding='utf-8') as f:
+        json.dump([{'player_id': 'p1', 'player_name': 'Player One', 'wikimedia_id': 'Q1'}], f)
+    requests_before = len(stub_server.requests)
+
+    rerun = image_loader.TennisPlayerImageDownloader(downloader.output_dir, rate_limiter=downloader.rate_limiter)
+    with caplog.at_level(logging.INFO, logger='image_loader'):
+        rerun.run(str(players_file))
+
+    assert 'Skipped (already existed): 1' in caplog.text
+    assert len(stub_server.requests) == requests_before
@@ -0,0 +1,108 @@
+"""
+Incremental pipeline runs on a small synthetic dataset give the same files as a --force build
+"""
+
+import csv
+import json
+import shutil
+
+import pytest
+
+from tennis_data.ingest import MATCHES_DATA_FILE_NAME, PLAYERS_DATA_FILE_NAME, RANKINGS_DATA_FILE_NAME
+from tennis_data.pipeline.__main__ import main
+from tennis_data.synthetic import write_atp_csvs
+
+SCALE = 0.05
+TITLE_LEVELS = ('G', 'A', 'M')
+
+
+@pytest.fixture(scope='module')
+def full_data(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp('full')
+    write_atp_csvs(data_dir, SCALE, 0)
+    return data_dir
+
+
+def read_csv(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        return next(reader), list(reader)
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def copy_data(source_dir, data_dir, before=None):
+    """The CSVs of source_dir in data_dir, with only the matches and rankings dated before (YYYYMMDD) if given"""
+    data_dir.mkdir(exist_ok=True)
+    shutil.copyfile(source_dir / PLAYERS_DATA_FILE_NAME, data_dir / PLAYERS_DATA_FILE_NAME)
+    for filename, date_column in ((MATCHES_DATA_FILE_NAME, 'tourney_date'), (RANKINGS_DATA_FILE_NAME, 'ranking_date')):
+        header, rows = read_csv(source_dir / filename)
+        date = header.index(date_column)
+        write_csv(data_dir / filename, header, [row for row in rows if before is None or row[date] < before])
+
+
+def build(data_dir, output_dir, cache_dir, *options):
+    main(['--data-dir', str(data_dir), '--output-dir', str(output_dir), '--cache-dir', str(cache_dir),
+          '--no-report', *options])
+
+
+def output_files(output_dir):
+    return {str(path.relative_to(output_dir)): path.read_bytes() for path in output_dir.rglob('*') if path.is_file()}
+
+
+def tracked_player_ids(output_dir):
+    with open(output_dir / 'top_25_titles_amg.json', 'r', encoding='utf-8') as f:
+        return [player['player_id'] for player in json.load(f)]
+
+
+def assert_equals_full_build(data_dir, output_dir, tmp_path):
+    build(data_dir, tmp_path / 'full_build', tmp_path / 'full_cache', '--force')
+    expected = output_files(tmp_path / 'full_build')
+    actual = output_files(output_dir)
+    assert sorted(actual) == sorted(expected)
+    for name in expected:
+        assert actual[name] == expected[name], name
+
+
+def test_appended_month_equals_full_build(full_data, tmp_path, capsys):
+    data_dir, output_dir, cache_dir = tmp_path / 'data', tmp_path / 'out', tmp_path / 'cache'
+    copy_data(full_data, data_dir, before='20220501')
+    build(data_dir, output_dir, cache_dir, '--incremental')
+
+    copy_data(full_data, data_dir)
+    capsys.readouterr()
+    build(data_dir, output_dir, cache_dir, '--incremental')
+
+    assert 'recomputing timepoints from 2022-05-01' in capsys.readouterr().out
+    assert_equals_full_build(data_dir, output_dir, tmp_path)
+
+
+def test_edited_mid_history_row_equals_full_build(full_data, tmp_path, capsys):
+    data_dir, output_dir, cache_dir = tmp_path / 'data', tmp_path / 'out', tmp_path / 'cache'
+    copy_data(full_data, data_dir)
+    build(data_dir, output_dir, cache_dir, '--incremental')
+    tracked_before = tracked_player_ids(output_dir)
+
+    # Hand a mid-history title to the finalist who never won one: the tracked players change
+    header, rows = read_csv(data_dir / MATCHES_DATA_FILE_NAME)
+    column = {name: header.index(name) for name in ('tourney_date', 'tourney_level', 'round', 'winner_id', 'loser_id')}
+    title_winners = {row[column['winner_id']] for row in rows
+                     if row[column['round']] == 'F' and row[column['tourney_level']] in TITLE_LEVELS}
+    finals = [row for row in rows if row[column['round']] == 'F' and row[column['tourney_level']] in TITLE_LEVELS
+              and row[column['loser_id']] not in title_winners]
+    final = finals[len(finals) // 2]
+    final[column['winner_id']], final[column['loser_id']] = final[column['loser_id']], final[column['winner_id']]
+    write_csv(data_dir / MATCHES_DATA_FILE_NAME, header, rows)
+    edited_month = f"{final[column['tourney_date']][:4]}-{final[column['tourney_date']][4:6]}-01"
+
+    capsys.readouterr()
+    build(data_dir, output_dir, cache_dir, '--incremental')
+
+    assert f"recomputing timepoints from {edited_month}" in capsys.readouterr().out
+    assert tracked_player_ids(output_dir) != tracked_before
+    assert_equals_full_build(data_dir, output_dir, tmp_path)
@@ -0,0 +1,29 @@
+"""
+Run report phases: writing between a generator's yields is not counted in the generator's phases
+"""
+
+import time
+
+from tennis_data.instrument import RunReport, interleaved, phase
+
+
+def test_interleaved_time_is_taken_off_the_open_phases(tmp_path):
+    def timepoints():
+        with phase('timepoints'):
+            for i in range(3):
+                time.sleep(0.01)
+                yield i
+
+    with RunReport(tmp_path / 'report.json') as report:
+        with report.record('stage') as metrics:
+            with phase('run'):
+                for _ in timepoints():
+                    with interleaved('write'):
+                        time.sleep(0.05)
+
+    phases = metrics.phases
+    assert phases['write']['calls'] == 3
+    assert phases['write']['seconds'] >= 0.15
+    assert 0.03 <= phases['timepoints']['seconds'] < 0.1
+    assert 0.03 <= phases['run']['seconds'] < 0.1
+    assert metrics.seconds >= phases['write']['seconds'] + phases['timepoints']['seconds']
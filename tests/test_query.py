@@ -0,0 +1,56 @@
+"""
+Momentum queries on a small synthetic dataset: window and top_n must be positive integers
+"""
+
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+from tennis_data.ingest import load_atp_data
+from tennis_data.query import MomentumQuery
+from tennis_data.query.server import make_handler
+from tennis_data.synthetic import write_atp_csvs
+
+
+@pytest.fixture(scope='module')
+def query(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp('atp')
+    write_atp_csvs(data_dir, 0.05, 0)
+    return MomentumQuery(*load_atp_data(data_dir))
+
+
+@pytest.mark.parametrize('arguments', [{'top_n': 0}, {'top_n': -1}, {'window': 0}, {'window': -30}])
+def test_non_positive_window_or_top_n_is_rejected(query, arguments):
+    name = next(iter(arguments))
+    with pytest.raises(ValueError, match=f"{name} must be a positive integer"):
+        query.momentum('2010-01-01', **arguments)
+    with pytest.raises(ValueError, match=f"{name} must be a positive integer"):
+        query.timeline(**arguments)
+
+
+def test_top_n_limits_the_answer(query):
+    everyone = query.momentum('2010-01-01')
+    assert len(everyone) > 3
+    assert query.momentum('2010-01-01', top_n=3) == everyone[:3]
+
+
+@pytest.fixture
+def server_url(query):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(query))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_server_answers_bad_parameters_with_400(server_url):
+    response = requests.get(f"{server_url}/momentum?date=2010-01-01&top_n=0", timeout=5)
+    assert response.status_code == 400
+    assert json.loads(response.content) == {'error': "top_n must be a positive integer, got: 0"}
+
+    response = requests.get(f"{server_url}/momentum?date=2010-01-01&window=30&top_n=3", timeout=5)
+    assert response.status_code == 200
+    assert len(response.json()['players']) == 3